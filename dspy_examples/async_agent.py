@@ -0,0 +1,152 @@
+"""Answer many questions concurrently with the multi_tool.py ReAct agent.
+
+Questions run as asyncio tasks (at most ``--concurrency`` at a time), the LM is
+called through its async client, and the blocking tools (``search_web_agent``,
+``evaluate_math``) run on a thread pool so one slow tool call no longer stalls
+every other question.  Each question gets its own timeout.
+
+Usage:
+    python async_agent.py "What is 12 * 7?" "Who wrote Hamlet?" --concurrency 4
+    python async_agent.py --bench 40 --concurrency 8 --latency 0.2
+        (throughput against the local Ollama and search stand-ins, no network)
+"""
+
+import argparse
+import asyncio
+import contextvars
+import functools
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import dspy
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def make_async_tool(fn, executor):
+    """Wrap a blocking tool so ReAct awaits it on ``executor`` instead of the event loop.
+
+    The call runs in a copy of the task's context, so the tracer's parent span
+    and any ``dspy.context`` overrides are visible inside the tool.
+    """
+    @functools.wraps(fn)
+    async def run_in_thread(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(executor, functools.partial(ctx.run, fn, *args, **kwargs))
+    return dspy.Tool(run_in_thread)
+
+
+class AsyncAgentRunner:
+    """Run a ReAct agent over many questions with bounded concurrency.
+
+    Args:
+        tools: Blocking tool functions (default: the multi_tool.py tools).
+        signature: ReAct signature.
+        max_concurrency: Questions in flight at once.
+        tool_workers: Threads available to blocking tools.
+        timeout: Seconds allowed per question.
+        verbose: Print every traced step as it ends (noisy when concurrent).
+    """
+
+    def __init__(self, tools=None, signature="question -> answer: float",
+                 max_concurrency=8, tool_workers=8, timeout=120.0, verbose=False):
+        if tools is None:
+            import multi_tool
+            tools = [multi_tool.search_web_agent, multi_tool.evaluate_math]
+            # Spans are kept per task, so the tracer stays on; verbose only adds per-step prints.
+            multi_tool.tracer.verbose = verbose
+        self.executor = ThreadPoolExecutor(max_workers=tool_workers, thread_name_prefix='agent-tool')
+        self.react = dspy.ReAct(signature, tools=[make_async_tool(t, self.executor) for t in tools])
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.verbose = verbose
+
+    async def ask(self, question, semaphore=None):
+        """Answer one question; returns a result dict instead of raising."""
+        semaphore = semaphore or asyncio.Semaphore(1)
+        async with semaphore:
+            start = time.perf_counter()
+            result = {'question': question, 'answer': None, 'error': None}
+            try:
+                pred = await asyncio.wait_for(self.react.acall(question=question), self.timeout)
+                result['answer'] = pred.answer
+                result['trajectory'] = pred.trajectory
+            except asyncio.TimeoutError:
+                result['error'] = f"Timed out after {self.timeout:.0f}s"
+            except Exception as e:
+                result['error'] = f"{type(e).__name__}: {e}"
+            result['elapsed'] = time.perf_counter() - start
+            return result
+
+    async def run(self, questions):
+        """Answer all ``questions`` concurrently; results keep the input order."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        return await asyncio.gather(*(self.ask(q, semaphore) for q in questions))
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def use_standins(latency):
+    """Point the agent's LM and search backends at local stand-in servers.
+
+    Must run before multi_tool is imported, since it reads its config from env.
+    """
+    from utils import ollama_standin, search_standin
+
+    lm_server = ollama_standin.start_server(latency=latency, tool_steps=2)
+    search_server = search_standin.start_server(latency=latency / 10)
+    search_url = "http://%s:%d" % search_server.server_address
+    os.environ.update({
+        'OLLAMA_API_BASE': "http://%s:%d" % lm_server.server_address,
+        'SEARCH_BACKENDS': 'searx',
+        'SEARCH_SEARX_URL': search_url,
+        'SEARCH_CACHE_MODE': 'off',
+    })
+    return lm_server, search_server
+
+
+def benchmark(n_questions, concurrency, latency):
+    use_standins(latency)
+    import multi_tool
+    multi_tool.lm.cache = False  # every question must reach the (stand-in) server
+
+    questions = [f"What is {i} multiplied by 7?" for i in range(n_questions)]
+    for limit in (1, concurrency):
+        runner = AsyncAgentRunner(max_concurrency=limit, tool_workers=max(4, limit))
+        start = time.perf_counter()
+        results = asyncio.run(runner.run(questions))
+        wall = time.perf_counter() - start
+        runner.close()
+        failed = sum(1 for r in results if r['error'])
+        print(f"concurrency {limit:3d}: {n_questions} questions in {wall:.2f}s "
+              f"-> {n_questions / wall * 60:.0f} questions/minute ({failed} failed)")
+    multi_tool.close_resources()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the multi-tool ReAct agent over many questions concurrently.")
+    parser.add_argument("questions", nargs="*", help="Questions to answer")
+    parser.add_argument("--concurrency", type=int, default=8, help="Questions in flight at once")
+    parser.add_argument("--tool-workers", type=int, default=8, help="Threads for blocking tools")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds allowed per question")
+    parser.add_argument("--verbose", action="store_true", help="Print every agent step")
+    parser.add_argument("--bench", type=int, metavar="N", help="Benchmark N questions against local stand-ins")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stand-in LM latency for --bench")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(args.bench, args.concurrency, args.latency)
+    else:
+        import multi_tool
+        runner = AsyncAgentRunner(max_concurrency=args.concurrency, tool_workers=args.tool_workers,
+                                  timeout=args.timeout, verbose=args.verbose)
+        questions = args.questions or [multi_tool.QUESTION]
+        for result in asyncio.run(runner.run(questions)):
+            outcome = result['answer'] if result['error'] is None else f"ERROR {result['error']}"
+            print(f"[{result['elapsed']:.2f}s] {result['question']} -> {outcome}")
+        runner.close()
+        multi_tool.close_resources()
@@ -1,92 +1,110 @@
+import argparse
 import dspy
 import os
 from typing import Literal
-import requests
-from urllib.parse import quote
+import sys
+
+# Add parent dir to path to import utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.interpreter_pool import InterpreterPool
+from utils.safe_math import safe_eval, UnsupportedExpression
+from utils.search_cache import get_default_cache
+from utils.web_search import build_engine_from_env
+from utils.tracing import TracingCallback
+from utils.jsonl_batch import run_jsonl_batch, add_batch_arguments, default_output_path
 
 # --- Configuration ---
-OLLAMA_API_BASE = os.getenv("OLLAMA_API_BASE", "http://localhost:11434")
-OLLAMA_MODEL_NAME = os.getenv("OLLAMA_MODEL_NAME", "gemma3:1b")
-lm = dspy.LM(f'ollama/{OLLAMA_MODEL_NAME}', api_base=OLLAMA_API_BASE)
-dspy.configure(lm=lm)
-import time
+from utils.lm_config import configure_lm
+lm = configure_lm()  # built on first use; OLLAMA_MODEL_NAME / OLLAMA_API_BASE override
 
 from dspy.utils.logging_utils import enable_logging, disable_logging
-import dspy.utils.logging_utils as logging_utils
+
+# Warm sandboxes shared by every evaluate_math call instead of one per call.
+INTERPRETER_POOL_SIZE = int(os.getenv("INTERPRETER_POOL_SIZE", "2"))
+interpreter_pool = InterpreterPool(size=INTERPRETER_POOL_SIZE)
+
+# How many evaluate_math calls took each path ("fast" in-process AST, "sandbox").
+evaluate_math_paths = {"fast": 0, "sandbox": 0}
 
 def evaluate_math(expression: str) -> float:
-    start_time = time.time()
-    result = dspy.PythonInterpreter({}).execute(expression)
-    elapsed = time.time() - start_time
-    # Use dspy's internal logging so prints propagate through agent callbacks/logging.
-    print_fn = getattr(logging_utils, "eprint", print)
-    print_fn(f"[evaluate_math] Elapsed time: {elapsed:.3f} seconds")
+    try:
+        # Plain arithmetic is evaluated in-process; anything else goes to the sandbox.
+        result = safe_eval(expression)
+        path = "fast"
+    except UnsupportedExpression:
+        result = interpreter_pool.execute(expression)
+        path = "sandbox"
+    evaluate_math_paths[path] += 1
+    # Recorded on the tool span; latency itself comes from the tracer.
+    tracer.annotate(path=path)
     return result
 
+# Shared on-disk cache; SEARCH_CACHE_MODE=cache-only replays runs without network.
+search_cache = get_default_cache()
+# Same backend registry as web_search_agent.py (see utils/web_search.py).
+search_engine = build_engine_from_env()
+
+SEARCH_MAX_RESULTS = 3
+
+@search_cache.cached(search_engine.cache_name, max_results=SEARCH_MAX_RESULTS)
 def search_web_agent(query: str) -> str:
-    """Search the web using ddgs library or fallback methods."""
-    import time
-    start_time = time.time()
-    results = []
-    
-    # Try using ddgs library (best option)
-    try:
-        from ddgs import DDGS
-        with DDGS() as ddgs:
-            # Get text results
-            search_results = list(ddgs.text(query, max_results=3))
-            for result in search_results:
-                if 'body' in result:
-                    results.append(result['body'])
-                elif 'text' in result:
-                    results.append(result['text'])
-                elif 'snippet' in result:
-                    results.append(result['snippet'])
-    except ImportError:
-        # If duckduckgo-search is not installed, try alternative methods
-        try:
-            # Alternative: Use SearXNG public instance (if available)
-            searx_url = "https://searx.be/search"
-            params = {
-                'q': query,
-                'format': 'json',
-                'engines': 'google,bing,duckduckgo'
-            }
-            response = requests.get(searx_url, params=params, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                for result in data.get('results', [])[:3]:
-                    if 'content' in result:
-                        results.append(result['content'])
-                    elif 'snippet' in result:
-                        results.append(result['snippet'])
-        except Exception:
-            print(f"Warning: Web search failed in agent")
-    
-    elapsed = time.time() - start_time
-    print_fn = getattr(logging_utils, "eprint", print)
-    print_fn(f"[search_web_agent] Elapsed time: {elapsed:.3f} seconds")
+    """Search the web across the configured backends (ddgs, SearXNG, DuckDuckGo HTML)."""
+    results = search_engine.search(query, max_results=SEARCH_MAX_RESULTS)
     if not results:
+        print(f"Warning: Web search failed in agent")
         return []
     
     return results
 
-from dspy.utils.callback import BaseCallback
-class AgentLoggingCallback(BaseCallback):
-    def on_module_end(self, call_id, outputs, exception):
-        # Determine if the step was reasoning (Thought) or acting (tool use)
-        step = "Reasoning" if any(k.startswith("Thought") for k in outputs) else "Acting"
-        print(f"== {step} Step ==")
-        for k, v in outputs.items():
-            print(f"  {k}: {v}")
-        print("\n")
-
-dspy.settings.configure(lm=lm, callbacks=[AgentLoggingCallback()])
+# Span tree of every module, LM and tool call; TRACE_VERBOSE=1 prints each step as it ends.
+tracer = TracingCallback(verbose=os.getenv("TRACE_VERBOSE") == "1")
+# Set TRACE_PATH to also write a Chrome trace-event JSON (chrome://tracing, ui.perfetto.dev).
+TRACE_PATH = os.getenv("TRACE_PATH")
+
+dspy.settings.configure(lm=lm, callbacks=[tracer])
 enable_logging()
 react = dspy.ReAct("question -> answer: float", tools=[search_web_agent, evaluate_math])
 
-try:
-    pred = react(question="What is 9362158 divided by the year of birth of David Gregory of Kinnairdy castle?")
-    print(pred.answer)
-except Exception as e:
-    print(f"Error in agent example: {e}")
+QUESTION = "What is 9362158 divided by the year of birth of David Gregory of Kinnairdy castle?"
+
+def close_resources():
+    interpreter_pool.close()
+    search_engine.close()
+    print(f"Search cache: {search_cache.stats}")
+    print(f"evaluate_math paths: {evaluate_math_paths}")
+    print(tracer.latency_report())
+    if TRACE_PATH:
+        tracer.write_chrome_trace(TRACE_PATH)
+        print(f"Trace written to {TRACE_PATH}")
+
+def answer_question(question, timer=None):
+    pred = react(question=question)
+    return {"answer": pred.answer, "trajectory": pred.trajectory}
+
+def main():
+    try:
+        pred = react(question=QUESTION)
+        print(pred.answer)
+    except Exception as e:
+        print(f"Error in agent example: {e}")
+    finally:
+        close_resources()
+
+def batch_main(args):
+    output = args.output or default_output_path(args.batch)
+    try:
+        summary = run_jsonl_batch(args.batch, output, answer_question,
+                                  workers=args.workers, resume=not args.no_resume)
+        print(f"Batch complete: {summary} -> {output}")
+    finally:
+        close_resources()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DSPy ReAct agent with web search and math tools.")
+    add_batch_arguments(parser)
+    args = parser.parse_args()
+    if args.batch:
+        batch_main(args)
+    else:
+        main()
@@ -1,95 +1,114 @@
+import argparse
 import dspy
 import os
 from typing import Literal
-import requests
-from urllib.parse import quote
+import sys
+import threading
+
+# Add parent dir to path to import utils
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.search_cache import get_default_cache
+from utils.web_search import build_engine_from_env
+from utils.retrieval import open_index
+from utils.jsonl_batch import run_jsonl_batch, add_batch_arguments, default_output_path
 
 # --- Configuration ---
-OLLAMA_API_BASE = os.getenv("OLLAMA_API_BASE", "http://localhost:11434")
-OLLAMA_MODEL_NAME = os.getenv("OLLAMA_MODEL_NAME", "gemma3:1b")
-lm = dspy.LM(f'ollama/{OLLAMA_MODEL_NAME}', api_base=OLLAMA_API_BASE)
-dspy.configure(lm=lm)
+from utils.lm_config import configure_lm
+lm = configure_lm()  # built on first use; OLLAMA_MODEL_NAME / OLLAMA_API_BASE override
+
+# Shared on-disk cache; SEARCH_CACHE_MODE=cache-only replays runs without network.
+search_cache = get_default_cache()
+
+# Backends (SEARCH_BACKENDS) run concurrently: the next one is hedged in after
+# SEARCH_HEDGE_DELAY seconds without an answer, or all are merged when SEARCH_MERGE=1.
+search_engine = build_engine_from_env()
 
+SEARCH_MAX_RESULTS = 5
+
+@search_cache.cached(search_engine.cache_name, max_results=SEARCH_MAX_RESULTS)
 def search_web(query: str) -> list[str]:
-    """Search the web using ddgs library or fallback methods."""
-    results = []
-    
-    # Try using ddgs library (best option)
-    try:
-        from ddgs import DDGS
-        with DDGS() as ddgs:
-            # Get text results
-            search_results = list(ddgs.text(query, max_results=5))
-            if search_results:
-                for result in search_results:
-                    # Try different possible keys in the result dictionary
-                    # The ddgs library typically returns 'body' for text results
-                    text_content = (result.get('body') or result.get('text') or 
-                                  result.get('snippet') or result.get('description') or
-                                  str(result))  # Fallback to string representation
-                    if text_content and text_content.strip():
-                        results.append(text_content.strip())
-    except ImportError:
-        # Package not installed, will try fallbacks
-        pass
-    except Exception as e:
-        # If ddgs fails for any reason, try fallbacks
-        print(f"Warning: ddgs search failed: {e}")
-    
-    # If ddgs didn't return results, try fallback methods
-    if not results:
-        try:
-            # Alternative 1: Use SearXNG public instance (if available)
-            searx_url = "https://searx.be/search"
-            params = {
-                'q': query,
-                'format': 'json',
-                'engines': 'google,bing,duckduckgo'
-            }
-            response = requests.get(searx_url, params=params, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                for result in data.get('results', [])[:3]:
-                    if 'content' in result:
-                        results.append(result['content'])
-                    elif 'snippet' in result:
-                        results.append(result['snippet'])
-        except Exception:
-            # Alternative 2: Try Brave Search API (requires API key, but we'll try without)
-            try:
-                # Using a simple web scraping approach with requests
-                url = f"https://html.duckduckgo.com/html/?q={quote(query)}"
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                }
-                response = requests.get(url, headers=headers, timeout=10)
-                if response.status_code == 200:
-                    # Simple text extraction (basic fallback)
-                    import re
-                    # Extract text between result snippets (basic pattern matching)
-                    text = response.text
-                    # Look for result snippets in the HTML
-                    snippets = re.findall(r'result__snippet[^>]*>([^<]+)', text)
-                    results.extend(snippets[:3])
-            except Exception as e2:
-                print(f"Warning: HTML scraping fallback failed: {e2}")
-    
+    """Search the web across the configured backends (ddgs, SearXNG, DuckDuckGo HTML)."""
+    results = search_engine.search(query, max_results=SEARCH_MAX_RESULTS)
+
     if not results:
         print(f"Warning: No search results found for query: {query}")
         # Return empty list instead of a placeholder to avoid misleading the LLM
         return []
-    
+
     return results
 
+# RETRIEVAL_INDEX=<dir> answers from a local BM25/vector index (utils/retrieval.py)
+# instead of the web.
+RETRIEVAL_INDEX = os.getenv("RETRIEVAL_INDEX")
+_retrieval_index = None
+_retrieval_lock = threading.Lock()
+
+def get_retrieval_index():
+    """The RETRIEVAL_INDEX index, opened on first use and shared by every question."""
+    global _retrieval_index
+    with _retrieval_lock:
+        if _retrieval_index is None:
+            _retrieval_index = open_index(RETRIEVAL_INDEX)
+        return _retrieval_index
+
+def retrieve_context(question: str) -> list[str]:
+    if RETRIEVAL_INDEX:
+        return get_retrieval_index().retrieve(question, k=5)
+    return search_web(question)
+
 rag = dspy.ChainOfThought('context, question -> response')
 
-question = "What's the name of the castle that David Gregory inherited?"
-try:
-    context = search_web(question)
-    if context:
-        ragResponse = rag(context=context, question=question)
-        print(ragResponse)
+QUESTION = "What's the name of the castle that David Gregory inherited?"
+
+def answer_question(question, timer=None):
+    if timer is not None:
+        with timer.step("retrieve_context"):
+            context = retrieve_context(question)
+    else:
+        context = retrieve_context(question)
+    if not context:
+        raise RuntimeError("No context retrieved")
+    ragResponse = rag(context=context, question=question)
+    return {"answer": ragResponse.response, "reasoning": ragResponse.reasoning, "context": context}
+
+def close_resources():
+    global _retrieval_index
+    print(f"Search cache: {search_cache.stats}")
+    print(f"Search backends: {search_engine.stats_report()}")
+    search_engine.close()
+    with _retrieval_lock:
+        if _retrieval_index is not None:
+            _retrieval_index.close()
+            _retrieval_index = None
+
+def main():
+    question = QUESTION
+    try:
+        context = retrieve_context(question)
+        if context:
+            ragResponse = rag(context=context, question=question)
+            print(ragResponse)
+        else:
+            print("Skipping RAG example: No context retrieved")
+    except Exception as e:
+        print(f"Error in RAG example: {e}")
+    close_resources()
+
+def batch_main(args):
+    output = args.output or default_output_path(args.batch)
+    try:
+        summary = run_jsonl_batch(args.batch, output, answer_question,
+                                  workers=args.workers, resume=not args.no_resume)
+        print(f"Batch complete: {summary} -> {output}")
+    finally:
+        close_resources()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Answer questions with web search + ChainOfThought.")
+    add_batch_arguments(parser)
+    args = parser.parse_args()
+    if args.batch:
+        batch_main(args)
     else:
-        print("Skipping RAG example: Web search unavailable")
-except Exception as e:
-    print(f"Error in RAG example: {e}")
+        main()
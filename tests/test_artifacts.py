@@ -0,0 +1,68 @@
+import dspy
+
+from utils.artifacts import artifact_key
+from utils.evaluation import program_fingerprint
+
+
+class QA(dspy.Module):
+    def __init__(self):
+        super().__init__()
+        self.answer = dspy.Predict('question -> answer')
+
+    def forward(self, question):
+        return self.answer(question=question)
+
+
+def metric(example, prediction, trace=None):
+    return example.answer == prediction.answer
+
+
+TRAINSET = [dspy.Example(question='2 + 2?', answer='4').with_inputs('question')]
+
+
+def lm(**kwargs):
+    settings = {'api_base': 'http://localhost:11434', 'temperature': 0.0}
+    settings.update(kwargs)
+    return dspy.LM('ollama_chat/llama3.2', **settings)
+
+
+def key(student=None, trainset=TRAINSET, optimizer=None, task_lm=None):
+    optimizer = optimizer or dspy.BootstrapFewShot(metric=metric, max_bootstrapped_demos=2)
+    return artifact_key(student or QA(), trainset, metric, optimizer, lm=task_lm or lm())
+
+
+def test_key_is_stable():
+    assert key() == key()
+
+
+def test_key_changes_with_the_lm_endpoint_and_settings():
+    assert key(task_lm=lm(api_base='http://gpu-box:11434')) != key()
+    assert key(task_lm=lm(temperature=0.7)) != key()
+    assert key(task_lm=dspy.LM('ollama_chat/qwen2.5', api_base='http://localhost:11434', temperature=0.0)) != key()
+
+
+def test_key_ignores_credentials_and_transport_settings():
+    assert key(task_lm=lm(api_key='secret', num_retries=9)) == key()
+
+
+def test_key_changes_with_trainset_signature_and_optimizer():
+    extra = TRAINSET + [dspy.Example(question='3 + 3?', answer='6').with_inputs('question')]
+    assert key(trainset=extra) != key()
+
+    student = QA()
+    student.answer = dspy.Predict('question -> answer: int')
+    assert key(student=student) != key()
+
+    assert key(optimizer=dspy.BootstrapFewShot(metric=metric, max_bootstrapped_demos=4)) != key()
+
+
+def test_key_ignores_optimizer_bookkeeping():
+    quiet = dspy.BootstrapFewShot(metric=metric, max_bootstrapped_demos=2)
+    quiet.verbose = True
+    assert key(optimizer=quiet) == key()
+
+
+def test_program_fingerprint_includes_the_lm():
+    program = QA()
+    assert program_fingerprint(program, lm()) == program_fingerprint(QA(), lm())
+    assert program_fingerprint(program, lm(temperature=0.7)) != program_fingerprint(program, lm())
@@ -0,0 +1,72 @@
+import pytest
+
+from utils import budget as budget_module
+from utils.budget import BudgetExceeded, LMBudget
+
+
+def test_call_cap():
+    budget = LMBudget(max_calls=2, stream=None)
+    budget.acquire()
+    budget.acquire()
+    with pytest.raises(BudgetExceeded, match='call budget of 2'):
+        budget.acquire()
+    assert budget.counters()['refused_calls'] == 1
+
+
+def test_cache_hits_are_free():
+    budget = LMBudget(max_calls=1, stream=None)
+    budget.acquire()
+    budget.charge({'prompt_tokens': 100}, cache_hit=True)
+    budget.acquire()
+    counters = budget.counters()
+    assert counters['calls'] == 1 and counters['cached_calls'] == 1
+    assert counters['prompt_tokens'] == 0
+
+
+def test_prompt_token_cap():
+    budget = LMBudget(max_prompt_tokens=100, stream=None)
+    budget.acquire()
+    budget.charge({'prompt_tokens': 60, 'completion_tokens': 5})
+    budget.acquire()
+    budget.charge({'prompt_tokens': 60})
+    assert budget.exceeded == 'prompt token budget of 100 reached'
+    with pytest.raises(BudgetExceeded):
+        budget.acquire()
+    assert budget.counters()['completion_tokens'] == 5
+
+
+def test_time_cap(monkeypatch):
+    now = [50.0]
+    monkeypatch.setattr(budget_module.time, 'perf_counter', lambda: now[0])
+    budget = LMBudget(max_seconds=10, stream=None)
+    budget.acquire()
+    now[0] += 9
+    budget.acquire()
+    now[0] += 2
+    with pytest.raises(BudgetExceeded, match='time budget'):
+        budget.acquire()
+
+
+def test_unlimited_by_default():
+    budget = LMBudget(stream=None)
+    for _ in range(1000):
+        budget.acquire()
+        budget.charge({'prompt_tokens': 10 ** 6})
+    assert budget.exceeded is None
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv('LM_BUDGET_CALLS', '7')
+    monkeypatch.setenv('LM_BUDGET_SECONDS', '1.5')
+    monkeypatch.delenv('LM_BUDGET_PROMPT_TOKENS', raising=False)
+    budget = LMBudget.from_env(stream=None)
+    assert (budget.max_calls, budget.max_prompt_tokens, budget.max_seconds) == (7, None, 1.5)
+
+
+def test_status_line_reports_the_reason(capsys):
+    budget = LMBudget(max_calls=1, stream=None)
+    budget.acquire()
+    with pytest.raises(BudgetExceeded):
+        budget.acquire()
+    assert budget.status_line().startswith('[budget] calls 1/1')
+    assert 'STOPPED: call budget of 1 reached' in budget.status_line()
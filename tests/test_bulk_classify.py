@@ -0,0 +1,55 @@
+import dspy
+import pytest
+
+from utils.bulk_classify import LabelCache, allowed_labels, normalize_label, normalize_text
+
+LABELS = ['question', 'bug report', 'feature-request']
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('question', 'question'),
+    ('  Bug   Report. ', 'bug report'),
+    ('"feature-request"', 'feature-request'),
+    ('This is clearly a bug report.', 'bug report'),
+    ('questoin', 'question'),
+    ('feature request', 'feature-request'),
+])
+def test_normalize_label_maps_onto_allowed_labels(raw, expected):
+    assert normalize_label(raw, LABELS) == expected
+
+
+@pytest.mark.parametrize('raw', [
+    'either a question or a bug report',
+    'spam',
+    '',
+])
+def test_normalize_label_rejects_ambiguous_or_unknown_replies(raw):
+    assert normalize_label(raw, LABELS) is None
+
+
+def test_normalize_text():
+    assert normalize_text('  Ｈello\tWORLD \n') == 'hello world'
+
+
+def test_allowed_labels_from_the_field_description():
+    signature = dspy.Signature(
+        {'text': dspy.InputField(),
+         'intent': dspy.OutputField(desc="The intent, one of: question, 'bug report', feature-request")})
+    assert allowed_labels(signature, 'intent') == LABELS
+
+    bracketed = dspy.Signature(
+        {'text': dspy.InputField(), 'intent': dspy.OutputField(desc='one of [a, b]')})
+    assert allowed_labels(bracketed, 'intent') == ['a', 'b']
+
+    unlabeled = dspy.Signature({'text': dspy.InputField(), 'intent': dspy.OutputField()})
+    with pytest.raises(ValueError):
+        allowed_labels(unlabeled, 'intent')
+
+
+def test_label_cache_is_keyed_by_classifier(tmp_path):
+    cache = LabelCache(str(tmp_path / 'labels.sqlite'))
+    cache.put_many('clf-a', {'hello': 'question', 'crash': 'bug report'})
+    assert cache.get_many('clf-a', ['hello', 'crash', 'other']) == {'hello': 'question', 'crash': 'bug report'}
+    assert cache.get_many('clf-b', ['hello']) == {}
+    cache.clear()
+    assert cache.get_many('clf-a', ['hello']) == {}
@@ -0,0 +1,119 @@
+import pytest
+
+from utils import interpreter_pool
+from utils.interpreter_pool import InterpreterPool
+
+
+class FakeInterpreter:
+    """Stands in for dspy.PythonInterpreter: records code, evaluates plain expressions."""
+
+    def __init__(self):
+        self.executed = []
+        self.shut_down = False
+
+    def execute(self, code, variables=None):
+        self.executed.append(code)
+        if code.startswith('raise'):
+            raise RuntimeError(code)
+        try:
+            return eval(code, {}, dict(variables or {}))
+        except SyntaxError:
+            return None
+
+    def shutdown(self):
+        self.shut_down = True
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(interpreter_pool.time, 'monotonic', clock)
+    return clock
+
+
+def make_pool(**kwargs):
+    created = []
+
+    def factory():
+        created.append(FakeInterpreter())
+        return created[-1]
+
+    return InterpreterPool(factory=factory, **kwargs), created
+
+
+def test_reuses_a_warm_interpreter(clock):
+    pool, created = make_pool(size=2)
+    assert pool.execute('6 * 7') == 42
+    assert pool.execute('1 + 1') == 2
+    assert len(created) == 1
+    assert pool.stats['created'] == 1 and pool.stats['reused'] == 1
+
+
+def test_resets_globals_between_calls(clock):
+    pool, created = make_pool(size=1)
+    pool.execute('1')
+    assert created[0].executed[0] == interpreter_pool.BASELINE_CODE
+    assert created[0].executed[-1] == interpreter_pool.RESET_CODE
+
+
+def test_evict_idle_shuts_down_expired_interpreters(clock):
+    pool, created = make_pool(size=2, idle_timeout=10)
+    pool.warm_up()
+    assert len(created) == 2
+    clock.now += 5
+    assert pool.evict_idle() == 0
+    clock.now += 6
+    assert pool.evict_idle() == 2
+    assert all(interpreter.shut_down for interpreter in created)
+    assert pool.stats['evicted'] == 2
+
+    pool.execute('1')
+    assert len(created) == 3
+
+
+def test_acquire_evicts_before_reusing(clock):
+    pool, created = make_pool(size=1, idle_timeout=10)
+    pool.execute('1')
+    clock.now += 11
+    pool.execute('1')
+    assert created[0].shut_down
+    assert len(created) == 2 and pool.stats['reused'] == 0
+
+
+def test_no_idle_timeout_keeps_interpreters(clock):
+    pool, created = make_pool(size=1, idle_timeout=None)
+    pool.execute('1')
+    clock.now += 10 ** 6
+    assert pool.evict_idle() == 0
+    assert not created[0].shut_down
+
+
+def test_failed_call_triggers_a_health_check(clock):
+    pool, created = make_pool(size=1)
+    with pytest.raises(RuntimeError):
+        pool.execute('raise boom')
+    pool.execute('1')
+    assert interpreter_pool.HEALTH_CHECK_CODE in created[0].executed
+    assert len(created) == 1
+
+
+def test_close_shuts_down_and_refuses_new_work(clock):
+    pool, created = make_pool(size=1)
+    pool.execute('1')
+    pool.close()
+    assert created[0].shut_down
+    with pytest.raises(RuntimeError):
+        pool.execute('1')
+
+
+def test_size_must_be_positive():
+    with pytest.raises(ValueError):
+        InterpreterPool(size=0)
@@ -0,0 +1,99 @@
+import json
+
+from utils.jsonl_batch import InvalidLine, completed_lines, iter_questions, parse_record, run_jsonl_batch
+
+
+def write_lines(path, lines):
+    path.write_text(''.join(line + '\n' for line in lines), encoding='utf-8')
+
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+
+
+def test_parse_record():
+    assert parse_record('{"question": "q", "id": 3}', 'question') == {'question': 'q', 'id': 3}
+    assert parse_record('"bare"', 'question') == {'question': 'bare'}
+    assert isinstance(parse_record('{not json', 'question'), InvalidLine)
+    assert isinstance(parse_record('[1, 2]', 'question'), InvalidLine)
+
+
+def test_iter_questions_skips_blank_and_done_lines(tmp_path):
+    path = tmp_path / 'in.jsonl'
+    write_lines(path, ['"a"', '', '"b"', '{oops', '"c"'])
+    items = list(iter_questions(str(path), skip={3}))
+    assert [line_no for line_no, _ in items] == [1, 4, 5]
+    assert isinstance(items[1][1], InvalidLine)
+
+
+def test_completed_lines_keeps_answers_and_drops_failures(tmp_path):
+    path = tmp_path / 'out.jsonl'
+    write_lines(path, [json.dumps({'line': 1, 'error': None}),
+                       json.dumps({'line': 2, 'error': 'TimeoutError'}),
+                       json.dumps({'line': 3, 'error': None})])
+    assert completed_lines(str(path)) == {1, 3}
+    assert [r['line'] for r in read_records(path)] == [1, 3]
+
+
+def test_completed_lines_truncates_a_partial_last_line(tmp_path):
+    path = tmp_path / 'out.jsonl'
+    path.write_text(json.dumps({'line': 1, 'error': None}) + '\n{"line": 2, "err', encoding='utf-8')
+    assert completed_lines(str(path)) == {1}
+    assert path.read_text(encoding='utf-8').endswith('}\n')
+
+
+def test_completed_lines_of_missing_file(tmp_path):
+    assert completed_lines(str(tmp_path / 'missing.jsonl')) == set()
+
+
+def test_run_answers_every_line_and_records_failures(tmp_path):
+    source, output = tmp_path / 'in.jsonl', tmp_path / 'out.jsonl'
+    write_lines(source, [json.dumps({'question': 'q1', 'id': 'a'}), '{broken', '"fail"', '"q4"'])
+
+    def answer(question, timer):
+        if question == 'fail':
+            raise RuntimeError('LM down')
+        with timer.step('lookup'):
+            return {'answer': question.upper()}
+
+    summary = run_jsonl_batch(str(source), str(output), answer, workers=2, log=None)
+    assert (summary['answered'], summary['failed'], summary['skipped']) == (2, 2, 0)
+    records = {r['line']: r for r in read_records(output)}
+    assert records[1]['answer'] == 'Q1' and records[1]['id'] == 'a'
+    assert records[1]['timings'][0]['name'] == 'lookup'
+    assert records[2]['error'].startswith('InvalidLine')
+    assert records[3]['error'] == 'RuntimeError: LM down'
+    assert records[4]['answer'] == 'Q4'
+
+
+def test_resume_retries_only_failed_lines(tmp_path):
+    source, output = tmp_path / 'in.jsonl', tmp_path / 'out.jsonl'
+    write_lines(source, ['"q1"', '"q2"', '"q3"'])
+    flaky = {'q2'}
+    asked = []
+
+    def answer(question, timer):
+        asked.append(question)
+        if question in flaky:
+            raise RuntimeError('transient')
+        return {'answer': question}
+
+    run_jsonl_batch(str(source), str(output), answer, workers=1, log=None)
+    flaky.clear()
+    asked.clear()
+    summary = run_jsonl_batch(str(source), str(output), answer, workers=1, log=None)
+    assert asked == ['q2']
+    assert summary['skipped'] == 2 and summary['answered'] == 1
+    records = read_records(output)
+    assert sorted(r['line'] for r in records) == [1, 2, 3]
+    assert not any(r['error'] for r in records)
+
+
+def test_no_resume_starts_over(tmp_path):
+    source, output = tmp_path / 'in.jsonl', tmp_path / 'out.jsonl'
+    write_lines(source, ['"q1"'])
+    answer = lambda question, timer: {'answer': question}
+    run_jsonl_batch(str(source), str(output), answer, log=None)
+    summary = run_jsonl_batch(str(source), str(output), answer, resume=False, log=None)
+    assert summary['answered'] == 1
+    assert len(read_records(output)) == 1
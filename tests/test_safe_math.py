@@ -0,0 +1,55 @@
+import math
+
+import pytest
+
+from utils.safe_math import MAX_FACTORIAL, UnsupportedExpression, safe_eval
+
+
+@pytest.mark.parametrize('expression, expected', [
+    ('9362158 / 1664', 9362158 / 1664),
+    ('2 ** 10 + 3 * 4', 1036),
+    ('-(7 // 2) % 5', 2),
+    ('1 << 8', 256),
+    ('sqrt(16) + math.floor(2.7)', 6.0),
+    ('1 < 2 <= 2', True),
+    ('round(pi, 2)', 3.14),
+])
+def test_evaluates_arithmetic(expression, expected):
+    assert safe_eval(expression) == expected
+
+
+@pytest.mark.parametrize('expression', [
+    '9 ** 9 ** 9',
+    '(9 ** 9999) ** 9999',
+    '2 ** 20000',
+    '(1 << 9000) * (1 << 9000)',
+    '1 << 20000',
+    f'factorial({MAX_FACTORIAL + 1})',
+])
+def test_rejects_oversized_results(expression):
+    with pytest.raises(UnsupportedExpression):
+        safe_eval(expression)
+
+
+def test_allows_results_just_under_the_bound():
+    assert safe_eval('2 ** 4999') == 2 ** 4999
+    assert safe_eval(f'factorial({MAX_FACTORIAL})') == math.factorial(MAX_FACTORIAL)
+
+
+@pytest.mark.parametrize('expression', [
+    '__import__("os")',
+    'open("x")',
+    '"a" * 3',
+    'x + 1',
+    'True + 1',
+    'x = 1',
+    '[1, 2]',
+])
+def test_rejects_non_arithmetic(expression):
+    with pytest.raises(UnsupportedExpression):
+        safe_eval(expression)
+
+
+def test_arithmetic_errors_propagate():
+    with pytest.raises(ZeroDivisionError):
+        safe_eval('1 / 0')
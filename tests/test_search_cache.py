@@ -0,0 +1,113 @@
+import pytest
+
+from utils import search_cache
+from utils.search_cache import SearchCache, cache_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(search_cache.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'search.sqlite')
+
+
+def test_key_ignores_case_and_whitespace():
+    assert cache_key('searx', '  Capital  of\nFrance ') == cache_key('searx', 'capital of france')
+    assert cache_key('searx', 'q') != cache_key('ddgs', 'q')
+    assert cache_key('searx', 'q', 5) != cache_key('searx', 'q', 3)
+
+
+def test_hit_after_put(path, clock):
+    cache = SearchCache(path, mode='readwrite')
+    assert cache.get('searx', 'q') is None
+    cache.put('searx', 'q', ['a', 'b'])
+    assert cache.get('searx', 'Q ') == ['a', 'b']
+    assert cache.stats['hits'] == 1 and cache.stats['misses'] == 1
+
+
+def test_entries_expire_after_ttl(path, clock):
+    cache = SearchCache(path, ttl=60, mode='readwrite')
+    cache.put('searx', 'q', ['a'])
+    clock.now += 59
+    assert cache.get('searx', 'q') == ['a']
+    clock.now += 2
+    assert cache.get('searx', 'q') is None
+    assert cache.stats['stale'] == 1
+
+
+def test_cache_only_serves_expired_entries_and_never_writes(path, clock):
+    SearchCache(path, ttl=60, mode='readwrite').put('searx', 'q', ['a'])
+    clock.now += 3600
+    cache = SearchCache(path, ttl=60, mode='cache-only')
+    assert cache.get('searx', 'q') == ['a']
+    cache.put('searx', 'other', ['b'])
+    assert len(cache) == 1
+
+
+def test_evicts_least_recently_used(path, clock):
+    cache = SearchCache(path, max_entries=2, mode='readwrite')
+    cache.put('searx', 'a', ['1'])
+    clock.now += 1
+    cache.put('searx', 'b', ['2'])
+    clock.now += 1
+    assert cache.get('searx', 'a') == ['1']  # 'b' is now the least recently used
+    clock.now += 1
+    cache.put('searx', 'c', ['3'])
+    assert len(cache) == 2
+    assert cache.get('searx', 'b') is None
+    assert cache.get('searx', 'a') == ['1'] and cache.get('searx', 'c') == ['3']
+    assert cache.stats['evictions'] == 1
+
+
+def test_off_mode_bypasses_the_cache(path, clock):
+    cache = SearchCache(path, mode='off')
+    cache.put('searx', 'q', ['a'])
+    assert cache.get('searx', 'q') is None
+    assert len(cache) == 0
+
+
+def test_unknown_mode_is_rejected(path):
+    with pytest.raises(ValueError):
+        SearchCache(path, mode='sometimes')
+
+
+def test_cached_decorator(path, clock):
+    cache = SearchCache(path, mode='readwrite')
+    calls = []
+
+    @cache.cached('searx', max_results=5)
+    def search(query, max_results=5):
+        calls.append((query, max_results))
+        return [f"{query}:{max_results}"] if query != 'nothing' else []
+
+    assert search('q') == ['q:5']
+    assert search('q') == ['q:5']
+    assert search('q', max_results=3) == ['q:3']
+    assert calls == [('q', 5), ('q', 3)]
+
+    # Empty results count as failures and are not stored.
+    assert search('nothing') == [] and search('nothing') == []
+    assert calls.count(('nothing', 5)) == 2
+
+
+def test_cached_decorator_in_cache_only_mode(path, clock):
+    cache = SearchCache(path, mode='cache-only')
+
+    @cache.cached('searx')
+    def search(query):
+        raise AssertionError("cache-only must not search")
+
+    assert search('q') == []
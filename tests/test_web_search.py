@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+
+from utils.web_search import HedgedSearch, dedup
+
+
+class FakeBackend:
+    def __init__(self, results, delay=0.0, error=None):
+        self.results = results
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.started = threading.Event()
+
+    def __call__(self, query, max_results=5, timeout=10):
+        self.calls += 1
+        self.started.set()
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return list(self.results)
+
+
+@pytest.fixture
+def make_engine():
+    engines = []
+
+    def make(backends, **kwargs):
+        engines.append(HedgedSearch(backends, **kwargs))
+        return engines[-1]
+
+    yield make
+    for engine in engines:
+        engine.close()
+
+
+def test_dedup_keeps_first_occurrence():
+    assert dedup(['A  b', 'a b', 'c', '', 'C']) == ['A  b', 'c']
+
+
+def test_first_backend_answers_without_hedging(make_engine):
+    first, second = FakeBackend(['one']), FakeBackend(['two'])
+    engine = make_engine({'first': first, 'second': second}, hedge_delay=1.0, timeout=5)
+    assert engine.search('q') == ['one']
+    assert second.calls == 0
+
+
+def test_slow_backend_is_hedged(make_engine):
+    slow, fast = FakeBackend(['slow'], delay=1.0), FakeBackend(['fast'])
+    engine = make_engine({'slow': slow, 'fast': fast}, hedge_delay=0.05, timeout=5)
+    start = time.perf_counter()
+    assert engine.search('q') == ['fast']
+    assert time.perf_counter() - start < 0.9
+
+
+def test_failing_backend_brings_in_the_next(make_engine):
+    broken, good = FakeBackend([], error=RuntimeError('down')), FakeBackend(['good'])
+    engine = make_engine({'broken': broken, 'good': good}, hedge_delay=1.0, timeout=5)
+    assert engine.search('q') == ['good']
+    assert engine.stats['broken'].failures == 1
+    assert 'RuntimeError' in engine.stats['broken'].last_error
+
+
+def test_ranking_prefers_backends_that_succeed(make_engine):
+    broken, good = FakeBackend([], error=RuntimeError('down')), FakeBackend(['good'])
+    engine = make_engine({'broken': broken, 'good': good}, hedge_delay=1.0, timeout=5)
+    assert engine.ranked_backends() == ['broken', 'good']
+    engine.search('q')
+    assert engine.ranked_backends() == ['good', 'broken']
+    broken.calls = 0
+    assert engine.search('q') == ['good']
+    assert broken.calls == 0
+
+
+def test_merge_waits_for_all_and_dedups_in_backend_order(make_engine):
+    a = FakeBackend(['x', 'y'], delay=0.05)
+    b = FakeBackend(['Y', 'z'])
+    engine = make_engine({'a': a, 'b': b}, merge=True, timeout=5)
+    assert engine.search('q', max_results=5) == ['x', 'y', 'z']
+    assert engine.search('q', max_results=2) == ['x', 'y']
+
+
+def test_returns_empty_when_every_backend_fails(make_engine):
+    engine = make_engine({'a': FakeBackend([]), 'b': FakeBackend([], error=OSError('x'))},
+                         hedge_delay=0.01, timeout=5)
+    assert engine.search('q') == []
+
+
+def test_cache_name_includes_urls_and_merge_mode(make_engine):
+    backend = FakeBackend(['x'])
+    backend.base_url = 'http://127.0.0.1:8888'
+    engine = make_engine({'searx': backend, 'ddgs': FakeBackend(['y'])}, merge=True)
+    assert engine.cache_name == 'searx@http://127.0.0.1:8888+ddgs merged'
@@ -0,0 +1,162 @@
+"""Content-hashed store of compiled programs.
+
+Compiling 14_optimizer.py / 15_mipro_optimizer.py costs dozens of LM calls
+and gives the same program as long as its inputs are unchanged.
+``compile_or_load`` hashes those inputs:
+
+    signatures  source of the student's module class and the repr of each
+                predictor's signature (instructions, fields, types)
+    trainset    every example (see utils.evaluation.example_key)
+    metric      source of the metric function
+    optimizer   class and plain-valued settings (demo limits, seed, ...)
+    model       the task LM's model name, type, api_base and request
+                settings (temperature, max_tokens, ...), plus the same for
+                the optimizer's prompt model if it has one
+
+and keeps the compiled program's state (instructions and demos, saved with
+``program.save``) in ``.cache/programs/<key>.json``.  When a file for the key
+exists the student is loaded from it instead of being compiled again.
+
+    program, info = compile_or_load(optimizer, student, trainset=trainset)
+    print(info['status'])
+
+Set ``ARTIFACTS=refresh`` to recompile and overwrite, or ``ARTIFACTS=off``
+to bypass the store.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import time
+
+import dspy
+
+from utils.evaluation import example_key, lm_identity
+
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'programs')
+
+# Optimizer attributes that do not change the compiled program.
+IGNORED_SETTINGS = {'verbose', 'track_stats', 'log_dir', 'num_threads', 'resume', 'checkpoint_dir',
+                    'error_count', 'total_calls', 'prompt_model_total_calls'}
+
+
+def _source(obj):
+    try:
+        return inspect.getsource(obj)
+    except (OSError, TypeError):
+        return f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', repr(obj))}"
+
+
+def optimizer_settings(optimizer):
+    """Plain-valued settings of ``optimizer`` that affect what it compiles."""
+    return {
+        name: value for name, value in sorted(vars(optimizer).items())
+        if name not in IGNORED_SETTINGS and not name.startswith('_')
+        and (value is None or isinstance(value, (bool, int, float, str)))
+    }
+
+
+def artifact_key(student, trainset, metric, optimizer, lm=None):
+    """Hash of everything the compiled program depends on (see module docstring)."""
+    lm = lm or getattr(optimizer, 'task_model', None) or dspy.settings.lm
+    payload = {
+        'module': _source(type(student)),
+        'signatures': {name: repr(predictor.signature) for name, predictor in student.named_predictors()},
+        'trainset': [example_key(ex) for ex in trainset],
+        'metric': _source(metric),
+        'optimizer': {'class': f"{type(optimizer).__module__}.{type(optimizer).__qualname__}",
+                      'settings': optimizer_settings(optimizer)},
+        'model': lm_identity(lm),
+        'prompt_model': lm_identity(getattr(optimizer, 'prompt_model', None)),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class ArtifactStore:
+    """Compiled program states on disk, one JSON file per artifact key."""
+
+    def __init__(self, root=None):
+        self.root = root or os.getenv('ARTIFACTS_DIR', DEFAULT_ROOT)
+
+    def path(self, key):
+        return os.path.join(self.root, f"{key[:32]}.json")
+
+    def load(self, student, key):
+        """A copy of ``student`` with the stored state for ``key``, or None."""
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        program = student.deepcopy()
+        try:
+            program.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable artifact {path}: {type(e).__name__}: {e}")
+            return None
+        program._compiled = True
+        return program
+
+    def save(self, program, key):
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path(key)
+        tmp = path[:-len('.json')] + '.tmp.json'  # program.save picks the format from the suffix
+        program.save(tmp)
+        os.replace(tmp, path)
+        return path
+
+
+_default_store = None
+
+
+def get_default_store():
+    global _default_store
+    if _default_store is None:
+        _default_store = ArtifactStore()
+    return _default_store
+
+
+def compile_or_load(optimizer, student, *, trainset, compile=None, store=None, refresh=None, **compile_kwargs):
+    """Load the compiled program for this setup, or compile and store it.
+
+    Args:
+        compile: ``compile(optimizer, student, trainset=..., **compile_kwargs)``
+            returning ``(program, details)``, e.g.
+            ``utils.budget.compile_within_budget``.  Defaults to plain
+            ``optimizer.compile``.
+        store: An ArtifactStore (default: ``.cache/programs/``).
+        refresh: Recompile even if the artifact exists (default: ``ARTIFACTS=refresh``).
+
+    Returns ``(program, info)``.  ``info`` has ``status`` (a printable line),
+    ``loaded``, ``key``, ``path``, ``seconds`` and ``details`` (what
+    ``compile`` returned besides the program; None when loaded).  A run whose
+    details report ``exceeded`` (cut short by a budget) is not stored.
+    """
+    mode = os.getenv('ARTIFACTS', 'on').lower()
+    refresh = mode == 'refresh' if refresh is None else refresh
+    store = store or get_default_store()
+    key = artifact_key(student, trainset, optimizer.metric, optimizer)
+    path = store.path(key)
+    info = {'loaded': False, 'key': key, 'path': path, 'seconds': 0.0, 'details': None}
+
+    start = time.perf_counter()
+    if mode != 'off' and not refresh:
+        program = store.load(student, key)
+        if program is not None:
+            info.update(loaded=True, seconds=time.perf_counter() - start,
+                        status=f"Loaded compiled program {key[:12]} from {path} (no recompilation).")
+            return program, info
+
+    if compile is None:
+        program, details = optimizer.compile(student, trainset=trainset, **compile_kwargs), None
+    else:
+        program, details = compile(optimizer, student, trainset=trainset, **compile_kwargs)
+    info.update(details=details, seconds=time.perf_counter() - start)
+    exceeded = isinstance(details, dict) and details.get('exceeded')
+    if exceeded:
+        info['status'] = f"Optimization stopped early: {exceeded} (not stored)."
+    elif mode == 'off':
+        info['status'] = "Optimization complete."
+    else:
+        store.save(program, key)
+        info['status'] = f"Optimization complete. Stored as {key[:12]} in {path}."
+    return program, info
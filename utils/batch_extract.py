@@ -0,0 +1,309 @@
+"""Batch typed extraction over a corpus of texts.
+
+``run_extraction(predictor, input_path, output_path)`` streams texts from a
+file (JSONL records with a ``text`` field, or plain text with one document per
+line), runs ``predictor`` on them with a worker pool, and writes one record
+per text as soon as it finishes.  At most ``max_in_flight`` texts are read
+ahead of the writer, so memory stays flat however large the input is.
+
+Every output field is checked against the predictor signature's type
+annotation (``year: int``, ``cast: List[str]``, ...).  Each record carries a
+``status``:
+
+    ok            all fields parsed and have the declared types
+    invalid       parsed, but a field is empty or of the wrong type
+    parse_error   the adapter could not parse the LM reply into the fields
+    error         anything else (LM/network failures, ...)
+
+Output is JSONL (resumable: finished lines are skipped on the next run and
+``error`` lines retried, as in utils/jsonl_batch.py) or Parquet when the path ends in
+``.parquet`` (needs pyarrow; written in row groups of ``row_group_size``).
+Throughput, latency percentiles and failure counts are printed every
+``report_every`` seconds and returned as a summary.
+"""
+
+import json
+import os
+import sys
+import time
+import typing
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import dspy
+import pydantic
+from dspy.utils.exceptions import AdapterParseError
+
+from utils.jsonl_batch import InvalidLine, completed_lines, parse_record
+
+# pyarrow is imported by the first ParquetSink (see _import_pyarrow): it takes
+# longer to import than the rest of an example, which only needs it for .parquet.
+pa = pq = None
+
+STATUSES = ('ok', 'invalid', 'parse_error', 'error')
+
+
+def iter_texts(input_path, field='text', skip=()):
+    """Yield ``(line_no, record)``; plain-text lines become ``{field: line}``.
+
+    A malformed JSONL line yields an InvalidLine as its record.
+    """
+    as_jsonl = input_path.endswith(('.jsonl', '.json'))
+    with open(input_path, 'r', encoding='utf-8') as f:
+        for line_no, raw in enumerate(f, start=1):
+            if not raw.strip() or line_no in skip:
+                continue
+            yield line_no, parse_record(raw, field) if as_jsonl else {field: raw.rstrip('\n')}
+
+
+def output_types(signature):
+    """{output field: annotation} of a dspy signature."""
+    return {name: field.annotation for name, field in signature.output_fields.items()}
+
+
+def validate_fields(prediction, types):
+    """Problems with the typed output fields, as {field: message} (empty if valid)."""
+    problems = {}
+    for name, annotation in types.items():
+        value = prediction.get(name)
+        if value is None or value == '' or value == []:
+            problems[name] = 'empty'
+            continue
+        try:
+            pydantic.TypeAdapter(annotation).validate_python(value, strict=True)
+        except pydantic.ValidationError as e:
+            problems[name] = f"expected {getattr(annotation, '__name__', annotation)}: {e.errors()[0]['msg']}"
+    return problems
+
+
+def _jsonable(value):
+    if isinstance(value, pydantic.BaseModel):
+        return value.model_dump()
+    return value
+
+
+def extracted(record):
+    """Final records; ``error`` (LM/network failures) is retried on resume."""
+    return record.get('status') in ('ok', 'invalid', 'parse_error')
+
+
+class JsonlSink:
+    def __init__(self, path, resume=True):
+        self.skip = completed_lines(path, is_done=extracted) if resume else set()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, 'a' if resume else 'w', encoding='utf-8')
+
+    def write(self, record):
+        self._file.write(json.dumps(record, default=str) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def _import_pyarrow():
+    global pa, pq
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow)") from None
+        pa, pq = pyarrow, pyarrow.parquet
+
+
+def _arrow_type(annotation):
+    if annotation is bool:
+        return pa.bool_()
+    if annotation is int:
+        return pa.int64()
+    if annotation is float:
+        return pa.float64()
+    if annotation is str:
+        return pa.string()
+    if typing.get_origin(annotation) in (list, typing.List):
+        args = typing.get_args(annotation)
+        return pa.list_(_arrow_type(args[0]) if args else pa.string())
+    return pa.string()  # anything else is stored as JSON text
+
+
+class ParquetSink:
+    """Buffered Parquet writer with a schema derived from the signature's output types."""
+
+    skip = set()
+
+    def __init__(self, path, types, input_field, row_group_size=1000):
+        _import_pyarrow()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.types = {name: _arrow_type(annotation) for name, annotation in types.items()}
+        self.schema = pa.schema(
+            [('line', pa.int64()), (input_field, pa.string())]
+            + [(name, arrow_type) for name, arrow_type in self.types.items()]
+            + [('status', pa.string()), ('problems', pa.string()), ('error', pa.string()), ('elapsed', pa.float64())]
+        )
+        self.row_group_size = row_group_size
+        self._rows = []
+        self._writer = pq.ParquetWriter(path, self.schema)
+
+    def _cell(self, name, value):
+        arrow_type = self.types.get(name)
+        if value is None or arrow_type is None:
+            return value
+        try:
+            # A field of the wrong type is kept (as text where possible) instead of failing the row group.
+            pa.array([value], type=arrow_type)
+            return value
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+            return None if arrow_type != pa.string() else json.dumps(value, default=str)
+
+    def write(self, record):
+        row = {name: self._cell(name, record.get(name)) for name in self.schema.names}
+        if isinstance(row['problems'], dict):
+            row['problems'] = json.dumps(row['problems']) if row['problems'] else None
+        self._rows.append(row)
+        if len(self._rows) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            self._writer.write_table(pa.Table.from_pylist(self._rows, schema=self.schema))
+            self._rows = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(pct / 100 * len(sorted_values)))]
+
+
+class ExtractionStats:
+    """Running counts, throughput and latency of one extraction run."""
+
+    def __init__(self, skipped=0):
+        self.counts = dict.fromkeys(STATUSES, 0)
+        self.field_problems = {}
+        self.latencies = []
+        self.skipped = skipped
+        self.start = time.perf_counter()
+
+    def add(self, record):
+        self.counts[record['status']] += 1
+        self.latencies.append(record['elapsed'])
+        for name in record.get('problems') or {}:
+            self.field_problems[name] = self.field_problems.get(name, 0) + 1
+
+    @property
+    def processed(self):
+        return sum(self.counts.values())
+
+    def summary(self):
+        seconds = time.perf_counter() - self.start
+        latencies = sorted(self.latencies)
+        processed = self.processed
+        return {
+            'processed': processed, 'skipped': self.skipped, **self.counts,
+            'parse_failure_rate': round(self.counts['parse_error'] / processed, 4) if processed else 0.0,
+            'invalid_fields': dict(self.field_problems),
+            'seconds': round(seconds, 3),
+            'texts_per_sec': round(processed / seconds, 2) if seconds else 0.0,
+            'latency_p50': round(_percentile(latencies, 50), 3),
+            'latency_p95': round(_percentile(latencies, 95), 3),
+        }
+
+    def progress_line(self):
+        s = self.summary()
+        return (f"[extract] {s['processed']} done ({s['ok']} ok, {s['invalid']} invalid, "
+                f"{s['parse_error']} parse errors, {s['error']} errors) "
+                f"{s['texts_per_sec']:.1f} texts/s p50 {s['latency_p50']:.2f}s p95 {s['latency_p95']:.2f}s")
+
+
+def run_extraction(predictor, input_path, output_path, input_field='text', workers=8, max_in_flight=None,
+                   resume=True, row_group_size=1000, report_every=5.0, log=sys.stderr):
+    """Run ``predictor`` on every text of ``input_path`` and write typed results to ``output_path``.
+
+    Args:
+        predictor: A ``dspy.Predict``-style predictor (its ``signature`` gives the
+            field types), called as ``predictor(**{input_field: text})``.
+        workers: Texts extracted concurrently.
+        max_in_flight: Texts read ahead of the writer (default ``2 * workers``).
+        resume: JSONL only; skip input lines already in the output.
+        row_group_size: Parquet rows buffered per row group.
+        report_every: Seconds between progress lines on ``log`` (0 disables them).
+
+    Returns the ExtractionStats summary dict.
+    """
+    types = output_types(predictor.signature)
+    if output_path.endswith('.parquet'):
+        sink = ParquetSink(output_path, types, input_field, row_group_size)
+    else:
+        sink = JsonlSink(output_path, resume)
+    stats = ExtractionStats(skipped=len(sink.skip))
+    max_in_flight = max_in_flight or 2 * workers
+    base_lm = dspy.settings.lm
+
+    def extract(line_no, record):
+        if isinstance(record, InvalidLine):
+            # An error record (retried on resume) instead of aborting the run.
+            return {'line': line_no, 'status': 'error', 'problems': None,
+                    'error': f"InvalidLine: {record}", 'elapsed': 0.0}
+        result = dict(record, line=line_no)
+        start = time.perf_counter()
+        try:
+            # A fresh LM copy per text keeps the shared LM's history from growing with the corpus.
+            with dspy.context(lm=base_lm.copy()):
+                prediction = predictor(**{input_field: record[input_field]})
+            result.update({name: _jsonable(prediction.get(name)) for name in types})
+            problems = validate_fields(prediction, types)
+            result.update(status='invalid' if problems else 'ok', problems=problems, error=None)
+        except AdapterParseError as e:
+            result.update(status='parse_error', problems=None, error=f"{type(e).__name__}: {e}")
+        except Exception as e:
+            result.update(status='error', problems=None, error=f"{type(e).__name__}: {e}")
+        result['elapsed'] = round(time.perf_counter() - start, 6)
+        return result
+
+    last_report = time.perf_counter()
+
+    def drain(done):
+        nonlocal last_report
+        for future in done:
+            result = future.result()
+            sink.write(result)
+            stats.add(result)
+        if log and report_every and time.perf_counter() - last_report >= report_every:
+            last_report = time.perf_counter()
+            print(stats.progress_line(), file=log, flush=True)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = set()
+            try:
+                for line_no, record in iter_texts(input_path, input_field, sink.skip):
+                    # Backpressure: stop reading until the writer has caught up.
+                    if len(pending) >= max_in_flight:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        drain(done)
+                    pending.add(pool.submit(extract, line_no, record))
+            finally:
+                # Even if reading the input fails, keep the extractions already in flight.
+                done, _ = wait(pending)
+                drain(done)
+    finally:
+        sink.close()
+    if log:
+        print(stats.progress_line(), file=log, flush=True)
+    return stats.summary()
+
+
+def add_extract_arguments(parser):
+    parser.add_argument("--batch", metavar="INPUT", help="Extract from every text in this .jsonl/.txt file")
+    parser.add_argument("--output", metavar="OUTPUT",
+                        help="Results as .jsonl (default: INPUT.out.jsonl) or .parquet (needs pyarrow)")
+    parser.add_argument("--workers", type=int, default=8, help="Texts extracted concurrently")
+    parser.add_argument("--max-in-flight", type=int, help="Texts read ahead of the writer (default: 2 x workers)")
+    parser.add_argument("--no-resume", action="store_true", help="Start over instead of skipping finished lines")
@@ -0,0 +1,203 @@
+"""Call, token and wall-time budget for optimizer runs.
+
+LMBudget holds the caps and thread-safe counters; BudgetedLM is a copy of a
+``dspy.LM`` that checks the budget before every request and charges it
+afterwards (cache hits are counted separately and cost nothing).  Once any
+cap is reached every further request raises BudgetExceeded.
+
+``compile_within_budget(optimizer, student, ...)`` runs ``optimizer.compile``
+with its LMs swapped for budgeted copies.  The optimizer's error limit is
+lifted for the run, so requests refused after the budget ran out count as
+failed examples instead of aborting it.  BootstrapFewShot then trains on the
+demos bootstrapped so far, and MIPROv2 keeps its best program.  If compile
+still fails on the budget, the best fully evaluated program seen so far (see
+CheckpointedMIPROv2) or a copy of the student is returned.
+
+Caps default to ``LM_BUDGET_CALLS``, ``LM_BUDGET_PROMPT_TOKENS`` and
+``LM_BUDGET_SECONDS``; unset means unlimited (counters are still reported).
+"""
+
+import os
+import sys
+import threading
+import time
+
+import dspy
+
+
+class BudgetExceeded(RuntimeError):
+    """Raised instead of sending an LM request once the budget is spent."""
+
+
+def _env_number(name, cast):
+    value = os.getenv(name)
+    return cast(value) if value else None
+
+
+class LMBudget:
+    """Caps on LM calls, prompt tokens and wall time, shared by any number of LMs.
+
+    Args:
+        max_calls: Requests actually sent to the server.
+        max_prompt_tokens: Sum of prompt tokens of those requests.
+        max_seconds: Wall time since the first request.
+        report_every: Seconds between live counter lines (0 disables them).
+        stream: Where counter lines go.
+    """
+
+    def __init__(self, max_calls=None, max_prompt_tokens=None, max_seconds=None, report_every=5.0,
+                 stream=sys.stderr):
+        self.max_calls = max_calls
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_seconds = max_seconds
+        self.report_every = report_every
+        self.stream = stream
+        self.calls = 0
+        self.cached_calls = 0
+        self.refused_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.started = None
+        self.exceeded = None
+        self._last_report = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        return cls(max_calls=_env_number('LM_BUDGET_CALLS', int),
+                   max_prompt_tokens=_env_number('LM_BUDGET_PROMPT_TOKENS', int),
+                   max_seconds=_env_number('LM_BUDGET_SECONDS', float), **kwargs)
+
+    @property
+    def elapsed(self):
+        return 0.0 if self.started is None else time.perf_counter() - self.started
+
+    def _check_locked(self):
+        if self.exceeded is None:
+            if self.max_calls is not None and self.calls >= self.max_calls:
+                self.exceeded = f"call budget of {self.max_calls} reached"
+            elif self.max_prompt_tokens is not None and self.prompt_tokens >= self.max_prompt_tokens:
+                self.exceeded = f"prompt token budget of {self.max_prompt_tokens} reached"
+            elif self.max_seconds is not None and self.elapsed >= self.max_seconds:
+                self.exceeded = f"time budget of {self.max_seconds:g}s reached"
+            if self.exceeded:
+                self._report_locked(force=True)
+        return self.exceeded
+
+    def acquire(self):
+        """Reserve one request; raises BudgetExceeded if the budget is spent."""
+        with self._lock:
+            if self.started is None:
+                self.started = time.perf_counter()
+            reason = self._check_locked()
+            if reason:
+                self.refused_calls += 1
+                raise BudgetExceeded(reason)
+            self.calls += 1
+
+    def charge(self, usage, cache_hit=False):
+        with self._lock:
+            if cache_hit:
+                self.calls -= 1
+                self.cached_calls += 1
+            else:
+                self.prompt_tokens += int(usage.get('prompt_tokens') or 0)
+                self.completion_tokens += int(usage.get('completion_tokens') or 0)
+            self._check_locked()
+            self._report_locked()
+
+    def counters(self):
+        return {'calls': self.calls, 'cached_calls': self.cached_calls, 'refused_calls': self.refused_calls,
+                'prompt_tokens': self.prompt_tokens, 'completion_tokens': self.completion_tokens,
+                'seconds': round(self.elapsed, 3), 'exceeded': self.exceeded}
+
+    def status_line(self):
+        def cap(value, limit, fmt='{}'):
+            return fmt.format(value) + ('' if limit is None else '/' + fmt.format(limit))
+        return (f"[budget] calls {cap(self.calls, self.max_calls)} "
+                f"prompt tokens {cap(self.prompt_tokens, self.max_prompt_tokens)} "
+                f"time {cap(round(self.elapsed), self.max_seconds and round(self.max_seconds))}s "
+                f"cached {self.cached_calls}" + (f" STOPPED: {self.exceeded}" if self.exceeded else ''))
+
+    def report(self):
+        with self._lock:
+            self._report_locked(force=True)
+
+    def _report_locked(self, force=False):
+        if not self.stream or (not force and not self.report_every):
+            return
+        now = time.perf_counter()
+        if force or now - self._last_report >= self.report_every:
+            self._last_report = now
+            print(self.status_line(), file=self.stream, flush=True)
+
+
+class BudgetedLM(dspy.LM):
+    """Copy of ``lm`` whose requests are checked against and charged to ``budget``."""
+
+    def __init__(self, lm, budget):
+        state = lm.copy().__dict__
+        self.__dict__.update({k: v for k, v in state.items() if not k.startswith('_lazy')})
+        self.budget = budget
+
+    def _charge(self, prompt, messages):
+        # Newest history entry for this request (other threads may have appended since).
+        for entry in reversed(self.history[-32:]):
+            if entry.get('messages') == messages and entry.get('prompt') == prompt:
+                self.budget.charge(entry.get('usage') or {}, getattr(entry.get('response'), 'cache_hit', False))
+                return
+        self.budget.charge({})
+
+    def __call__(self, prompt=None, *, messages=None, **kwargs):
+        self.budget.acquire()
+        outputs = super().__call__(prompt, messages=messages, **kwargs)
+        self._charge(prompt, messages)
+        return outputs
+
+    async def acall(self, prompt=None, *, messages=None, **kwargs):
+        self.budget.acquire()
+        outputs = await super().acall(prompt, messages=messages, **kwargs)
+        self._charge(prompt, messages)
+        return outputs
+
+    def copy(self, **kwargs):
+        copied = super().copy(**kwargs)
+        copied.budget = self.budget
+        return copied
+
+
+def compile_within_budget(optimizer, student, budget=None, **compile_kwargs):
+    """Run ``optimizer.compile(student, **compile_kwargs)`` under ``budget``.
+
+    Returns ``(program, counters)``; ``counters['exceeded']`` says why the run
+    was cut short, if it was.
+    """
+    budget = budget or LMBudget.from_env()
+    wrapped = {}
+
+    def budgeted(lm):
+        if lm is None or isinstance(lm, BudgetedLM):
+            return lm
+        if id(lm) not in wrapped:
+            wrapped[id(lm)] = BudgetedLM(lm, budget)
+        return wrapped[id(lm)]
+
+    saved = {name: getattr(optimizer, name) for name in ('task_model', 'prompt_model', 'max_errors')
+             if hasattr(optimizer, name)}
+    for name in ('task_model', 'prompt_model'):
+        if name in saved:
+            setattr(optimizer, name, budgeted(saved[name]))
+    # Refused requests surface as failed examples; don't let them abort the run.
+    if 'max_errors' in saved:
+        optimizer.max_errors = sys.maxsize
+
+    try:
+        with dspy.context(lm=budgeted(dspy.settings.lm)):
+            program = optimizer.compile(student, **compile_kwargs)
+    except BudgetExceeded:
+        program = getattr(optimizer, 'best_program_so_far', None) or student.deepcopy()
+    finally:
+        for name, value in saved.items():
+            setattr(optimizer, name, value)
+    budget.report()
+    return program, budget.counters()
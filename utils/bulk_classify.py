@@ -0,0 +1,301 @@
+"""Bulk classification with a dspy classifier such as 03's IntentClassifier.
+
+``BulkClassifier(predictor, 'submission', 'intent').classify(texts)`` labels a
+list of texts while sending as little as possible to the LM:
+
+    dedup      texts are normalized (Unicode NFKC, case-folded, whitespace
+               collapsed) and every distinct text is classified once
+    cache      labels are cached in SQLite by (classifier fingerprint,
+               normalized text), so repeated runs only pay for new texts
+    batching   ``batch_size`` texts go into one LM call through a list-in /
+               list-out version of the signature (with the predictor's demos
+               folded into one batched demo); a batch whose reply does not
+               have one label per text is retried one text at a time
+    bounded    at most ``concurrency`` LM calls are in flight
+
+Replies are mapped onto the allowed label set, read from the output field's
+``one of: ...`` description unless given: exact match, then a single label
+mentioned in the reply, then a close spelling.  Anything else becomes None
+(and is not cached).
+
+    python 03_classification.py --bulk submissions.jsonl --batch-size 8 --concurrency 8
+    python 08_few_shot_examples.py --bench 10000
+"""
+
+import difflib
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+
+import dspy
+
+from utils.evaluation import program_fingerprint
+
+DEFAULT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'label_cache.sqlite'
+)
+ONE_OF_RE = re.compile(r'one of:?\s*\[?([^\]]+?)\]?\s*$', re.I)
+
+
+def normalize_text(text):
+    return ' '.join(unicodedata.normalize('NFKC', str(text)).casefold().split())
+
+
+def allowed_labels(signature, field):
+    """Labels listed as ``one of: a, b, c`` (or ``[a, b, c]``) in the field's description."""
+    desc = signature.output_fields[field].json_schema_extra.get('desc', '')
+    match = ONE_OF_RE.search(desc)
+    if not match:
+        raise ValueError(f"No 'one of: ...' label list in the description of {field!r}; pass labels=")
+    return [label.strip().strip('\'"') for label in match.group(1).split(',') if label.strip()]
+
+
+def normalize_label(raw, labels):
+    """The allowed label ``raw`` refers to, or None."""
+    text = normalize_text(re.sub(r'[^\w\s-]', ' ', str(raw)))
+    keys = {normalize_text(label): label for label in labels}
+    if text in keys:
+        return keys[text]
+    mentioned = [label for key, label in keys.items() if re.search(rf'\b{re.escape(key)}\b', text)]
+    if len(mentioned) == 1:
+        return mentioned[0]
+    close = difflib.get_close_matches(text, list(keys), n=1, cutoff=0.75)
+    return keys[close[0]] if close else None
+
+
+class LabelCache:
+    """Labels of already-classified normalized texts, stored in SQLite."""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('LABEL_CACHE_PATH', DEFAULT_PATH)
+        self._lock = threading.Lock()
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS labels ("
+            " classifier TEXT NOT NULL,"
+            " text TEXT NOT NULL,"
+            " label TEXT NOT NULL,"
+            " PRIMARY KEY (classifier, text))"
+        )
+        self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM labels")
+            self._conn.commit()
+
+    def get_many(self, classifier, texts):
+        found = {}
+        texts = list(texts)
+        with self._lock:
+            for i in range(0, len(texts), 500):  # stay under SQLite's bound-parameter limit
+                chunk = texts[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT text, label FROM labels WHERE classifier = ? AND text IN ({','.join('?' * len(chunk))})",
+                    [classifier, *chunk],
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def put_many(self, classifier, labels):
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO labels VALUES (?, ?, ?)",
+                                   [(classifier, text, label) for text, label in labels.items()])
+            self._conn.commit()
+
+
+def batched_signature(signature, input_field, label_field, labels):
+    """List-in / list-out version of a single-text classification signature."""
+    return dspy.Signature(
+        {
+            'texts': (list[str], dspy.InputField(desc=f"the {input_field} values to classify, in order")),
+            'classifications': (list[str], dspy.OutputField(
+                desc=f"one {label_field} per text, in the same order; each one of: {', '.join(labels)}")),
+        },
+        f"{signature.instructions}\nClassify each item independently and return exactly one label per text.",
+    )
+
+
+class BulkClassifier:
+    """Classify many texts with ``predictor`` (see module docstring).
+
+    Args:
+        predictor: A ``dspy.Predict`` over a one-input, one-label signature (demos are used).
+        input_field / label_field: The signature's text input and label output.
+        labels: Allowed labels (default: parsed from the label field's description).
+        batch_size: Texts per LM call (1 calls the predictor itself for each text).
+        concurrency: LM calls in flight.
+        cache: True for the shared label cache, a LabelCache, or False.
+    """
+
+    def __init__(self, predictor, input_field, label_field, labels=None, batch_size=8, concurrency=8,
+                 cache=True):
+        self.predictor = predictor
+        self.input_field = input_field
+        self.label_field = label_field
+        self.labels = labels or allowed_labels(predictor.signature, label_field)
+        self.batch_size = max(1, batch_size)
+        self.concurrency = concurrency
+        self.cache = LabelCache() if cache is True else cache
+        self.batched = dspy.Predict(batched_signature(predictor.signature, input_field, label_field, self.labels))
+        if predictor.demos:
+            self.batched.demos = [dspy.Example(
+                texts=[demo[input_field] for demo in predictor.demos],
+                classifications=[demo[label_field] for demo in predictor.demos],
+            ).with_inputs('texts')]
+        self._stats_lock = threading.Lock()
+
+    def _count(self, stats, **increments):
+        with self._stats_lock:
+            for key, value in increments.items():
+                stats[key] += value
+
+    def _classify_one(self, text, stats):
+        self._count(stats, lm_calls=1)
+        prediction = self.predictor(**{self.input_field: text})
+        return normalize_label(prediction[self.label_field], self.labels)
+
+    def _classify_chunk(self, texts, base_lm, stats):
+        """{text: label or None} for one chunk of distinct texts."""
+        with dspy.context(lm=base_lm.copy()):
+            if len(texts) > 1:
+                self._count(stats, lm_calls=1, batched_calls=1)
+                try:
+                    replies = self.batched(texts=texts).classifications
+                except Exception:
+                    replies = None
+                if isinstance(replies, list) and len(replies) == len(texts):
+                    return {text: normalize_label(reply, self.labels) for text, reply in zip(texts, replies)}
+                self._count(stats, batch_fallbacks=1)
+            results = {}
+            for text in texts:
+                try:
+                    results[text] = self._classify_one(text, stats)
+                except Exception:
+                    self._count(stats, errors=1)
+                    results[text] = None
+            return results
+
+    def classify(self, texts):
+        """Labels for ``texts`` (same order; None where no allowed label came back) and stats."""
+        start = time.perf_counter()
+        stats = {'items': len(texts), 'unique': 0, 'cache_hits': 0, 'lm_calls': 0, 'batched_calls': 0,
+                 'batch_fallbacks': 0, 'errors': 0, 'unmatched': 0}
+        keys = [normalize_text(text) for text in texts]
+        first = {}
+        for key, text in zip(keys, texts):
+            first.setdefault(key, text)
+        stats['unique'] = len(first)
+
+        fingerprint = f"{program_fingerprint(self.predictor)}:{','.join(self.labels)}"
+        labels = self.cache.get_many(fingerprint, first) if self.cache else {}
+        stats['cache_hits'] = len(labels)
+        # Classify the first spelling seen of each missing text; the result applies to every variant.
+        missing = [first[key] for key in first if key not in labels]
+        chunks = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+        base_lm = dspy.settings.lm
+        fresh = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for result in pool.map(lambda chunk: self._classify_chunk(chunk, base_lm, stats), chunks):
+                for text, label in result.items():
+                    fresh[normalize_text(text)] = label
+        stats['unmatched'] = sum(1 for label in fresh.values() if label is None)
+        found = {key: label for key, label in fresh.items() if label is not None}
+        if self.cache and found:
+            self.cache.put_many(fingerprint, found)
+        labels.update(fresh)
+
+        stats['seconds'] = round(time.perf_counter() - start, 3)
+        stats['items_per_sec'] = round(len(texts) / stats['seconds'], 1) if stats['seconds'] else 0.0
+        return [labels.get(key) for key in keys], stats
+
+
+# -- command line (used by 03_classification.py and 08_few_shot_examples.py) ---------
+
+def read_texts(path, field):
+    """Texts from a JSONL file (``field`` or plain strings per line) or a text file (one per line)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(('.jsonl', '.json')):
+            records = [json.loads(line) for line in f if line.strip()]
+            return [record if isinstance(record, str) else record[field] for record in records]
+        return [line.rstrip('\n') for line in f if line.strip()]
+
+
+def synthetic_texts(seeds, n, seed=0):
+    """``n`` texts drawn from ``seeds`` with case, spacing and punctuation variants (many duplicates)."""
+    rng = random.Random(seed)
+    fillers = ['', ' please', ' today', ' again', ' asap', ' for me', ' on my phone', ' since the update']
+    texts = []
+    for _ in range(n):
+        text = rng.choice(seeds).rstrip('.!?') + rng.choice(fillers) + rng.choice(['.', '!', '', '?'])
+        variant = rng.random()
+        if variant < 0.2:
+            text = text.upper()
+        elif variant < 0.4:
+            text = '  ' + text.replace(' ', '  ') + ' '
+        texts.append(text)
+    return texts
+
+
+def add_bulk_arguments(parser):
+    parser.add_argument("--bulk", metavar="INPUT", help="Classify every text in this .jsonl/.txt file")
+    parser.add_argument("--output", metavar="OUTPUT_JSONL", help="Where to write labels (default: INPUT.labels.jsonl)")
+    parser.add_argument("--bench", type=int, metavar="N", help="Benchmark items/sec on N synthetic texts")
+    parser.add_argument("--batch-size", type=int, default=8, help="Texts per LM call")
+    parser.add_argument("--concurrency", type=int, default=8, help="LM calls in flight")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the label cache")
+
+
+def bulk_main(predictor, input_field, label_field, args, seeds=()):
+    """Run ``--bulk`` or ``--bench`` for an example's classifier."""
+    def make(cache):
+        return BulkClassifier(predictor, input_field, label_field, batch_size=args.batch_size,
+                              concurrency=args.concurrency, cache=cache)
+
+    if args.bulk:
+        texts = read_texts(args.bulk, input_field)
+        labels, stats = make(not args.no_cache).classify(texts)
+        output = args.output or os.path.splitext(args.bulk)[0] + '.labels.jsonl'
+        with open(output, 'w', encoding='utf-8') as f:
+            for line, (text, label) in enumerate(zip(texts, labels), start=1):
+                f.write(json.dumps({'line': line, input_field: text, label_field: label}) + '\n')
+        print(f"Labelled {len(texts)} texts -> {output}: {stats}")
+        return
+
+    texts = synthetic_texts(list(seeds), args.bench)
+    # Baseline: one predictor call per text, same concurrency, on a sample (extrapolated).
+    sample = texts[:min(len(texts), 4 * args.concurrency)]
+    start = time.perf_counter()
+    base_lm = dspy.settings.lm
+
+    def one(text):
+        with dspy.context(lm=base_lm.copy()):
+            return predictor(**{input_field: text})
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(one, sample))
+    naive_rate = len(sample) / (time.perf_counter() - start)
+
+    cache = False if args.no_cache else LabelCache(os.path.join(os.path.dirname(DEFAULT_PATH), 'label_bench.sqlite'))
+    if cache:
+        cache.clear()
+    classifier = make(cache)
+    labels, cold = classifier.classify(texts)
+    print(f"{len(texts)} synthetic texts, {cold['unique']} distinct after normalization")
+    print(f"  one call per text (sample of {len(sample)}): {naive_rate:10.1f} items/s")
+    print(f"  bulk, cold cache:  {cold['items_per_sec']:10.1f} items/s  ({cold['lm_calls']} LM calls, "
+          f"{cold['batch_fallbacks']} batch fallbacks, {cold['unmatched']} unmatched)")
+    if cache:
+        _, warm = classifier.classify(texts)
+        print(f"  bulk, warm cache:  {warm['items_per_sec']:10.1f} items/s  ({warm['lm_calls']} LM calls)")
+    counts = {}
+    for label in labels:
+        counts[label] = counts.get(label, 0) + 1
+    print(f"  labels: {counts}")
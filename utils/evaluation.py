@@ -0,0 +1,224 @@
+"""Parallel metric evaluation for DSPy programs.
+
+``evaluate(program, devset, metric)`` scores every example on a thread pool,
+retries transient LM failures (connection errors, timeouts, rate limits,
+server errors) with exponential backoff, and caches each prediction in SQLite
+keyed by (program fingerprint, example).  The fingerprint covers the
+program's class, its saved state (instructions and demos) and the LM (model,
+api_base and request settings such as temperature), so re-scoring an unchanged program is free while any recompilation is scored
+afresh.
+
+Every example runs with its own copy of the configured LM, so evaluation
+does not add entries to the LM history that save_response reads.
+
+    result = evaluate(optimized_qa, devset, answer_match, num_threads=8)
+    print(result.summary())
+"""
+
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import dspy
+from dspy.utils.exceptions import (
+    LMLockTimeoutError, LMRateLimitError, LMServerError, LMTimeoutError, LMTransportError,
+)
+
+DEFAULT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'eval_cache.sqlite'
+)
+TRANSIENT_ERRORS = (LMTransportError, LMRateLimitError, LMTimeoutError, LMServerError,
+                    LMLockTimeoutError, ConnectionError, TimeoutError)
+
+
+def _digest(payload):
+    text = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+# LM request settings that do not change the completions.
+IGNORED_LM_KWARGS = {'api_key', 'timeout', 'num_retries'}
+
+
+def lm_identity(lm):
+    """Model, endpoint and request settings of ``lm`` that affect its outputs."""
+    if lm is None:
+        return None
+    kwargs = getattr(lm, 'kwargs', None) or {}
+    return {
+        'model': getattr(lm, 'model', None),
+        'model_type': getattr(lm, 'model_type', None),
+        'kwargs': {name: value for name, value in sorted(kwargs.items()) if name not in IGNORED_LM_KWARGS},
+    }
+
+
+def program_fingerprint(program, lm=None):
+    """Hash of the program's class, saved state (instructions, demos) and LM (see lm_identity)."""
+    lm = lm or dspy.settings.lm
+    cls = type(program)
+    return _digest({
+        'program': f"{cls.__module__}.{cls.__qualname__}",
+        'state': program.dump_state(),
+        'model': lm_identity(lm),
+    })
+
+
+def example_key(example):
+    return _digest(example.toDict())
+
+
+class EvaluationCache:
+    """Predictions of already-scored (program, example) pairs, stored in SQLite."""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('EVAL_CACHE_PATH', DEFAULT_PATH)
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            " program TEXT NOT NULL,"
+            " example TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " PRIMARY KEY (program, example))"
+        )
+        self._conn.commit()
+
+    def get(self, program, example):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM predictions WHERE program = ? AND example = ?", (program, example)
+            ).fetchone()
+        return None if row is None else dspy.Prediction(**json.loads(row[0]))
+
+    def put(self, program, example, prediction):
+        payload = json.dumps(prediction.toDict(), default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+                (program, example, payload, time.time()),
+            )
+            self._conn.commit()
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = EvaluationCache()
+    return _default_cache
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(pct / 100 * len(sorted_values)))]
+
+
+class EvaluationResult:
+    """Per-example outcomes of one ``evaluate`` call.
+
+    Each entry of ``results`` has ``index``, ``score``, ``prediction``,
+    ``error``, ``latency`` (seconds), ``cached`` and ``attempts``.
+    """
+
+    def __init__(self, results, wall):
+        self.results = results
+        self.wall = wall
+
+    @property
+    def score(self):
+        """Mean metric value as a percentage."""
+        if not self.results:
+            return 0.0
+        return 100.0 * sum(r['score'] for r in self.results) / len(self.results)
+
+    @property
+    def errors(self):
+        return sum(1 for r in self.results if r['error'])
+
+    @property
+    def cache_hits(self):
+        return sum(1 for r in self.results if r['cached'])
+
+    def latency_percentiles(self, pcts=(50, 90, 99)):
+        """Latency percentiles (seconds) of the examples that actually ran."""
+        latencies = sorted(r['latency'] for r in self.results if not r['cached'])
+        return {p: _percentile(latencies, p) for p in pcts}
+
+    def summary(self):
+        pct = self.latency_percentiles()
+        return (f"score {self.score:.1f}% on {len(self.results)} examples "
+                f"({self.errors} errors, {self.cache_hits} cached) in {self.wall:.2f}s; latency "
+                + ' '.join(f"p{p}={v:.2f}s" for p, v in pct.items()))
+
+
+def evaluate(program, devset, metric, num_threads=8, retries=2, backoff=1.0, cache=True, display=False):
+    """Score ``program`` on ``devset`` with ``metric`` using ``num_threads`` threads.
+
+    Args:
+        retries: Extra attempts for an example after a transient LM error.
+        backoff: Seconds before the first retry; doubled for each further one.
+        cache: True for the shared cache, an EvaluationCache, or False to disable.
+        display: Print one line per finished example.
+
+    Returns an EvaluationResult.
+    """
+    if cache is True:
+        cache = get_default_cache()
+    base_lm = dspy.settings.lm
+    fingerprint = program_fingerprint(program, base_lm)
+    print_lock = threading.Lock()
+
+    def score_one(index, example):
+        result = {'index': index, 'score': 0.0, 'prediction': None, 'error': None,
+                  'latency': 0.0, 'cached': False, 'attempts': 0}
+        key = example_key(example)
+        prediction = cache.get(fingerprint, key) if cache else None
+        if prediction is not None:
+            result['cached'] = True
+        else:
+            start = time.perf_counter()
+            while prediction is None and result['error'] is None:
+                result['attempts'] += 1
+                try:
+                    with dspy.context(lm=base_lm.copy()):
+                        prediction = program(**example.inputs())
+                except TRANSIENT_ERRORS as e:
+                    if result['attempts'] > retries:
+                        result['error'] = f"{type(e).__name__}: {e}"
+                    else:
+                        time.sleep(backoff * 2 ** (result['attempts'] - 1))
+                except Exception as e:
+                    result['error'] = f"{type(e).__name__}: {e}"
+            result['latency'] = time.perf_counter() - start
+            if prediction is not None and cache:
+                cache.put(fingerprint, key, prediction)
+        if prediction is not None:
+            result['prediction'] = prediction
+            try:
+                result['score'] = float(metric(example, prediction))
+            except Exception as e:
+                result['error'] = f"metric {type(e).__name__}: {e}"
+        if display:
+            with print_lock:
+                status = result['error'] or ('cached' if result['cached'] else f"{result['latency']:.2f}s")
+                print(f"[eval {index + 1}/{len(devset)}] score={result['score']:g} {status}")
+        return result
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=num_threads) as pool:
+        # Each task runs in a copy of the caller's context so dspy.context overrides carry over.
+        futures = [pool.submit(contextvars.copy_context().run, score_one, i, ex) for i, ex in enumerate(devset)]
+        results = [f.result() for f in futures]
+    return EvaluationResult(results, time.perf_counter() - start)
@@ -0,0 +1,277 @@
+"""Pool of warm dspy.PythonInterpreter sandboxes.
+
+Spinning up a PythonInterpreter (Deno + Pyodide) takes far longer than the
+arithmetic an agent tool usually asks it to run.  The pool keeps a bounded
+number of interpreters alive, resets their globals between calls, checks that
+they still respond before handing them out again and shuts down interpreters
+that sat idle for too long (checked whenever an interpreter is acquired or
+released, or on demand with ``evict_idle()``).
+
+Benchmark (cold interpreter per call vs. pooled):
+    python utils/interpreter_pool.py --count 20 --size 2
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+# Snapshot of the sandbox globals taken right after start-up; everything
+# added later by user code is dropped by RESET_CODE.
+BASELINE_CODE = "__pool_baseline__ = set(globals()) | {'__pool_baseline__'}"
+RESET_CODE = (
+    "for __k in [k for k in globals() if k not in __pool_baseline__]:\n"
+    "    del globals()[__k]"
+)
+HEALTH_CHECK_CODE = "6 * 7"
+
+
+def _default_factory():
+    import dspy
+    return dspy.PythonInterpreter({})
+
+
+class _Worker:
+    """A single interpreter plus its bookkeeping."""
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.last_used = time.monotonic()
+        self.calls = 0
+        self.needs_check = False
+
+    def is_alive(self):
+        process = getattr(self.interpreter, "deno_process", None)
+        if process is None:
+            # Not started yet (or an interpreter without a subprocess).
+            return True
+        return process.poll() is None
+
+    def shutdown(self):
+        try:
+            self.interpreter.shutdown()
+        except Exception:
+            pass
+
+
+class InterpreterPool:
+    """Thread-safe pool of reusable PythonInterpreter instances.
+
+    Args:
+        size: Maximum number of live interpreters.
+        idle_timeout: Seconds after which an unused interpreter is shut down.
+            ``None`` keeps interpreters until ``close()``.
+        reset_state: Drop globals defined by previous calls before each call.
+        health_check: Run a tiny expression before reusing an interpreter that
+            raised on its previous call.
+        factory: Callable returning a new interpreter (defaults to
+            ``dspy.PythonInterpreter({})``).
+    """
+
+    def __init__(self, size=2, idle_timeout=300.0, reset_state=True,
+                 health_check=True, factory=None):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.reset_state = reset_state
+        self.health_check = health_check
+        self._factory = factory or _default_factory
+        self._idle = []          # LIFO stack: the warmest worker is reused first
+        self._live = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self.stats = {"created": 0, "reused": 0, "evicted": 0, "unhealthy": 0}
+
+    # -- lifecycle -------------------------------------------------------
+
+    def _create_worker(self):
+        worker = _Worker(self._factory())
+        if self.reset_state:
+            worker.interpreter.execute(BASELINE_CODE)
+        self.stats["created"] += 1
+        return worker
+
+    def _evict_idle(self):
+        """Remove idle workers past their timeout and return them. Caller holds the lock.
+
+        The caller shuts the returned workers down after releasing the lock,
+        so a slow shutdown never blocks other callers.
+        """
+        if self.idle_timeout is None:
+            return []
+        now = time.monotonic()
+        keep, evicted = [], []
+        for worker in self._idle:
+            if now - worker.last_used > self.idle_timeout:
+                evicted.append(worker)
+            else:
+                keep.append(worker)
+        if evicted:
+            self._idle = keep
+            self._live -= len(evicted)
+            self.stats["evicted"] += len(evicted)
+            self._cond.notify(len(evicted))
+        return evicted
+
+    @staticmethod
+    def _shutdown_all(workers):
+        for worker in workers:
+            worker.shutdown()
+
+    def _is_healthy(self, worker):
+        if not worker.is_alive():
+            return False
+        if not (self.health_check and worker.needs_check):
+            return True
+        try:
+            result = worker.interpreter.execute(HEALTH_CHECK_CODE)
+        except Exception:
+            return False
+        worker.needs_check = False
+        return str(result).strip() == "42"
+
+    def _discard(self, worker):
+        worker.shutdown()
+        with self._cond:
+            self._live -= 1
+            self.stats["unhealthy"] += 1
+            self._cond.notify()
+
+    def _acquire(self):
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("InterpreterPool is closed")
+                evicted = self._evict_idle()
+                while not self._idle and self._live >= self.size:
+                    self._cond.wait()
+                if self._idle:
+                    worker = self._idle.pop()
+                    reused = True
+                else:
+                    self._live += 1
+                    worker = None
+                    reused = False
+            self._shutdown_all(evicted)
+
+            if not reused:
+                try:
+                    return self._create_worker()
+                except Exception:
+                    with self._cond:
+                        self._live -= 1
+                        self._cond.notify()
+                    raise
+
+            if self._is_healthy(worker):
+                self.stats["reused"] += 1
+                return worker
+            self._discard(worker)
+
+    def _release(self, worker):
+        worker.last_used = time.monotonic()
+        with self._cond:
+            if self._closed:
+                self._live -= 1
+                evicted = [worker]
+            else:
+                # Evict here too, so a pool that only sees releases still shrinks.
+                evicted = self._evict_idle()
+                self._idle.append(worker)
+            self._cond.notify()
+        self._shutdown_all(evicted)
+
+    def evict_idle(self):
+        """Shut down interpreters idle for longer than ``idle_timeout``; return how many.
+
+        Eviction also happens on every acquire and release.  Call this
+        periodically if the pool may sit unused for long stretches.
+        """
+        with self._cond:
+            evicted = self._evict_idle()
+        self._shutdown_all(evicted)
+        return len(evicted)
+
+    @contextmanager
+    def lease(self):
+        """Borrow an interpreter for the duration of the ``with`` block."""
+        worker = self._acquire()
+        try:
+            yield worker.interpreter
+        except Exception:
+            worker.needs_check = True
+            raise
+        finally:
+            worker.calls += 1
+            if self.reset_state:
+                try:
+                    worker.interpreter.execute(RESET_CODE)
+                except Exception:
+                    worker.needs_check = True
+            self._release(worker)
+
+    def execute(self, code, variables=None):
+        """Run ``code`` on a pooled interpreter and return its result."""
+        with self.lease() as interpreter:
+            return interpreter.execute(code, variables)
+
+    def warm_up(self, n=None):
+        """Start ``n`` interpreters (default: pool size) ahead of first use."""
+        workers = [self._acquire() for _ in range(min(n or self.size, self.size))]
+        for worker in workers:
+            self._release(worker)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._live -= len(idle)
+            self._cond.notify_all()
+        for worker in idle:
+            worker.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def benchmark(expressions, size=2):
+    """Time ``expressions`` on a fresh interpreter each vs. a warm pool."""
+    import dspy
+
+    start = time.perf_counter()
+    for expr in expressions:
+        interpreter = dspy.PythonInterpreter({})
+        try:
+            interpreter.execute(expr)
+        finally:
+            interpreter.shutdown()
+    cold = time.perf_counter() - start
+
+    with InterpreterPool(size=size) as pool:
+        start = time.perf_counter()
+        for expr in expressions:
+            pool.execute(expr)
+        pooled = time.perf_counter() - start
+        stats = dict(pool.stats)
+
+    n = len(expressions)
+    print(f"{n} expressions")
+    print(f"  cold interpreter per call: {cold:.3f}s total, {cold / n * 1000:.1f} ms/call")
+    print(f"  pooled (size={size}):       {pooled:.3f}s total, {pooled / n * 1000:.1f} ms/call")
+    print(f"  speedup: {cold / pooled:.1f}x  pool stats: {stats}")
+    return cold, pooled
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the PythonInterpreter pool.")
+    parser.add_argument("--count", type=int, default=20, help="Number of expressions to evaluate")
+    parser.add_argument("--size", type=int, default=2, help="Pool size")
+    args = parser.parse_args()
+
+    exprs = [f"{9362158 + i} / {1664 + i}" for i in range(args.count)]
+    benchmark(exprs, size=args.size)
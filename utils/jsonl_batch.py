@@ -0,0 +1,232 @@
+"""Stream questions from a JSONL file through an agent with a worker pool.
+
+Each input line is a JSON object with a ``question`` field (other fields such
+as ``id`` are copied to the output).  Results are appended to the output JSONL
+as soon as each question finishes, tagged with the input ``line`` number, so a
+crashed or interrupted run can be resumed: lines already present in the output
+are skipped, failed ones are retried and a partially written last line is
+discarded.  A malformed input line becomes a failed output line rather than
+stopping the run.
+
+Per-step timings are collected with StepTimer, a dspy callback that records
+every module, LM and tool call made while answering one question.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import contextmanager
+
+import dspy
+from dspy.utils.callback import BaseCallback
+
+
+class StepTimer(BaseCallback):
+    """Record the duration of each dspy module, LM and tool call for one question."""
+
+    def __init__(self):
+        self.steps = []
+        self._open = {}
+        self._t0 = time.perf_counter()
+
+    def _start(self, call_id, kind, name):
+        self._open[call_id] = (kind, name, time.perf_counter())
+
+    def _end(self, call_id, exception):
+        if call_id not in self._open:
+            return
+        kind, name, start = self._open.pop(call_id)
+        end = time.perf_counter()
+        step = {'kind': kind, 'name': name,
+                'start': round(start - self._t0, 6), 'seconds': round(end - start, 6)}
+        if exception is not None:
+            step['error'] = f"{type(exception).__name__}: {exception}"
+        self.steps.append(step)
+
+    def on_module_start(self, call_id, instance, inputs):
+        self._start(call_id, 'module', type(instance).__name__)
+
+    def on_module_end(self, call_id, outputs, exception=None):
+        self._end(call_id, exception)
+
+    def on_lm_start(self, call_id, instance, inputs):
+        self._start(call_id, 'lm', getattr(instance, 'model', type(instance).__name__))
+
+    def on_lm_end(self, call_id, outputs, exception=None):
+        self._end(call_id, exception)
+
+    def on_tool_start(self, call_id, instance, inputs):
+        self._start(call_id, 'tool', getattr(instance, 'name', type(instance).__name__))
+
+    def on_tool_end(self, call_id, outputs, exception=None):
+        self._end(call_id, exception)
+
+    @contextmanager
+    def step(self, name, kind='step'):
+        """Time a non-dspy step (e.g. retrieval) alongside the callback steps."""
+        call_id = object()
+        self._start(call_id, kind, name)
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._end(call_id, error)
+
+
+def answered(record):
+    """Whether a stored record is final (failed questions are retried on resume)."""
+    return not record.get('error')
+
+
+def completed_lines(output_path, is_done=answered):
+    """Input line numbers already finished in ``output_path``.
+
+    A trailing partial line (crash mid-write) is truncated away so new
+    records start on a fresh line.  Records for which ``is_done(record)`` is
+    false (e.g. transient LM errors) are dropped from the file, so those
+    lines are run again and each line keeps a single record.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    good_size = 0
+    keep = []
+    retry = 0
+    with open(output_path, 'rb') as f:
+        for raw in f:
+            if not raw.endswith(b'\n'):
+                break
+            try:
+                record = json.loads(raw)
+                line_no = record['line']
+            except (ValueError, KeyError):
+                break
+            good_size += len(raw)
+            if is_done(record):
+                done.add(line_no)
+                keep.append(raw)
+            else:
+                retry += 1
+    if retry:
+        tmp_path = output_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.writelines(keep)
+        os.replace(tmp_path, output_path)
+    elif good_size != os.path.getsize(output_path):
+        with open(output_path, 'r+b') as f:
+            f.truncate(good_size)
+    return done
+
+
+class InvalidLine(ValueError):
+    """An input line that is not a JSON object or string; yielded in place of its record."""
+
+
+def parse_record(raw, field):
+    """The record of one JSONL input line (a bare string becomes ``{field: string}``)."""
+    try:
+        record = json.loads(raw)
+    except ValueError as e:
+        return InvalidLine(f"not valid JSON: {e}")
+    if isinstance(record, str):
+        record = {field: record}
+    if not isinstance(record, dict):
+        return InvalidLine(f"expected an object or a string, got {type(record).__name__}")
+    return record
+
+
+def iter_questions(input_path, skip=()):
+    """Yield ``(line_no, record)``; a malformed line yields an InvalidLine as its record."""
+    with open(input_path, 'r', encoding='utf-8') as f:
+        for line_no, raw in enumerate(f, start=1):
+            if not raw.strip() or line_no in skip:
+                continue
+            yield line_no, parse_record(raw, 'question')
+
+
+def run_jsonl_batch(input_path, output_path, answer_fn, workers=4, resume=True, log=sys.stderr):
+    """Answer every question in ``input_path`` and append results to ``output_path``.
+
+    Args:
+        answer_fn: ``answer_fn(question, timer) -> dict`` returning the fields
+            to store (e.g. ``answer``, ``trajectory``); run under a StepTimer.
+        workers: Questions answered concurrently.
+        resume: Skip input lines already answered in the output file
+            (lines that failed are run again).
+
+    Returns a summary dict with counts and wall time.
+    """
+    skip = completed_lines(output_path) if resume else set()
+    if not resume and os.path.exists(output_path):
+        os.remove(output_path)
+    if os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    write_lock = threading.Lock()
+    summary = {'skipped': len(skip), 'answered': 0, 'failed': 0}
+
+    def process(line_no, record):
+        if isinstance(record, InvalidLine):
+            # Recorded as a failed line (retried on resume) instead of aborting the run.
+            return {'line': line_no, 'error': f"InvalidLine: {record}", 'elapsed': 0.0, 'timings': {}}
+        timer = StepTimer()
+        start = time.perf_counter()
+        result = dict(record, line=line_no)
+        try:
+            # Added to, not replacing, the configured callbacks (e.g. a TracingCallback).
+            with dspy.context(callbacks=[*dspy.settings.callbacks, timer]):
+                result.update(answer_fn(record['question'], timer))
+            result['error'] = None
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {e}"
+        result['elapsed'] = round(time.perf_counter() - start, 6)
+        result['timings'] = timer.steps
+        return result
+
+    start = time.perf_counter()
+    with open(output_path, 'a', encoding='utf-8') as out, ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+
+        def drain(done):
+            for future in done:
+                result = future.result()
+                with write_lock:
+                    out.write(json.dumps(result, default=str) + '\n')
+                    out.flush()
+                key = 'failed' if result['error'] else 'answered'
+                summary[key] += 1
+                if log:
+                    print(f"[line {result['line']}] {result['elapsed']:.2f}s "
+                          f"{result['error'] or 'ok'}", file=log)
+
+        try:
+            for line_no, record in iter_questions(input_path, skip):
+                # Bounded in-flight work keeps memory flat on very large inputs.
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    drain(done)
+                pending.add(pool.submit(process, line_no, record))
+        finally:
+            # Even if reading the input fails, keep the answers already in flight.
+            done, _ = wait(pending)
+            drain(done)
+
+    summary['seconds'] = round(time.perf_counter() - start, 3)
+    return summary
+
+
+def default_output_path(input_path):
+    return os.path.splitext(input_path)[0] + '.out.jsonl'
+
+
+def add_batch_arguments(parser):
+    parser.add_argument("--batch", metavar="INPUT_JSONL", help="Answer every question in this JSONL file")
+    parser.add_argument("--output", metavar="OUTPUT_JSONL", help="Where to append results (default: INPUT.out.jsonl)")
+    parser.add_argument("--workers", type=int, default=4, help="Questions answered concurrently")
+    parser.add_argument("--no-resume", action="store_true", help="Start over instead of skipping answered lines")
@@ -0,0 +1,171 @@
+"""Lazily constructed LM shared by the numbered examples.
+
+The examples used to build ``dspy.LM(...)`` and call ``dspy.configure`` at
+import time, so importing one just to reuse a signature or module (e.g.
+``BasicQA`` from 14_optimizer.py) replaced the importer's LM.  Instead they do
+
+    from utils.lm_config import configure_lm
+    lm = configure_lm()
+
+``configure_lm`` returns a LazyLM, which is only turned into a real
+``dspy.LM`` the first time it is used (the first prediction, or any attribute
+access such as ``lm.history``), and installs it as the default LM only if no LM
+is configured yet.  Model and server come from ``OLLAMA_MODEL_NAME`` and
+``OLLAMA_API_BASE``, as in dspy_examples/multi_tool.py.
+
+    python utils/lm_config.py --bench    # import time of every example module
+"""
+
+import os
+import threading
+
+import dspy
+
+DEFAULT_MODEL = 'gemma3:1b'
+DEFAULT_API_BASE = 'http://localhost:11434'
+
+
+def lm_settings(model=None, api_base=None):
+    """(litellm model string, api_base) from the arguments or the environment."""
+    model = model or os.getenv('OLLAMA_MODEL_NAME', DEFAULT_MODEL)
+    api_base = api_base or os.getenv('OLLAMA_API_BASE', DEFAULT_API_BASE)
+    return f'ollama/{model}', api_base
+
+
+def lm_from_env(model=None, api_base=None, **kwargs):
+    """An eagerly constructed ``dspy.LM`` with the same settings as LazyLM."""
+    model, api_base = lm_settings(model, api_base)
+    return dspy.LM(model, api_base=api_base, **kwargs)
+
+
+class LazyLM(dspy.LM):
+    """A ``dspy.LM`` whose construction is deferred until it is first used.
+
+    Args:
+        model: Ollama model name (default: ``OLLAMA_MODEL_NAME`` or gemma3:1b).
+        api_base: Ollama server (default: ``OLLAMA_API_BASE`` or localhost:11434).
+        **kwargs: Passed to ``dspy.LM``.
+    """
+
+    def __init__(self, model=None, api_base=None, **kwargs):
+        # Nothing from dspy.LM.__init__ runs here; see _materialize.
+        self.__dict__['_lazy_args'] = (model, api_base, kwargs)
+        self.__dict__['_lazy_lock'] = threading.RLock()
+        self.__dict__['_lazy_state'] = 'pending'
+
+    @property
+    def materialized(self):
+        return self.__dict__['_lazy_state'] == 'ready'
+
+    def _materialize(self):
+        with self._lazy_lock:
+            if self.__dict__['_lazy_state'] != 'pending':
+                return
+            self.__dict__['_lazy_state'] = 'building'
+            model, api_base, kwargs = self._lazy_args
+            # Attributes assigned before the build (e.g. ``lm.cache = False``) win over the defaults.
+            assigned = {k: v for k, v in self.__dict__.items() if not k.startswith('_lazy')}
+            try:
+                model, api_base = lm_settings(model, api_base)
+                dspy.LM.__init__(self, model, api_base=api_base, **kwargs)
+            except BaseException:
+                self.__dict__['_lazy_state'] = 'pending'
+                raise
+            self.__dict__.update(assigned)
+            self.__dict__['_lazy_state'] = 'ready'
+
+    def __getattr__(self, name):
+        # Only reached for attributes dspy.LM.__init__ has not set yet.
+        if name.startswith('__') or name.startswith('_lazy') or self.__dict__.get('_lazy_state') != 'pending':
+            raise AttributeError(name)
+        self._materialize()
+        return getattr(self, name)
+
+    # dspy.LM drops its engine lock when pickled or deep-copied (LM.copy); the
+    # lazy lock is dropped the same way, so a LazyLM copies like a plain LM.
+    def __getstate__(self):
+        state = dspy.LM.__getstate__(self)
+        state.pop('_lazy_lock', None)
+        if state.get('_lazy_state') != 'ready':
+            state['_lazy_state'] = 'pending'
+        return state
+
+    def __setstate__(self, state):
+        if state.get('_lazy_state') == 'ready':
+            dspy.LM.__setstate__(self, state)
+        else:
+            # Still unbuilt: restore the arguments only, _materialize does the rest.
+            self.__dict__.update(state)
+        self.__dict__['_lazy_lock'] = threading.RLock()
+
+    def __repr__(self):
+        if not self.materialized:
+            model, api_base = lm_settings(*self._lazy_args[:2])
+            return f"LazyLM({model!r}, api_base={api_base!r}, not yet built)"
+        return super().__repr__()
+
+
+def configure_lm(model=None, api_base=None, **kwargs):
+    """Return a LazyLM, making it the default LM only if none is configured yet."""
+    lm = LazyLM(model, api_base, **kwargs)
+    if dspy.settings.lm is None:
+        dspy.configure(lm=lm)
+    return lm
+
+
+# Loads one example in a fresh interpreter (dspy already imported) and reports
+# how long the module body took and whether it built an LM client.
+_BENCH_PROBE = """
+import importlib.util, json, sys, time
+import dspy
+built = []
+original_init = dspy.LM.__init__
+def counting_init(self, *args, **kwargs):
+    built.append(type(self).__name__)
+    original_init(self, *args, **kwargs)
+dspy.LM.__init__ = counting_init
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location('example', sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+seconds = time.perf_counter() - start
+print(json.dumps({'seconds': seconds, 'lm_built': len(built)}))
+"""
+
+
+def benchmark_imports(paths, repeats=3):
+    """{path: {'seconds': best module-load time, 'lm_built': LM clients constructed}}."""
+    import json
+    import subprocess
+    import sys
+
+    results = {}
+    for path in paths:
+        runs = []
+        for _ in range(repeats):
+            proc = subprocess.run([sys.executable, '-c', _BENCH_PROBE, path], capture_output=True,
+                                  text=True, check=True, cwd=os.path.dirname(path))
+            runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+        results[path] = min(runs, key=lambda r: r['seconds'])
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+
+    parser = argparse.ArgumentParser(description="Lazy LM configuration for the examples.")
+    parser.add_argument("--bench", action="store_true", help="Time importing every example module")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.bench:
+        examples = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'visualization_examples')
+        paths = sorted(glob.glob(os.path.join(examples, '[0-9][0-9]_*.py')))
+        print(f"{'module':28} {'import ms':>10} {'LMs built':>10}")
+        for path, r in benchmark_imports(paths, args.repeats).items():
+            print(f"{os.path.basename(path):28} {r['seconds'] * 1000:10.2f} {r['lm_built']:10d}")
+        print("(times exclude `import dspy`, which every example needs for its signatures)")
+    else:
+        model, api_base = lm_settings()
+        print(f"model={model} api_base={api_base}")
@@ -0,0 +1,248 @@
+"""Record/replay HTTP proxy for the Ollama endpoints used by the examples.
+
+In ``record`` mode every request is forwarded to the real Ollama server and
+the request/response pair is stored (zlib-compressed) in a SQLite file,
+together with how long the server took.  In ``replay`` mode the proxy answers
+from that file only, optionally sleeping for the recorded (or a fixed)
+latency, so a pipeline's non-LM overhead can be timed reproducibly on a
+machine without Ollama.  ``auto`` replays what it has and records the rest.
+
+Requests are keyed by method, path and the canonical JSON body, so the same
+prompt sent with the same model and options always maps to the same entry.
+
+Record a run (Ollama moved off its default port, the proxy takes its place):
+    OLLAMA_HOST=127.0.0.1:11435 ollama serve
+    python utils/lm_replay.py --mode record --port 11434 --upstream http://127.0.0.1:11435
+    python visualization_examples/01_basic_qa.py
+
+Replay it later without Ollama:
+    python utils/lm_replay.py --mode replay --port 11434 --latency-scale 0
+    python visualization_examples/01_basic_qa.py
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.request
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'lm_recordings.sqlite'
+)
+DEFAULT_UPSTREAM = 'http://127.0.0.1:11435'
+MODES = ('record', 'replay', 'auto')
+
+
+def request_key(method, path, body):
+    """Stable key for one request; JSON bodies are compared by content, not formatting."""
+    try:
+        canonical = json.dumps(json.loads(body), sort_keys=True, separators=(',', ':'))
+    except ValueError:
+        canonical = body.decode('utf-8', 'replace')
+    payload = json.dumps([method, path.rstrip('/'), canonical])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class RecordingStore:
+    """Compact on-disk store of recorded request/response pairs."""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv('LM_REPLAY_PATH', DEFAULT_PATH)
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS exchanges ("
+            " key TEXT PRIMARY KEY,"
+            " method TEXT NOT NULL,"
+            " path TEXT NOT NULL,"
+            " request BLOB NOT NULL,"
+            " status INTEGER NOT NULL,"
+            " content_type TEXT,"
+            " response BLOB NOT NULL,"
+            " latency REAL NOT NULL,"
+            " created REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        """Return (status, content_type, body, latency) or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, content_type, response, latency FROM exchanges WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        status, content_type, response, latency = row
+        return status, content_type, zlib.decompress(response), latency
+
+    def put(self, key, method, path, request, status, content_type, response, latency):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO exchanges VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, method, path, zlib.compress(request, 6), status, content_type,
+                 zlib.compress(response, 6), latency, time.time()),
+            )
+            self._conn.commit()
+
+    def summary(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, COUNT(*), SUM(latency), SUM(LENGTH(request) + LENGTH(response))"
+                " FROM exchanges GROUP BY path ORDER BY path"
+            ).fetchall()
+        return [{'path': p, 'count': n, 'latency': lat, 'stored_bytes': size} for p, n, lat, size in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ProxyConfig:
+    """Behaviour shared by all request handlers of one proxy."""
+
+    def __init__(self, mode='replay', store=None, upstream=DEFAULT_UPSTREAM, latency=None,
+                 latency_scale=1.0, timeout=600.0):
+        if mode not in MODES:
+            raise ValueError(f"Unknown replay mode {mode!r}, expected one of {MODES}")
+        self.mode = mode
+        self.store = store if store is not None else RecordingStore()
+        self.upstream = upstream.rstrip('/')
+        self.latency = latency
+        self.latency_scale = latency_scale
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.stats = {'replayed': 0, 'recorded': 0, 'misses': 0, 'upstream_errors': 0}
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def replay_delay(self, recorded_latency):
+        if self.latency is not None:
+            return self.latency
+        return recorded_latency * self.latency_scale
+
+    def forward(self, method, path, body, headers):
+        """Send the request upstream; returns (status, content_type, body, latency)."""
+        request = urllib.request.Request(self.upstream + path, data=body if method != 'GET' else None,
+                                         method=method)
+        if headers.get('Content-Type'):
+            request.add_header('Content-Type', headers['Content-Type'])
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                data = response.read()
+                status, content_type = response.status, response.headers.get('Content-Type')
+        except urllib.error.HTTPError as e:
+            data, status, content_type = e.read(), e.code, e.headers.get('Content-Type')
+        return status, content_type, data, time.perf_counter() - start
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    config = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type or 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        key = request_key(method, self.path, body)
+        config = self.config
+
+        if config.mode != 'record':
+            hit = config.store.get(key)
+            if hit is not None:
+                status, content_type, data, latency = hit
+                delay = config.replay_delay(latency)
+                if delay > 0:
+                    time.sleep(delay)
+                config.count('replayed')
+                self._send(status, content_type, data)
+                return
+            if config.mode == 'replay':
+                config.count('misses')
+                message = f"No recording for {method} {self.path} (key {key[:12]})"
+                self._send(404, 'application/json', json.dumps({'error': message}).encode('utf-8'))
+                return
+
+        try:
+            status, content_type, data, latency = config.forward(method, self.path, body, self.headers)
+        except (urllib.error.URLError, OSError) as e:
+            config.count('upstream_errors')
+            message = f"Upstream {config.upstream} unreachable: {e}"
+            self._send(502, 'application/json', json.dumps({'error': message}).encode('utf-8'))
+            return
+        if status < 500:
+            config.store.put(key, method, self.path.rstrip('/'), body, status, content_type, data, latency)
+            config.count('recorded')
+        self._send(status, content_type, data)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+
+def start_proxy(host='127.0.0.1', port=0, **config_kwargs):
+    """Start the proxy on a background thread; returns the server.
+
+    ``server.config.stats`` counts replayed, recorded and missed requests.
+    The base URL for ``dspy.LM(..., api_base=...)`` is
+    ``"http://%s:%d" % server.server_address``.
+    """
+    handler = type('ConfiguredReplayHandler', (ReplayHandler,), {'config': ProxyConfig(**config_kwargs)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.config = handler.config
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Record/replay proxy for an Ollama server.")
+    parser.add_argument("--mode", choices=MODES, default="replay")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--upstream", default=DEFAULT_UPSTREAM, help="Real Ollama server (record/auto modes)")
+    parser.add_argument("--store", default=None, help=f"Recording file (default: $LM_REPLAY_PATH or {DEFAULT_PATH})")
+    parser.add_argument("--latency", type=float, default=None, help="Fixed replay delay in seconds")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Multiplier on the recorded latency when --latency is not given (0 = instant)")
+    parser.add_argument("--summary", action="store_true", help="Print what the store contains and exit")
+    args = parser.parse_args()
+
+    store = RecordingStore(args.store)
+    if args.summary:
+        for row in store.summary():
+            print(f"{row['path']:28} {row['count']:6d} requests  {row['latency']:9.2f}s recorded  "
+                  f"{row['stored_bytes'] / 1024:9.1f} KiB")
+        raise SystemExit(0)
+
+    server = start_proxy(args.host, args.port, mode=args.mode, store=store, upstream=args.upstream,
+                         latency=args.latency, latency_scale=args.latency_scale)
+    print(f"LM {args.mode} proxy on http://{args.host}:{server.server_address[1]} ({store.path})")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"Stats: {server.config.stats}")
@@ -0,0 +1,235 @@
+"""MIPROv2 with on-disk checkpoints, so an interrupted run can be resumed.
+
+CheckpointedMIPROv2 behaves like ``dspy.MIPROv2`` but writes what it has paid
+for to a checkpoint directory as soon as it has it:
+
+    run.json        fingerprint of the run (student, data, metric, settings)
+    demos.json      bootstrapped demo candidate sets (step 1)
+    instructions.json  proposed instruction candidates (step 2)
+    trials.jsonl    one line per scored evaluation (step 3), appended as it finishes
+
+With ``resume=True`` the saved steps are loaded instead of re-run and every
+evaluation whose (candidate program, batch) was already scored returns the
+stored score without calling the LM.  The random generator state is saved
+with each step and the optuna sampler is seeded, so a resumed run proposes the
+same trials in the same order and reaches the first unscored one for free.
+
+    optimizer = CheckpointedMIPROv2(metric=metric, resume=True)
+    optimized = optimizer.compile(program, trainset=trainset)
+
+The checkpoint directory defaults to ``.cache/mipro/<run fingerprint>``, so a
+changed trainset, metric or setting starts a fresh checkpoint automatically.
+"""
+
+import contextvars
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+import dspy
+from dspy.teleprompt import mipro_optimizer_v2
+from dspy.teleprompt.utils import create_minibatch
+
+from utils.evaluation import example_key, program_fingerprint
+
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'mipro')
+
+# MIPROv2 scores every candidate through the module-level eval_candidate_program.
+# It is replaced once by _dispatch_eval, which routes calls made inside a
+# CheckpointedMIPROv2.compile to that optimizer (tracked per thread/task by
+# _active_optimizer) and everything else to dspy's function, so concurrent
+# compiles never swap the hook under each other.
+_dspy_eval_candidate_program = mipro_optimizer_v2.eval_candidate_program
+_active_optimizer = contextvars.ContextVar('checkpointed_mipro', default=None)
+_install_lock = threading.Lock()
+
+
+def _dispatch_eval(*args, **kwargs):
+    optimizer = _active_optimizer.get()
+    if optimizer is None:
+        return _dspy_eval_candidate_program(*args, **kwargs)
+    return optimizer._eval_candidate_program(*args, **kwargs)
+
+
+def _install_dispatch():
+    with _install_lock:
+        if mipro_optimizer_v2.eval_candidate_program is not _dispatch_eval:
+            mipro_optimizer_v2.eval_candidate_program = _dispatch_eval
+
+
+def _dump_examples(examples):
+    return [{'fields': ex.toDict(), 'inputs': sorted(ex._input_keys or [])} for ex in examples]
+
+
+def _load_examples(records):
+    examples = []
+    for record in records:
+        example = dspy.Example(**record['fields'])
+        examples.append(example.with_inputs(*record['inputs']) if record['inputs'] else example)
+    return examples
+
+
+def _rng_state(rng):
+    version, internal, gauss = rng.getstate()
+    return [version, list(internal), gauss]
+
+
+def _set_rng_state(rng, state):
+    version, internal, gauss = state
+    rng.setstate((version, tuple(internal), gauss))
+
+
+class CheckpointedMIPROv2(dspy.MIPROv2):
+    """``dspy.MIPROv2`` that checkpoints candidates and trial scores.
+
+    Args:
+        checkpoint_dir: Where to keep the checkpoint (default: under
+            ``.cache/mipro/`` named after the run fingerprint).
+        resume: Reuse a matching checkpoint instead of starting over.
+        **kwargs: Passed to ``dspy.MIPROv2``.
+    """
+
+    def __init__(self, *args, checkpoint_dir=None, resume=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkpoint_dir = checkpoint_dir
+        self.resume = resume
+        self.checkpoint_stats = {'reused_trials': 0, 'scored_trials': 0, 'reused_steps': []}
+        self._trials = {}
+        self._trials_lock = threading.Lock()
+        self.best_program_so_far = None
+        self.best_score_so_far = None
+
+    # -- checkpoint files ----------------------------------------------------
+
+    def _path(self, name):
+        return os.path.join(self.checkpoint_dir, name)
+
+    def _read_json(self, name):
+        try:
+            with open(self._path(name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_json(self, name, payload):
+        tmp = self._path(name) + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, default=str)
+        os.replace(tmp, self._path(name))
+
+    def _load_trials(self):
+        trials = {}
+        if os.path.exists(self._path('trials.jsonl')):
+            with open(self._path('trials.jsonl'), 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # partially written last line
+                    trials[record['key']] = record['score']
+        return trials
+
+    def _record_trial(self, key, score, kind):
+        with self._trials_lock:
+            self._trials[key] = score
+            with open(self._path('trials.jsonl'), 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'key': key, 'score': score, 'kind': kind, 'time': time.time()}) + '\n')
+
+    def run_fingerprint(self, student, trainset, valset, compile_kwargs):
+        metric = self.metric
+        payload = {
+            'student': program_fingerprint(student, self.task_model),
+            'trainset': [example_key(ex) for ex in trainset],
+            'valset': [example_key(ex) for ex in valset] if valset else None,
+            'metric': f"{getattr(metric, '__module__', '')}.{getattr(metric, '__qualname__', repr(metric))}",
+            'prompt_model': getattr(self.prompt_model, 'model', None),
+            'settings': {
+                'auto': self.auto, 'num_candidates': self.num_candidates, 'seed': self.seed,
+                'init_temperature': self.init_temperature, 'max_bootstrapped_demos': self.max_bootstrapped_demos,
+                'max_labeled_demos': self.max_labeled_demos, 'metric_threshold': self.metric_threshold,
+            },
+            'compile': compile_kwargs,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    # -- MIPROv2 steps ---------------------------------------------------------
+
+    def compile(self, student, *, trainset, valset=None, **kwargs):
+        fingerprint = self.run_fingerprint(student, trainset, valset, kwargs)
+        if self.checkpoint_dir is None:
+            self.checkpoint_dir = os.path.join(DEFAULT_ROOT, fingerprint[:16])
+        run = self._read_json('run.json') if os.path.isdir(self.checkpoint_dir) else None
+        if self.resume and run is not None and run.get('fingerprint') != fingerprint:
+            raise ValueError(f"Checkpoint in {self.checkpoint_dir} belongs to a different run; "
+                             "use another checkpoint_dir or resume=False")
+        if not self.resume and os.path.isdir(self.checkpoint_dir):
+            shutil.rmtree(self.checkpoint_dir)
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        self._write_json('run.json', {'fingerprint': fingerprint, 'created': (run or {}).get('created', time.time())})
+        self._trials = self._load_trials()
+
+        # Route MIPROv2's candidate evaluations through the trial cache for the
+        # duration of this compile (see _dispatch_eval).
+        _install_dispatch()
+        token = _active_optimizer.set(self)
+        try:
+            best_program = super().compile(student, trainset=trainset, valset=valset, **kwargs)
+        finally:
+            _active_optimizer.reset(token)
+        if best_program is not None:
+            best_program.save(self._path('best_program.json'))
+        return best_program
+
+    def _bootstrap_fewshot_examples(self, *args, **kwargs):
+        saved = self._read_json('demos.json') if self.resume else None
+        if saved is not None:
+            _set_rng_state(self.rng, saved['rng'])
+            self.checkpoint_stats['reused_steps'].append('demos')
+            if saved['demos'] is None:
+                return None
+            return {int(i): [_load_examples(demo_set) for demo_set in sets] for i, sets in saved['demos'].items()}
+        demo_candidates = super()._bootstrap_fewshot_examples(*args, **kwargs)
+        demos = None if demo_candidates is None else {
+            i: [_dump_examples(demo_set) for demo_set in sets] for i, sets in demo_candidates.items()
+        }
+        self._write_json('demos.json', {'demos': demos, 'rng': _rng_state(self.rng)})
+        return demo_candidates
+
+    def _propose_instructions(self, *args, **kwargs):
+        saved = self._read_json('instructions.json') if self.resume else None
+        if saved is not None:
+            _set_rng_state(self.rng, saved['rng'])
+            self.checkpoint_stats['reused_steps'].append('instructions')
+            return {int(i): list(candidates) for i, candidates in saved['instructions'].items()}
+        instruction_candidates = super()._propose_instructions(*args, **kwargs)
+        self._write_json('instructions.json', {'instructions': instruction_candidates, 'rng': _rng_state(self.rng)})
+        return instruction_candidates
+
+    def _eval_candidate_program(self, batch_size, trainset, candidate_program, evaluate, rng=None):
+        """Same contract as dspy's eval_candidate_program, but answered from the checkpoint when possible."""
+        full = batch_size >= len(trainset)
+        # Draw the minibatch exactly as dspy does, so the rng advances identically on hits.
+        batch = trainset if full else create_minibatch(trainset, batch_size, rng)
+        key = hashlib.sha256(json.dumps(
+            [program_fingerprint(candidate_program, self.task_model)] + [example_key(ex) for ex in batch]
+        ).encode('utf-8')).hexdigest()
+        if key in self._trials:
+            self.checkpoint_stats['reused_trials'] += 1
+            return dspy.Prediction(score=self._trials[key], results=[])
+
+        kind = 'eval_full' if full else 'eval_minibatch'
+        try:
+            result = evaluate(candidate_program, devset=batch, callback_metadata={"metric_key": kind})
+        except Exception:
+            mipro_optimizer_v2.logger.error("An exception occurred during evaluation", exc_info=True)
+            return dspy.Prediction(score=0.0, results=[])
+        self._record_trial(key, result.score, kind)
+        self.checkpoint_stats['scored_trials'] += 1
+        if full and (self.best_program_so_far is None or result.score > self.best_score_so_far):
+            # Fallback if the run is cut short (see utils/budget.py).
+            self.best_program_so_far = candidate_program.deepcopy()
+            self.best_score_so_far = result.score
+        return result
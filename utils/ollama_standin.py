@@ -0,0 +1,225 @@
+"""Local HTTP stand-in for an Ollama server.
+
+Answers ``/api/generate``, ``/api/chat`` and the OpenAI-compatible
+``/v1/chat/completions`` with well-formed DSPy ChatAdapter (or JSONAdapter)
+replies, without running a model, so agent and pipeline overhead can be timed
+on a machine without Ollama.  The reply lists every output field the prompt
+asks for (``[[ ## field ## ]]`` markers) and fills it with a placeholder
+matching its declared type.  ReAct prompts get ``tool_steps`` tool calls (with
+arguments built from the tool's argument schema) before ``finish``.
+
+    python utils/ollama_standin.py --port 11435 --latency 0.2
+    OLLAMA_API_BASE=http://127.0.0.1:11435 python dspy_examples/multi_tool.py
+"""
+
+import ast
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RESPOND_RE = re.compile(r'Respond with the corresponding output fields, (.*?)(?:\n\n|$)', re.S)
+JSON_RESPOND_RE = re.compile(r'Respond with a JSON object in the following order of fields: (.*?)(?:\n\n|$)', re.S)
+FIELD_RE = re.compile(r'`\[\[ ## (\w+) ## \]\]`(?: \(must be formatted as a valid Python ([^)]*\)?)\))?')
+JSON_FIELD_RE = re.compile(r'`(\w+)`(?: \(must be formatted as a valid Python ([^)]*\)?)\))?')
+TOOL_RE = re.compile(r'\(\d+\) (\w+)(?:, whose description is <desc>.*?</desc>)?\. It takes arguments (\{.*?\})\.', re.S)
+
+
+def _placeholder(name, type_hint):
+    """Return a Python value for field ``name`` that DSPy will parse as ``type_hint``."""
+    type_hint = type_hint or ''
+    if type_hint.startswith('Literal'):
+        options = re.findall(r"'([^']*)'", type_hint)
+        return options[0] if options else 'stand-in'
+    if 'float' in type_hint:
+        return 0.0
+    if 'int' in type_hint:
+        return 0
+    if 'bool' in type_hint:
+        return True
+    if type_hint.startswith(('list', 'List')):
+        return ["stand-in"]
+    if type_hint.startswith(('dict', 'Dict')):
+        return {}
+    return f"Stand-in {name.replace('_', ' ')}."
+
+
+def _tool_args(schema):
+    args = {}
+    for arg, spec in schema.items():
+        kind = spec.get('type') if isinstance(spec, dict) else None
+        if kind == 'string':
+            args[arg] = '1 + 1' if 'expr' in arg else 'stand-in query'
+        elif kind in ('integer', 'number'):
+            args[arg] = 1
+        elif kind == 'boolean':
+            args[arg] = True
+        else:
+            args[arg] = None
+    return args
+
+
+def build_values(prompt, fields, tool_steps=0):
+    """Placeholder values for ``[(name, type_hint), ...]``, driving ReAct tool calls."""
+    tools = {name: ast.literal_eval(schema) for name, schema in TOOL_RE.findall(prompt)}
+    steps_taken = len(set(re.findall(r'observation_(\d+)', prompt)))
+    values = {}
+    next_tool = 'finish'
+    for name, type_hint in fields:
+        if name == 'completed':
+            continue
+        if name == 'next_tool_name':
+            options = [t for t in re.findall(r"'([^']*)'", type_hint or '') if t != 'finish']
+            if steps_taken < tool_steps and options:
+                next_tool = options[steps_taken % len(options)]
+            values[name] = next_tool
+        elif name == 'next_tool_args':
+            values[name] = _tool_args(tools.get(next_tool, {})) if next_tool != 'finish' else {}
+        else:
+            values[name] = _placeholder(name, type_hint)
+    return values
+
+
+def build_reply(prompt, tool_steps=0):
+    """Build a ChatAdapter- or JSONAdapter-formatted completion for ``prompt``."""
+    chat_requests = RESPOND_RE.findall(prompt)
+    json_requests = JSON_RESPOND_RE.findall(prompt)
+    if json_requests and not chat_requests:
+        fields = JSON_FIELD_RE.findall(json_requests[-1])
+        return json.dumps(build_values(prompt, fields, tool_steps))
+    if not chat_requests:
+        return "Stand-in reply."
+    fields = FIELD_RE.findall(chat_requests[-1])
+    parts = []
+    for name, value in build_values(prompt, fields, tool_steps).items():
+        text = value if isinstance(value, str) else json.dumps(value)
+        parts.append(f"[[ ## {name} ## ]]\n{text}")
+    parts.append("[[ ## completed ## ]]")
+    return "\n\n".join(parts)
+
+
+class OllamaStandinConfig:
+    def __init__(self, latency=0.0, tool_steps=0, model='gemma3:1b'):
+        self.latency = latency
+        self.tool_steps = tool_steps
+        self.model = model
+        self.lock = threading.Lock()
+        self.requests = 0
+
+
+class OllamaStandinHandler(BaseHTTPRequestHandler):
+    config = OllamaStandinConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/api/tags':
+            self._send_json({'models': [{'name': self.config.model, 'model': self.config.model}]})
+        else:
+            self._send_json({'status': 'ok'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}')
+        path = self.path.rstrip('/')
+        if path == '/api/show':
+            self._send_json({'modelfile': '', 'parameters': '', 'template': '', 'model_info': {}})
+            return
+
+        with self.config.lock:
+            self.config.requests += 1
+        if self.config.latency:
+            time.sleep(self.config.latency)
+
+        if 'messages' in body:
+            prompt = '\n\n'.join(str(m.get('content', '')) for m in body['messages'])
+        else:
+            prompt = body.get('prompt', '')
+        reply = build_reply(prompt, self.config.tool_steps)
+        usage = {
+            'prompt_eval_count': len(prompt.split()),
+            'eval_count': len(reply.split()),
+        }
+        common = {
+            'model': body.get('model', self.config.model),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'done': True,
+            'done_reason': 'stop',
+            **usage,
+        }
+        if path.endswith('/chat/completions'):
+            # OpenAI-compatible endpoint (Ollama serves it under /v1).
+            self._send_json({
+                'id': f"standin-{self.config.requests}",
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': common['model'],
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': reply}}],
+                'usage': {'prompt_tokens': usage['prompt_eval_count'],
+                          'completion_tokens': usage['eval_count'],
+                          'total_tokens': usage['prompt_eval_count'] + usage['eval_count']},
+            })
+        elif body.get('stream'):
+            # Single chunk stream: the whole reply, then the final stats line.
+            chunk = dict(common, done=False)
+            if path == '/api/chat':
+                chunk['message'] = {'role': 'assistant', 'content': reply}
+            else:
+                chunk['response'] = reply
+            final = dict(common, response='') if path != '/api/chat' else \
+                dict(common, message={'role': 'assistant', 'content': ''})
+            data = (json.dumps(chunk) + '\n' + json.dumps(final) + '\n').encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        elif path == '/api/chat':
+            self._send_json(dict(common, message={'role': 'assistant', 'content': reply}))
+        else:
+            self._send_json(dict(common, response=reply))
+
+
+def start_server(host='127.0.0.1', port=0, **config_kwargs):
+    """Start the stand-in on a background thread; returns the server.
+
+    The base URL for ``dspy.LM(..., api_base=...)`` is
+    ``"http://%s:%d" % server.server_address``.
+    """
+    handler = type('ConfiguredOllamaStandinHandler', (OllamaStandinHandler,),
+                   {'config': OllamaStandinConfig(**config_kwargs)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.config = handler.config
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Local stand-in for an Ollama server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before each reply")
+    parser.add_argument("--tool-steps", type=int, default=0, help="Tool calls a ReAct agent makes before finishing")
+    args = parser.parse_args()
+
+    server = start_server(args.host, args.port, latency=args.latency, tool_steps=args.tool_steps)
+    print(f"Ollama stand-in listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -2,6 +2,7 @@
 
 import os
 import io
+import sys
 import re
 import contextlib
 
@@ -24,7 +25,10 @@ def save_response(lm, filepath):
 
     # Capture the output of lm.inspect_history(n=1)
     f = io.StringIO()
-    with contextlib.redirect_stdout(f):
+    # A thread-aware stdout (see run_inprocess.py) captures only this thread's output;
+    # redirect_stdout would also swallow prints from examples running alongside.
+    capture = getattr(sys.stdout, 'capture', None)
+    with (capture(f) if capture else contextlib.redirect_stdout(f)):
         lm.inspect_history(n=1)
     history_content = f.getvalue()
 
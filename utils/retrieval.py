@@ -0,0 +1,310 @@
+"""Local retrieval index: BM25 over an on-disk inverted index, plus optional dense vectors.
+
+The index lives in a directory:
+    index.sqlite   documents, postings (term -> doc, tf) and corpus statistics
+    vectors.f32    optional float32 embeddings, one row per document, appended
+                   on every add and memory-mapped with NumPy at query time
+
+Documents can be added incrementally; BM25 statistics are derived from the
+stored counts at query time, so nothing has to be rebuilt.  Dense search needs
+NumPy and an embedder (``HashingEmbedder`` works without any model download).
+
+    python utils/retrieval.py build INDEX_DIR docs.txt notes.jsonl --dense
+    python utils/retrieval.py search INDEX_DIR "who is the lead developer?" -k 3
+    python utils/retrieval.py bench INDEX_DIR --queries 200
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+TOKEN_RE = re.compile(r'\w+')
+DEFAULT_DIM = 256
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class HashingEmbedder:
+    """Feature-hashed bag-of-words vectors (L2-normalized). Needs NumPy."""
+
+    def __init__(self, dim=DEFAULT_DIM):
+        if np is None:
+            raise ImportError("Dense retrieval requires numpy (pip install numpy)")
+        self.dim = dim
+
+    def __call__(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                digest = hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest()
+                value = int.from_bytes(digest, 'little')
+                sign = 1.0 if value & 1 else -1.0
+                vectors[row, (value >> 1) % self.dim] += sign
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+class LocalIndex:
+    """BM25 (and optionally dense) retrieval over a directory-backed index.
+
+    Args:
+        path: Index directory; created if missing.
+        embedder: Callable mapping a list of texts to a float32 array of shape
+            (n, dim). Enables dense/hybrid search. Must be the same across
+            sessions for one index.
+        k1, b: BM25 parameters.
+    """
+
+    def __init__(self, path, embedder=None, k1=1.5, b=0.75):
+        self.path = path
+        self.embedder = embedder
+        self.k1 = k1
+        self.b = b
+        os.makedirs(path, exist_ok=True)
+        # One connection shared by every thread (the agents' --batch workers
+        # search the same index); all use of it goes through this lock.
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(os.path.join(path, 'index.sqlite'), check_same_thread=False)
+        # Let SQLite serve reads straight from a memory map of the file.
+        self._conn.execute("PRAGMA mmap_size = 268435456")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            " rowid INTEGER PRIMARY KEY, doc_id TEXT UNIQUE, text TEXT NOT NULL, length INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " term TEXT NOT NULL, rowid INTEGER NOT NULL, tf INTEGER NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS postings_term ON postings(term);"
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);"
+        )
+        self._conn.commit()
+        self._vectors = None
+
+    # -- ingestion -------------------------------------------------------
+
+    @property
+    def vectors_path(self):
+        return os.path.join(self.path, 'vectors.f32')
+
+    def __len__(self):
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()
+        return count
+
+    def add(self, texts, ids=None):
+        """Append documents; returns their doc ids. Duplicate ids are skipped."""
+        texts = list(texts)
+        ids = list(ids) if ids is not None else [
+            hashlib.sha1(text.encode('utf-8')).hexdigest()[:16] for text in texts
+        ]
+        added_ids, added_texts = [], []
+        with self._lock:
+            if self.embedder is not None and self._vector_count() != len(self):
+                # Vector row i belongs to document rowid i + 1; keep them aligned.
+                raise ValueError("Index has documents without vectors; rebuild it with an embedder")
+            cur = self._conn.cursor()
+            try:
+                for doc_id, text in zip(ids, texts):
+                    tokens = tokenize(text)
+                    cur.execute("INSERT OR IGNORE INTO docs (doc_id, text, length) VALUES (?, ?, ?)",
+                                (doc_id, text, len(tokens)))
+                    if cur.rowcount == 0:
+                        continue
+                    rowid = cur.lastrowid
+                    counts = {}
+                    for token in tokens:
+                        counts[token] = counts.get(token, 0) + 1
+                    cur.executemany("INSERT INTO postings (term, rowid, tf) VALUES (?, ?, ?)",
+                                    [(term, rowid, tf) for term, tf in counts.items()])
+                    added_ids.append(doc_id)
+                    added_texts.append(text)
+                if added_texts and self.embedder is not None:
+                    self._append_vectors(self.embedder(added_texts))
+            except BaseException:
+                # Otherwise a later commit would store these documents without vectors.
+                self._conn.rollback()
+                raise
+            self._conn.commit()
+        return added_ids
+
+    def _vector_count(self):
+        stored = self._conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        if stored is None or not os.path.exists(self.vectors_path):
+            return 0
+        return os.path.getsize(self.vectors_path) // (4 * int(stored[0]))
+
+    def _append_vectors(self, vectors):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        dim = vectors.shape[1]
+        stored = self._conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()
+        if stored is None:
+            self._conn.execute("INSERT INTO meta (key, value) VALUES ('dim', ?)", (str(dim),))
+        elif int(stored[0]) != dim:
+            raise ValueError(f"Embedding dim {dim} does not match index dim {stored[0]}")
+        with open(self.vectors_path, 'ab') as f:
+            f.write(vectors.tobytes())
+        self._vectors = None  # remap on next query
+
+    def add_files(self, paths):
+        """Ingest text files (one document per blank-line separated paragraph) or JSONL
+        files with a ``text`` field and optional ``id``."""
+        total = 0
+        for path in paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                if path.endswith('.jsonl'):
+                    records = [json.loads(line) for line in f if line.strip()]
+                    texts = [r['text'] for r in records]
+                    ids = [str(r.get('id', f"{os.path.basename(path)}:{i}")) for i, r in enumerate(records)]
+                else:
+                    texts = [p.strip() for p in re.split(r'\n\s*\n', f.read()) if p.strip()]
+                    ids = [f"{os.path.basename(path)}:{i}" for i in range(len(texts))]
+            total += len(self.add(texts, ids))
+        return total
+
+    # -- search ----------------------------------------------------------
+
+    def _doc_text(self, rowids):
+        placeholders = ','.join('?' * len(rowids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT rowid, doc_id, text FROM docs WHERE rowid IN ({placeholders})", list(rowids)
+            ).fetchall()
+        return {rowid: (doc_id, text) for rowid, doc_id, text in rows}
+
+    def bm25_scores(self, query):
+        """Return {rowid: score} for documents sharing a term with ``query``."""
+        terms = set(tokenize(query))
+        if not terms:
+            return {}
+        placeholders = ','.join('?' * len(terms))
+        with self._lock:
+            n_docs, avgdl = self._conn.execute("SELECT COUNT(*), AVG(length) FROM docs").fetchone()
+            if not n_docs:
+                return {}
+            rows = self._conn.execute(
+                f"SELECT p.term, p.rowid, p.tf, d.length FROM postings p JOIN docs d ON d.rowid = p.rowid"
+                f" WHERE p.term IN ({placeholders})", list(terms)
+            ).fetchall()
+        df = {}
+        for term, _, _, _ in rows:
+            df[term] = df.get(term, 0) + 1
+        scores = {}
+        for term, rowid, tf, length in rows:
+            idf = math.log(1 + (n_docs - df[term] + 0.5) / (df[term] + 0.5))
+            norm = tf + self.k1 * (1 - self.b + self.b * length / (avgdl or 1))
+            scores[rowid] = scores.get(rowid, 0.0) + idf * tf * (self.k1 + 1) / norm
+        return scores
+
+    def _load_vectors(self):
+        with self._lock:
+            if self._vectors is None and os.path.exists(self.vectors_path):
+                dim = int(self._conn.execute("SELECT value FROM meta WHERE key = 'dim'").fetchone()[0])
+                count = self._vector_count()
+                self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(count, dim))
+            return self._vectors
+
+    def dense_scores(self, query, k):
+        """Return {rowid: cosine} for the ``k`` nearest documents."""
+        if self.embedder is None:
+            raise ValueError("Dense search needs an embedder")
+        vectors = self._load_vectors()
+        if vectors is None or not len(vectors):
+            return {}
+        sims = vectors @ self.embedder([query])[0]
+        k = min(k, len(sims))
+        top = np.argpartition(-sims, k - 1)[:k]
+        return {int(i) + 1: float(sims[i]) for i in top}
+
+    def search(self, query, k=5, mode='bm25'):
+        """Top-``k`` documents as ``[(doc_id, score, text), ...]``.
+
+        ``mode`` is ``'bm25'``, ``'dense'`` or ``'hybrid'`` (reciprocal rank
+        fusion of both rankings).
+        """
+        if mode == 'bm25':
+            scores = self.bm25_scores(query)
+        elif mode == 'dense':
+            scores = self.dense_scores(query, k)
+        elif mode == 'hybrid':
+            scores = {}
+            for ranking in (self.bm25_scores(query), self.dense_scores(query, 4 * k)):
+                ordered = sorted(ranking, key=ranking.get, reverse=True)
+                for rank, rowid in enumerate(ordered):
+                    scores[rowid] = scores.get(rowid, 0.0) + 1.0 / (60 + rank)
+        else:
+            raise ValueError(f"Unknown search mode {mode!r}")
+        top = sorted(scores, key=scores.get, reverse=True)[:k]
+        if not top:
+            return []
+        docs = self._doc_text(top)
+        return [(docs[r][0], scores[r], docs[r][1]) for r in top if r in docs]
+
+    def retrieve(self, query, k=3, mode=None):
+        """Passages for use as a DSPy ``context`` input."""
+        mode = mode or os.getenv('RETRIEVAL_MODE', 'bm25')
+        return [text for _, _, text in self.search(query, k=k, mode=mode)]
+
+    def close(self):
+        with self._lock:
+            self._vectors = None  # drops the memmap
+            self._conn.close()
+
+
+def open_index(path, dense=None):
+    """Open an index, enabling the hashing embedder if it was built with vectors."""
+    dense = os.path.exists(os.path.join(path, 'vectors.f32')) if dense is None else dense
+    return LocalIndex(path, embedder=HashingEmbedder() if dense else None)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Build, query and benchmark a local retrieval index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Add documents from text/JSONL files")
+    build.add_argument("index")
+    build.add_argument("files", nargs="+")
+    build.add_argument("--dense", action="store_true", help="Also store hashed dense vectors (needs numpy)")
+    search = sub.add_parser("search", help="Query the index")
+    search.add_argument("index")
+    search.add_argument("query")
+    search.add_argument("-k", type=int, default=3)
+    search.add_argument("--mode", default="bm25", choices=["bm25", "dense", "hybrid"])
+    bench = sub.add_parser("bench", help="Time random queries drawn from the indexed text")
+    bench.add_argument("index")
+    bench.add_argument("--queries", type=int, default=200)
+    bench.add_argument("--mode", default="bm25", choices=["bm25", "dense", "hybrid"])
+    args = parser.parse_args()
+
+    if args.command == "build":
+        index = open_index(args.index, dense=args.dense or None)
+        start = time.perf_counter()
+        added = index.add_files(args.files)
+        print(f"Added {added} documents in {time.perf_counter() - start:.2f}s ({len(index)} total)")
+    elif args.command == "search":
+        index = open_index(args.index)
+        for doc_id, score, text in index.search(args.query, k=args.k, mode=args.mode):
+            print(f"{score:8.3f}  {doc_id}  {text[:100]}")
+    else:
+        import random
+        index = open_index(args.index)
+        words = [row[0] for row in index._conn.execute("SELECT DISTINCT term FROM postings LIMIT 5000")]
+        rng = random.Random(0)
+        queries = [' '.join(rng.sample(words, min(4, len(words)))) for _ in range(args.queries)]
+        start = time.perf_counter()
+        for q in queries:
+            index.search(q, k=5, mode=args.mode)
+        elapsed = time.perf_counter() - start
+        print(f"{len(index)} documents, {args.queries} {args.mode} queries: "
+              f"{elapsed / args.queries * 1000:.2f} ms/query")
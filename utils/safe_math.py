@@ -0,0 +1,145 @@
+"""In-process evaluator for plain arithmetic expressions.
+
+Walks the expression's AST and only accepts numeric literals, arithmetic and
+comparison operators, a few builtins and whitelisted ``math`` functions.  Any
+other construct raises UnsupportedExpression so the caller can fall back to a
+real sandbox such as dspy.PythonInterpreter.
+"""
+
+import ast
+import math
+import operator
+
+BINARY_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+    ast.LShift: operator.lshift,
+    ast.RShift: operator.rshift,
+}
+
+UNARY_OPS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+COMPARE_OPS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+FUNCTIONS = {
+    'abs': abs, 'round': round, 'min': min, 'max': max,
+    'int': int, 'float': float,
+    'sqrt': math.sqrt, 'exp': math.exp, 'log': math.log, 'log10': math.log10,
+    'log2': math.log2, 'sin': math.sin, 'cos': math.cos, 'tan': math.tan,
+    'asin': math.asin, 'acos': math.acos, 'atan': math.atan,
+    'floor': math.floor, 'ceil': math.ceil, 'factorial': math.factorial,
+    'gcd': math.gcd, 'hypot': math.hypot, 'radians': math.radians,
+    'degrees': math.degrees,
+}
+
+CONSTANTS = {'pi': math.pi, 'e': math.e, 'tau': math.tau, 'inf': math.inf}
+
+# Guard against expressions like 9**9**9 or (9**9999)**9999 that would stall
+# the process: integer results are bounded in bits *before* they are computed
+# (about 3000 decimal digits, below Python's int-to-str limit).
+MAX_EXPONENT = 10000
+MAX_RESULT_BITS = 10000
+MAX_FACTORIAL = 1000
+
+
+class UnsupportedExpression(ValueError):
+    """The expression needs more than the fast path can safely evaluate."""
+
+
+def _check_result_size(op, left, right):
+    """Raise UnsupportedExpression if ``left op right`` could exceed MAX_RESULT_BITS."""
+    if isinstance(op, ast.Pow):
+        if abs(right) > MAX_EXPONENT:
+            raise UnsupportedExpression("Exponent too large for the fast path")
+        if isinstance(left, int) and isinstance(right, int) and right > 0 \
+                and abs(left).bit_length() * right > MAX_RESULT_BITS:
+            raise UnsupportedExpression("Power too large for the fast path")
+    elif isinstance(op, ast.Mult):
+        if isinstance(left, int) and isinstance(right, int) \
+                and abs(left).bit_length() + abs(right).bit_length() > MAX_RESULT_BITS:
+            raise UnsupportedExpression("Product too large for the fast path")
+    elif isinstance(op, ast.LShift):
+        if isinstance(left, int) and isinstance(right, int) \
+                and abs(left).bit_length() + right > MAX_RESULT_BITS:
+            raise UnsupportedExpression("Shift too large for the fast path")
+
+
+def _eval_node(node):
+    if isinstance(node, ast.Expression):
+        return _eval_node(node.body)
+
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+            return node.value
+        raise UnsupportedExpression(f"Unsupported literal: {node.value!r}")
+
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPS:
+        left = _eval_node(node.left)
+        right = _eval_node(node.right)
+        _check_result_size(node.op, left, right)
+        return BINARY_OPS[type(node.op)](left, right)
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPS:
+        return UNARY_OPS[type(node.op)](_eval_node(node.operand))
+
+    if isinstance(node, ast.Compare) and all(type(op) in COMPARE_OPS for op in node.ops):
+        left = _eval_node(node.left)
+        for op, comparator in zip(node.ops, node.comparators):
+            right = _eval_node(comparator)
+            if not COMPARE_OPS[type(op)](left, right):
+                return False
+            left = right
+        return True
+
+    if isinstance(node, ast.Name) and node.id in CONSTANTS:
+        return CONSTANTS[node.id]
+
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) \
+            and node.value.id == 'math' and node.attr in CONSTANTS:
+        return CONSTANTS[node.attr]
+
+    if isinstance(node, ast.Call) and not node.keywords:
+        func = node.func
+        if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name) \
+                and func.value.id == 'math':
+            name = func.attr
+        elif isinstance(func, ast.Name):
+            name = func.id
+        else:
+            name = None
+        if name in FUNCTIONS:
+            args = [_eval_node(arg) for arg in node.args]
+            if name == 'factorial' and args and args[0] > MAX_FACTORIAL:
+                raise UnsupportedExpression("Factorial argument too large for the fast path")
+            return FUNCTIONS[name](*args)
+
+    raise UnsupportedExpression(f"Unsupported syntax: {type(node).__name__}")
+
+
+def safe_eval(expression):
+    """Evaluate a pure arithmetic expression in-process.
+
+    Raises UnsupportedExpression when the expression is not plain arithmetic
+    (statements, names, attribute access, strings, ...). Arithmetic errors
+    such as ZeroDivisionError propagate unchanged.
+    """
+    try:
+        tree = ast.parse(expression.strip(), mode='eval')
+    except SyntaxError as e:
+        raise UnsupportedExpression(f"Not a single expression: {e.msg}") from None
+    return _eval_node(tree)
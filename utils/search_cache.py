@@ -0,0 +1,188 @@
+"""Persistent SQLite cache for web search results.
+
+Results are keyed by a hash of (backend, normalized query, max_results) so
+repeated agent runs skip the network round trip entirely.  Entries expire
+after a TTL and the table is kept under ``max_entries`` by evicting the least
+recently used rows.
+
+Modes (``SEARCH_CACHE_MODE`` env var or the ``mode`` argument):
+    readwrite   serve fresh hits, search and store on a miss (default)
+    cache-only  never touch the network; serve any stored entry, even expired
+    off         bypass the cache completely
+"""
+
+import functools
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'search_cache.sqlite'
+)
+MODES = ('readwrite', 'cache-only', 'off')
+
+
+def normalize_query(query):
+    """Lowercase and collapse whitespace so trivially different queries share a key."""
+    return re.sub(r'\s+', ' ', query).strip().lower()
+
+
+def cache_key(backend, query, max_results=None):
+    payload = json.dumps([backend, normalize_query(query), max_results])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class SearchCache:
+    """Size-bounded LRU cache of search results stored in SQLite.
+
+    Args:
+        path: SQLite file location (created on first use).
+        ttl: Seconds an entry stays fresh. ``None`` disables expiry.
+        max_entries: Upper bound on stored entries; least recently used
+            entries are evicted beyond it.
+        mode: One of MODES.
+    """
+
+    def __init__(self, path=None, ttl=7 * 24 * 3600, max_entries=10000, mode=None):
+        self.path = path or os.getenv('SEARCH_CACHE_PATH', DEFAULT_PATH)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.mode = mode or os.getenv('SEARCH_CACHE_MODE', 'readwrite')
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown search cache mode {self.mode!r}, expected one of {MODES}")
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY,"
+                " backend TEXT NOT NULL,"
+                " query TEXT NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " created REAL NOT NULL,"
+                " accessed REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results(accessed)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, backend, query, max_results=None):
+        """Return cached results or ``None`` on a miss."""
+        if self.mode == 'off':
+            return None
+        key = cache_key(backend, query, max_results)
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT payload, created FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+            payload, created = row
+            expired = self.ttl is not None and time.time() - created > self.ttl
+            if expired and self.mode != 'cache-only':
+                self.stats['stale'] += 1
+                self.stats['misses'] += 1
+                return None
+            conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+            self.stats['hits'] += 1
+        return json.loads(payload)
+
+    def put(self, backend, query, results, max_results=None):
+        if self.mode != 'readwrite':
+            return
+        key = cache_key(backend, query, max_results)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, backend, query, payload, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, backend, normalize_query(query), json.dumps(results), now, now),
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn):
+        """Drop least recently used rows beyond max_entries. Caller holds the lock."""
+        if self.max_entries is None:
+            return
+        (count,) = conn.execute("SELECT COUNT(*) FROM results").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM results WHERE key IN"
+                " (SELECT key FROM results ORDER BY accessed ASC LIMIT ?)",
+                (excess,),
+            )
+            self.stats['evictions'] += excess
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM results")
+            conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            (count,) = self._connect().execute("SELECT COUNT(*) FROM results").fetchone()
+        return count
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def cached(self, backend, max_results=None):
+        """Decorator caching a ``search(query, ...) -> list`` function under ``backend``.
+
+        ``backend`` should name what actually answers the query (e.g.
+        ``HedgedSearch.cache_name``) and ``max_results`` the result count the
+        function asks for, so differently configured searches get separate
+        entries.  A ``max_results`` keyword passed to the call overrides it.
+
+        Empty result lists are treated as failures and are not stored.  In
+        cache-only mode a miss returns ``[]`` without calling the function.
+        """
+        default_max_results = max_results
+
+        def decorator(search_fn):
+            @functools.wraps(search_fn)
+            def wrapper(query, *args, **kwargs):
+                max_results = kwargs.get('max_results', default_max_results)
+                hit = self.get(backend, query, max_results)
+                if hit is not None:
+                    return hit
+                if self.mode == 'cache-only':
+                    return []
+                results = search_fn(query, *args, **kwargs)
+                if results:
+                    self.put(backend, query, results, max_results)
+                return results
+            return wrapper
+        return decorator
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """Process-wide cache shared by the agents in dspy_examples/."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = SearchCache()
+    return _default_cache
@@ -0,0 +1,191 @@
+"""Local HTTP stand-in for the SearXNG JSON API and the DuckDuckGo HTML page.
+
+Lets the agents' retrieval path be benchmarked and load-tested without
+network access.  Results are generated deterministically from the query (or
+looked up in a JSON corpus of ``{"query": ["snippet", ...]}``), and every
+request can be delayed and/or failed on purpose.
+
+Serve it and point the agents at it:
+    python utils/search_standin.py --port 8999 --latency 0.05 --failure-rate 0.1
+    SEARCH_BACKENDS=searx,ddg_html SEARCH_SEARX_URL=http://127.0.0.1:8999 \\
+        SEARCH_DDG_HTML_URL=http://127.0.0.1:8999 python dspy_examples/web_search_agent.py
+
+Or run the built-in load test against an in-process server:
+    python utils/search_standin.py --load-test --queries 500 --concurrency 16
+"""
+
+import html
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class StandinConfig:
+    """Behaviour knobs shared by all request handlers of one server."""
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, num_results=5,
+                 corpus=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.num_results = num_results
+        self.corpus = corpus or {}
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+
+    def results_for(self, query):
+        if query in self.corpus:
+            return list(self.corpus[query])
+        return [f"Stand-in result {i + 1} for '{query}'." for i in range(self.num_results)]
+
+    def roll(self):
+        """Return (delay, should_fail) for one request."""
+        with self.lock:
+            self.requests += 1
+            delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+            fail = self.rng.random() < self.failure_rate
+            if fail:
+                self.failures += 1
+        return delay, fail
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    config = StandinConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, content_type, body):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query).get('q', [''])[0]
+        delay, fail = self.config.roll()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            self._send(503, 'text/plain', 'injected failure')
+            return
+
+        results = self.config.results_for(query)
+        if url.path == '/search':
+            payload = {
+                'query': query,
+                'results': [
+                    {'title': f"Result {i + 1}", 'url': f"http://standin.local/{i + 1}", 'content': text}
+                    for i, text in enumerate(results)
+                ],
+            }
+            self._send(200, 'application/json', json.dumps(payload))
+        elif url.path.rstrip('/') == '/html':
+            rows = ''.join(
+                f'<div class="result"><a class="result__snippet" href="http://standin.local/{i + 1}">'
+                f'{html.escape(text)}</a></div>\n'
+                for i, text in enumerate(results)
+            )
+            self._send(200, 'text/html', f"<html><body>\n{rows}</body></html>")
+        else:
+            self._send(404, 'text/plain', 'not found')
+
+
+def start_server(host='127.0.0.1', port=0, **config_kwargs):
+    """Start a stand-in server on a background thread and return it.
+
+    ``port=0`` picks a free port; read it back from ``server.server_address``.
+    Call ``server.shutdown()`` when done.
+    """
+    handler = type('ConfiguredStandinHandler', (StandinHandler,),
+                   {'config': StandinConfig(**config_kwargs)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.config = handler.config
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def load_test(queries=200, concurrency=8, hedge_delay=0.05, **config_kwargs):
+    """Drive HedgedSearch over the stand-in backends and report latency and throughput."""
+    from concurrent.futures import ThreadPoolExecutor
+    from utils.web_search import HedgedSearch, SearxBackend, DDGHtmlBackend
+
+    server = start_server(**config_kwargs)
+    base_url = "http://%s:%d" % server.server_address
+    engine = HedgedSearch(
+        backends={'searx': SearxBackend(base_url), 'ddg_html': DDGHtmlBackend(base_url)},
+        hedge_delay=hedge_delay,
+        timeout=5,
+    )
+
+    def one(i):
+        start = time.perf_counter()
+        results = engine.search(f"query {i}", max_results=3)
+        return time.perf_counter() - start, bool(results)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(one, range(queries)))
+    wall = time.perf_counter() - start
+    engine.close()
+    server.shutdown()
+
+    latencies = sorted(latency for latency, _ in outcomes)
+    ok = sum(1 for _, good in outcomes if good)
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+    print(f"{queries} queries, concurrency {concurrency}: {queries / wall:.1f} queries/s, "
+          f"{ok}/{queries} answered")
+    print(f"  latency p50 {pct(50):.1f} ms  p95 {pct(95):.1f} ms  p99 {pct(99):.1f} ms")
+    print(f"  server: {server.config.requests} requests, {server.config.failures} injected failures")
+    print(f"  backends: {engine.stats_report()}")
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import sys
+
+    parser = argparse.ArgumentParser(description="Local stand-in for SearXNG / DuckDuckGo HTML search.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8999)
+    parser.add_argument("--latency", type=float, default=0.0, help="Base delay per request in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform +/- jitter added to the delay")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--num-results", type=int, default=5)
+    parser.add_argument("--corpus", help="JSON file mapping query -> list of snippets")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--load-test", action="store_true", help="Run a load test instead of serving")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    corpus = None
+    if args.corpus:
+        with open(args.corpus, 'r', encoding='utf-8') as f:
+            corpus = json.load(f)
+    config = dict(latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate,
+                  num_results=args.num_results, corpus=corpus, seed=args.seed)
+
+    if args.load_test:
+        sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+        load_test(queries=args.queries, concurrency=args.concurrency, **config)
+    else:
+        server = start_server(args.host, args.port, **config)
+        print(f"Search stand-in listening on http://{args.host}:{server.server_address[1]}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.shutdown()
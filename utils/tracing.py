@@ -0,0 +1,317 @@
+"""Span-tree tracing for DSPy programs.
+
+TracingCallback records a span for every module, LM, adapter and tool call:
+start/end timestamps, parent span, thread, LM token usage, exceptions and any
+attributes attached with ``annotate()`` while the span is open.  The spans can
+be exported as Chrome trace-event JSON (open in chrome://tracing or
+https://ui.perfetto.dev) or summarized as a per-call latency histogram.
+
+    tracer = TracingCallback()
+    dspy.configure(callbacks=[tracer])
+    ...
+    tracer.write_chrome_trace("trace.json")
+    print(tracer.latency_report())
+
+Only the most recent ``max_spans`` finished spans are kept (``TRACE_MAX_SPANS``,
+default 50000), so long ``--batch`` runs stay in bounded memory.  Older spans
+are folded into per-call totals: counts, errors, total/mean/max latency,
+histogram and tokens stay exact, while p50/p95 and the Chrome trace cover the
+spans still kept.
+"""
+
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+
+from dspy.utils.callback import BaseCallback
+
+# Histogram bucket upper bounds in seconds.
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, float('inf'))
+
+_stack = contextvars.ContextVar('dspy_trace_stack', default=())
+
+
+class Span:
+    __slots__ = ('span_id', 'parent_id', 'kind', 'name', 'start', 'end', 'thread',
+                 'attributes', 'error')
+
+    def __init__(self, span_id, parent_id, kind, name):
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.kind = kind
+        self.name = name
+        self.start = time.perf_counter()
+        self.end = None
+        self.thread = threading.get_ident()
+        self.attributes = {}
+        self.error = None
+
+    @property
+    def duration(self):
+        return None if self.end is None else self.end - self.start
+
+    def as_dict(self):
+        return {
+            'id': self.span_id, 'parent': self.parent_id, 'kind': self.kind, 'name': self.name,
+            'start': self.start, 'duration': self.duration, 'thread': self.thread,
+            'attributes': self.attributes, 'error': self.error,
+        }
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(pct / 100 * len(sorted_values)))]
+
+
+def _histogram_percentile(histogram, pct, maximum):
+    """Upper bound of the bucket holding the ``pct`` percentile (capped at ``maximum``)."""
+    rank = int(pct / 100 * sum(histogram))
+    seen = 0
+    for bound, n in zip(BUCKETS, histogram):
+        seen += n
+        if seen > rank:
+            return min(bound, maximum)
+    return maximum
+
+
+def _new_totals():
+    return {'count': 0, 'errors': 0, 'total': 0.0, 'max': 0.0, 'histogram': [0] * len(BUCKETS),
+            'prompt_tokens': 0, 'completion_tokens': 0}
+
+
+def _add_to_totals(totals, span):
+    duration = span.duration
+    totals['count'] += 1
+    totals['errors'] += 1 if span.error else 0
+    totals['total'] += duration
+    totals['max'] = max(totals['max'], duration)
+    totals['histogram'][next(i for i, bound in enumerate(BUCKETS) if duration <= bound)] += 1
+    totals['prompt_tokens'] += span.attributes.get('prompt_tokens') or 0
+    totals['completion_tokens'] += span.attributes.get('completion_tokens') or 0
+
+
+class TracingCallback(BaseCallback):
+    """Collect a span tree of all DSPy calls made while it is a configured callback.
+
+    Args:
+        verbose: Print a one-line summary whenever a span ends.
+        max_spans: Finished spans kept in ``spans`` (default: ``TRACE_MAX_SPANS``
+            or 50000); older ones only count towards ``latency_stats``.
+    """
+
+    def __init__(self, verbose=False, max_spans=None):
+        self.verbose = verbose
+        self.max_spans = max_spans or int(os.getenv('TRACE_MAX_SPANS', '50000'))
+        self.spans = []
+        self.dropped_spans = 0
+        self._finished = 0
+        self._folded = {}
+        self._open = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+
+    # -- span bookkeeping -------------------------------------------------
+
+    def _start(self, call_id, kind, name, **attributes):
+        stack = _stack.get()
+        span = Span(next(self._ids), stack[-1].span_id if stack else None, kind, name)
+        span.attributes.update(attributes)
+        with self._lock:
+            self._open[call_id] = span
+            self.spans.append(span)
+        _stack.set(stack + (span,))
+        return span
+
+    def _end(self, call_id, exception):
+        with self._lock:
+            span = self._open.pop(call_id, None)
+        if span is None:
+            return None
+        span.end = time.perf_counter()
+        if exception is not None:
+            span.error = f"{type(exception).__name__}: {exception}"
+        with self._lock:
+            self._finished += 1
+            # Trim in steps of a tenth, so the copy is amortized over many spans.
+            if self._finished > self.max_spans + self.max_spans // 10:
+                self._drop_oldest(self._finished - self.max_spans)
+        stack = _stack.get()
+        if span in stack:
+            # Usually the innermost span; one that closes out of order is removed
+            # too, so later spans do not get it as their parent.
+            _stack.set(tuple(s for s in stack if s is not span))
+        if self.verbose:
+            status = f" ERROR {span.error}" if span.error else ""
+            extra = ''.join(f" {k}={v}" for k, v in span.attributes.items() if k != 'inputs')
+            depth = len(_stack.get())
+            print(f"{'  ' * depth}[{span.kind}] {span.name} {span.duration * 1000:.1f} ms{extra}{status}")
+        return span
+
+    def _drop_oldest(self, n):
+        """Fold the ``n`` oldest finished spans into the totals. Caller holds the lock."""
+        kept = []
+        for span in self.spans:
+            if n and span.end is not None:
+                _add_to_totals(self._folded.setdefault((span.kind, span.name), _new_totals()), span)
+                n -= 1
+                self._finished -= 1
+                self.dropped_spans += 1
+            else:
+                kept.append(span)
+        self.spans = kept
+
+    def annotate(self, **attributes):
+        """Attach attributes to the innermost open span of the current thread/task."""
+        stack = _stack.get()
+        if stack:
+            stack[-1].attributes.update(attributes)
+
+    # -- dspy callback hooks -------------------------------------------------
+
+    def on_module_start(self, call_id, instance, inputs):
+        self._start(call_id, 'module', type(instance).__name__)
+
+    def on_module_end(self, call_id, outputs, exception=None):
+        self._end(call_id, exception)
+
+    def on_lm_start(self, call_id, instance, inputs):
+        span = self._start(call_id, 'lm', getattr(instance, 'model', type(instance).__name__))
+        span.attributes['_lm'] = instance
+        span.attributes['_messages'] = inputs.get('messages')
+
+    def on_lm_end(self, call_id, outputs, exception=None):
+        with self._lock:
+            span = self._open.get(call_id)
+        if span is not None:
+            lm = span.attributes.pop('_lm', None)
+            messages = span.attributes.pop('_messages', None)
+            usage = self._find_usage(lm, messages)
+            if usage:
+                span.attributes['prompt_tokens'] = usage.get('prompt_tokens')
+                span.attributes['completion_tokens'] = usage.get('completion_tokens')
+        self._end(call_id, exception)
+
+    @staticmethod
+    def _find_usage(lm, messages):
+        """Token usage of the history entry for this call (searched from the newest)."""
+        history = getattr(lm, 'history', None) or []
+        for entry in reversed(history[-32:]):
+            if messages is None or entry.get('messages') is messages or entry.get('messages') == messages:
+                return dict(entry.get('usage') or {})
+        return None
+
+    def on_adapter_format_start(self, call_id, instance, inputs):
+        self._start(call_id, 'adapter', f"{type(instance).__name__}.format")
+
+    def on_adapter_format_end(self, call_id, outputs, exception=None):
+        self._end(call_id, exception)
+
+    def on_adapter_parse_start(self, call_id, instance, inputs):
+        self._start(call_id, 'adapter', f"{type(instance).__name__}.parse")
+
+    def on_adapter_parse_end(self, call_id, outputs, exception=None):
+        self._end(call_id, exception)
+
+    def on_tool_start(self, call_id, instance, inputs):
+        self._start(call_id, 'tool', getattr(instance, 'name', type(instance).__name__))
+
+    def on_tool_end(self, call_id, outputs, exception=None):
+        self._end(call_id, exception)
+
+    def on_interpreter_startup_start(self, call_id, instance, inputs):
+        self._start(call_id, 'sandbox', 'startup')
+
+    def on_interpreter_startup_end(self, call_id, outputs, exception=None):
+        self._end(call_id, exception)
+
+    def on_interpreter_execute_start(self, call_id, instance, inputs):
+        self._start(call_id, 'sandbox', 'execute')
+
+    def on_interpreter_execute_end(self, call_id, outputs, exception=None):
+        self._end(call_id, exception)
+
+    # -- exports ---------------------------------------------------------
+
+    def chrome_trace(self):
+        """Spans as a Chrome trace-event JSON object (complete 'X' events, microseconds)."""
+        events = []
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            end = span.end if span.end is not None else time.perf_counter()
+            args = {k: v for k, v in span.attributes.items() if not k.startswith('_')}
+            args['span_id'] = span.span_id
+            args['parent_id'] = span.parent_id
+            if span.error:
+                args['error'] = span.error
+            events.append({
+                'name': span.name,
+                'cat': span.kind,
+                'ph': 'X',
+                'ts': round((span.start - self._t0) * 1e6, 3),
+                'dur': round((end - span.start) * 1e6, 3),
+                'pid': pid,
+                'tid': span.thread,
+                'args': args,
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f, default=str)
+
+    def latency_stats(self):
+        """{(kind, name): {count, errors, total, mean, p50, p95, max, histogram, tokens}}."""
+        groups = {}
+        with self._lock:
+            spans = [s for s in self.spans if s.end is not None]
+            folded = {key: dict(totals, histogram=list(totals['histogram']))
+                      for key, totals in self._folded.items()}
+        for span in spans:
+            groups.setdefault((span.kind, span.name), []).append(span)
+        stats = {}
+        for key in groups.keys() | folded.keys():
+            totals = folded.get(key) or _new_totals()
+            for span in groups.get(key, ()):
+                _add_to_totals(totals, span)
+            durations = sorted(s.duration for s in groups.get(key, ()))
+            if durations:
+                p50, p95 = _percentile(durations, 50), _percentile(durations, 95)
+            else:
+                # Every span of this kind was folded: estimate from the histogram.
+                p50 = _histogram_percentile(totals['histogram'], 50, totals['max'])
+                p95 = _histogram_percentile(totals['histogram'], 95, totals['max'])
+            stats[key] = dict(totals, mean=totals['total'] / totals['count'], p50=p50, p95=p95)
+        return stats
+
+    def latency_report(self):
+        """Human-readable latency table plus a histogram row per call type."""
+        stats = self.latency_stats()
+        labels = [('<=' + (f"{b * 1000:g}ms" if b < 1 else f"{b:g}s")) if b != float('inf') else '>60s'
+                  for b in BUCKETS]
+        lines = [f"{'kind':8} {'name':32} {'count':>6} {'err':>4} {'total s':>9} "
+                 f"{'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'tokens in/out':>15}"]
+        for (kind, name), s in sorted(stats.items(), key=lambda kv: -kv[1]['total']):
+            tokens = f"{s['prompt_tokens']}/{s['completion_tokens']}" if kind == 'lm' else ''
+            lines.append(f"{kind:8} {name[:32]:32} {s['count']:6d} {s['errors']:4d} {s['total']:9.3f} "
+                         f"{s['mean'] * 1000:9.1f} {s['p50'] * 1000:9.1f} {s['p95'] * 1000:9.1f} "
+                         f"{s['max'] * 1000:9.1f} {tokens:>15}")
+            buckets = '  '.join(f"{label}:{n}" for label, n in zip(labels, s['histogram']) if n)
+            lines.append(f"{'':8} {'':32} histogram {buckets}")
+        return '\n'.join(lines)
+
+    def clear(self):
+        with self._lock:
+            self.spans = []
+            self._open = {}
+            self._folded = {}
+            self._finished = 0
+            self.dropped_spans = 0
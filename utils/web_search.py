@@ -0,0 +1,321 @@
+"""Web search backends, a backend registry and a hedged, concurrent search engine.
+
+Backends implement SearchBackend.search(query, max_results, timeout) and are
+registered by name, so the agents can pick them with the ``SEARCH_BACKENDS``
+env var (comma-separated, in preferred order).  The HTTP backends share pooled
+``requests.Session`` connections and take a base URL, which lets them point at
+the local stand-in in utils/search_standin.py instead of the real services
+(``SEARCH_SEARX_URL`` / ``SEARCH_DDG_HTML_URL``).
+
+Instead of trying the backends one after the other (worst case: the sum of all
+timeouts), HedgedSearch starts the fastest-ranked backend first, launches the
+next one whenever ``hedge_delay`` passes without a usable answer, and returns
+as soon as one backend succeeds.  With ``merge=True`` it instead waits for
+every backend (up to ``timeout``) and merges their results with duplicates
+removed.
+
+Per-backend latency and success counts are kept in ``engine.stats`` and used
+to rank the launch order of later searches.
+"""
+
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import quote
+
+SEARX_URL = "https://searx.be"
+DDG_HTML_URL = "https://html.duckduckgo.com"
+USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(pool_size=16):
+    """Process-wide ``requests.Session`` with a connection pool sized for ``pool_size`` threads."""
+    with _sessions_lock:
+        session = _sessions.get(pool_size)
+        if session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['User-Agent'] = USER_AGENT
+            _sessions[pool_size] = session
+        return session
+
+
+class SearchBackend:
+    """Interface for a search backend returning a list of text snippets."""
+
+    name = None
+
+    def search(self, query, max_results=5, timeout=10):
+        raise NotImplementedError
+
+    def __call__(self, query, max_results=5, timeout=10):
+        return self.search(query, max_results=max_results, timeout=timeout)
+
+
+class DDGSBackend(SearchBackend):
+    """Search through the ddgs library."""
+
+    name = 'ddgs'
+
+    def search(self, query, max_results=5, timeout=10):
+        from ddgs import DDGS
+        results = []
+        with DDGS(timeout=timeout) as ddgs:
+            for result in ddgs.text(query, max_results=max_results):
+                # The ddgs library typically returns 'body' for text results
+                text_content = (result.get('body') or result.get('text') or
+                                result.get('snippet') or result.get('description') or
+                                str(result))
+                if text_content and text_content.strip():
+                    results.append(text_content.strip())
+        return results
+
+
+class SearxBackend(SearchBackend):
+    """Search a SearXNG instance through its JSON API."""
+
+    name = 'searx'
+
+    def __init__(self, base_url=None, session=None):
+        self.base_url = (base_url or os.getenv('SEARCH_SEARX_URL', SEARX_URL)).rstrip('/')
+        self.session = session
+
+    def search(self, query, max_results=5, timeout=10):
+        params = {
+            'q': query,
+            'format': 'json',
+            'engines': 'google,bing,duckduckgo'
+        }
+        session = self.session or get_session()
+        response = session.get(f"{self.base_url}/search", params=params, timeout=timeout)
+        response.raise_for_status()
+        results = []
+        for result in response.json().get('results', [])[:max_results]:
+            if 'content' in result:
+                results.append(result['content'])
+            elif 'snippet' in result:
+                results.append(result['snippet'])
+        return results
+
+
+class DDGHtmlBackend(SearchBackend):
+    """Scrape result snippets from the DuckDuckGo HTML page."""
+
+    name = 'ddg_html'
+
+    def __init__(self, base_url=None, session=None):
+        self.base_url = (base_url or os.getenv('SEARCH_DDG_HTML_URL', DDG_HTML_URL)).rstrip('/')
+        self.session = session
+
+    def search(self, query, max_results=5, timeout=10):
+        session = self.session or get_session()
+        response = session.get(f"{self.base_url}/html/?q={quote(query)}", timeout=timeout)
+        response.raise_for_status()
+        snippets = re.findall(r'result__snippet[^>]*>([^<]+)', response.text)
+        return snippets[:max_results]
+
+
+BACKEND_REGISTRY = {}
+
+
+def register_backend(name, factory):
+    """Register ``factory(**kwargs) -> SearchBackend`` under ``name``."""
+    BACKEND_REGISTRY[name] = factory
+
+
+def create_backend(name, **kwargs):
+    try:
+        factory = BACKEND_REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"Unknown search backend {name!r}, registered: {sorted(BACKEND_REGISTRY)}") from None
+    return factory(**kwargs)
+
+
+def build_backends(names=None):
+    """Instantiate backends by name, defaulting to ``SEARCH_BACKENDS`` or all registered ones."""
+    if names is None:
+        env = os.getenv('SEARCH_BACKENDS')
+        names = [n.strip() for n in env.split(',') if n.strip()] if env else list(BACKEND_REGISTRY)
+    return {name: create_backend(name) for name in names}
+
+
+register_backend(DDGSBackend.name, DDGSBackend)
+register_backend(SearxBackend.name, SearxBackend)
+register_backend(DDGHtmlBackend.name, DDGHtmlBackend)
+
+
+def dedup(texts):
+    """Drop repeated snippets (compared case- and whitespace-insensitively), keeping order."""
+    seen = set()
+    unique = []
+    for text in texts:
+        key = re.sub(r'\s+', ' ', text).strip().lower()
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(text)
+    return unique
+
+
+class BackendStats:
+    """Running latency and outcome counters for one backend."""
+
+    def __init__(self, alpha=0.3):
+        self.alpha = alpha
+        self.ewma_latency = None   # successful calls only
+        self.last_latency = None
+        self.successes = 0
+        self.failures = 0
+        self.last_error = None
+
+    def record(self, latency, ok, error=None):
+        self.last_latency = latency
+        if ok:
+            self.successes += 1
+            if self.ewma_latency is None:
+                self.ewma_latency = latency
+            else:
+                self.ewma_latency = self.alpha * latency + (1 - self.alpha) * self.ewma_latency
+        else:
+            self.failures += 1
+            self.last_error = error
+
+    def score(self, default_latency):
+        """Expected seconds to a good answer; lower ranks earlier."""
+        latency = default_latency if self.ewma_latency is None else self.ewma_latency
+        total = self.successes + self.failures
+        success_rate = (self.successes + 1) / (total + 2)  # Laplace smoothing
+        return latency / success_rate
+
+    def as_dict(self):
+        return {
+            'ewma_latency': self.ewma_latency,
+            'last_latency': self.last_latency,
+            'successes': self.successes,
+            'failures': self.failures,
+            'last_error': self.last_error,
+        }
+
+
+class HedgedSearch:
+    """Fan a query out across several backends concurrently.
+
+    Args:
+        backends: Mapping of name -> SearchBackend (or any
+            ``search(query, max_results, timeout)`` callable), in preferred
+            order for backends without stats yet. Defaults to build_backends().
+        hedge_delay: Seconds to wait for the running backends before starting
+            the next one. ``0`` fires all backends at once.
+        timeout: Per-backend timeout and overall deadline in seconds.
+        merge: Wait for all backends and merge their results instead of
+            returning the first good answer.
+        max_workers: Threads shared by all concurrent searches on this engine.
+    """
+
+    def __init__(self, backends=None, hedge_delay=0.5, timeout=10, merge=False, max_workers=32):
+        self.backends = dict(backends or build_backends())
+        self.hedge_delay = hedge_delay
+        self.timeout = timeout
+        self.merge = merge
+        self.stats = {name: BackendStats() for name in self.backends}
+        self._lock = threading.Lock()
+        # Shared pool so stragglers finish in the background instead of
+        # blocking the caller that already has an answer.
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='search')
+
+    def ranked_backends(self):
+        """Backend names ordered by expected time to a successful answer."""
+        order = list(self.backends)
+        with self._lock:
+            return sorted(order, key=lambda n: (self.stats[n].score(self.timeout), order.index(n)))
+
+    def _run_backend(self, name, query, max_results):
+        start = time.perf_counter()
+        try:
+            results = self.backends[name](query, max_results=max_results, timeout=self.timeout)
+            error = None
+        except Exception as e:
+            results, error = [], f"{type(e).__name__}: {e}"
+        latency = time.perf_counter() - start
+        with self._lock:
+            self.stats[name].record(latency, bool(results), error)
+        return name, results
+
+    def search(self, query, max_results=5):
+        pending_names = self.ranked_backends()
+        deadline = time.monotonic() + self.timeout
+        running = set()
+        collected = {}
+
+        def launch_next():
+            name = pending_names.pop(0)
+            running.add(self._executor.submit(self._run_backend, name, query, max_results))
+
+        launch_next()
+        while running:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if pending_names and not self.merge and self.hedge_delay > 0:
+                wait_for = min(self.hedge_delay, deadline - now)
+            elif pending_names:
+                # Merge mode or no hedging: everything goes out immediately.
+                while pending_names:
+                    launch_next()
+                wait_for = deadline - now
+            else:
+                wait_for = deadline - now
+
+            done, running = wait(running, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, results = future.result()
+                collected[name] = results
+                if results and not self.merge:
+                    for straggler in running:
+                        straggler.cancel()
+                    return results[:max_results]
+            if pending_names and (not done or not any(collected.values())):
+                # Hedge: nothing usable yet, bring in the next backend.
+                launch_next()
+
+        for straggler in running:
+            straggler.cancel()
+        if not self.merge:
+            return []
+        ordered = [collected[name] for name in self.backends if name in collected]
+        return dedup(text for results in ordered for text in results)[:max_results]
+
+    @property
+    def cache_name(self):
+        """Identifies the backend set (names, URLs, merge mode) for the search cache key."""
+        parts = []
+        for name, backend in self.backends.items():
+            base_url = getattr(backend, 'base_url', None)
+            parts.append(f"{name}@{base_url}" if base_url else name)
+        return '+'.join(parts) + (' merged' if self.merge else '')
+
+    def stats_report(self):
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in self.stats.items()}
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def build_engine_from_env():
+    """HedgedSearch configured from SEARCH_BACKENDS, SEARCH_HEDGE_DELAY and SEARCH_MERGE."""
+    return HedgedSearch(
+        hedge_delay=float(os.getenv("SEARCH_HEDGE_DELAY", "0.5")),
+        merge=os.getenv("SEARCH_MERGE") == "1",
+    )
@@ -8,8 +8,8 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from utils.response_saver import save_response
 
 # Configure
-lm = dspy.LM('ollama/gemma3:1b', api_base='http://localhost:11434')
-dspy.configure(lm=lm)
+from utils.lm_config import configure_lm
+lm = configure_lm()  # built on first use; OLLAMA_MODEL_NAME / OLLAMA_API_BASE override
 
 class BasicQA(dspy.Signature):
     """Answer questions with short factoid answers."""
@@ -5,9 +5,11 @@ import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from utils.response_saver import save_response
+from utils.bulk_classify import add_bulk_arguments, bulk_main
 
-lm = dspy.LM('ollama/gemma3:1b', api_base='http://localhost:11434')
-dspy.configure(lm=lm)
+# Configure
+from utils.lm_config import configure_lm
+lm = configure_lm()  # built on first use; OLLAMA_MODEL_NAME / OLLAMA_API_BASE override
 
 class IntentClassifier(dspy.Signature):
     """Classify the user's intent into one of the allowed categories."""
@@ -30,6 +32,27 @@ def main():
 
     save_response(lm, response_path)
 
+# Seed submissions for --bench (expanded into noisy, duplicate-heavy synthetic data)
+BENCH_SUBMISSIONS = [
+    "The app crashes when I upload a photo.",
+    "Login fails with an error message.",
+    "Can you add a dark mode?",
+    "Please support exporting reports to CSV.",
+    "How do I change my email address?",
+    "Where can I download my invoices?",
+    "Thanks for the quick reply yesterday.",
+    "The search results never load.",
+    "It would be great to have keyboard shortcuts.",
+    "Is there a student discount?",
+]
+
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="Intent classification, for one submission or a whole file.")
+    add_bulk_arguments(parser)
+    args = parser.parse_args()
+    if args.bulk or args.bench:
+        bulk_main(dspy.Predict(IntentClassifier), 'submission', 'intent', args, seeds=BENCH_SUBMISSIONS)
+    else:
+        main()
@@ -6,8 +6,8 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from utils.response_saver import save_response
 
-lm = dspy.LM('ollama/gemma3:1b', api_base='http://localhost:11434')
-dspy.configure(lm=lm)
+from utils.lm_config import configure_lm
+lm = configure_lm()  # built on first use; OLLAMA_MODEL_NAME / OLLAMA_API_BASE override
 
 class ContextualQA(dspy.Signature):
     """Answer questions based ONLY on the provided context."""
@@ -28,6 +28,11 @@ def main():
     ]
     
     question = "Who is the lead developer of Phoenix?"
+
+    # RETRIEVAL_INDEX=<dir> replaces the simulated results with a local BM25/vector index
+    if os.getenv("RETRIEVAL_INDEX"):
+        from utils.retrieval import open_index
+        retrieved_context = open_index(os.environ["RETRIEVAL_INDEX"]).retrieve(question, k=3)
     
     print(f"Context: {retrieved_context}")
     print(f"Question: {question}")
@@ -6,17 +6,18 @@ import os
 # Add parent dir to path to import utils
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from utils.response_saver import save_response
+from utils.bulk_classify import add_bulk_arguments, bulk_main
 
 # Configure
-lm = dspy.LM('ollama/gemma3:1b', api_base='http://localhost:11434')
-dspy.configure(lm=lm)
+from utils.lm_config import configure_lm
+lm = configure_lm()  # built on first use; OLLAMA_MODEL_NAME / OLLAMA_API_BASE override
 
 class SentimentAnalysis(dspy.Signature):
     """Classify the sentiment of the given text."""
     text = dspy.InputField()
     sentiment = dspy.OutputField(desc="one of: positive, negative, neutral")
 
-def main():
+def main(bulk_args=None):
     # Define predictor
     classify = dspy.Predict(SentimentAnalysis)
 
@@ -39,6 +40,10 @@ def main():
     # Attach demonstrations to the predictor
     classify.demos = demos
 
+    # --bulk FILE / --bench N: run the same few-shot predictor over many texts
+    if bulk_args:
+        return bulk_main(classify, 'text', 'sentiment', bulk_args, seeds=BENCH_TEXTS)
+
     # Run on a new example
     text = "This product works okay but nothing special about it."
     print(f"Text: {text}")
@@ -52,7 +57,26 @@ def main():
     html_path = os.path.join(os.path.dirname(__file__), 'responses/08_viz.html')
 
     save_response(lm, response_path)
+    return classify
+
+# Seed texts for --bench (expanded into noisy, duplicate-heavy synthetic data)
+BENCH_TEXTS = [
+    "I love how easy this was to set up.",
+    "Worst purchase I have made this year.",
+    "The package was delivered on Monday.",
+    "The staff were friendly and helpful.",
+    "It broke after two days of use.",
+    "The store opens at nine.",
+    "Absolutely brilliant service, thank you.",
+    "I want a refund, this is useless.",
+    "The manual has twelve pages.",
+    "Pretty good value for the price.",
+]
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="Few-shot sentiment classification, for one text or a whole file.")
+    add_bulk_arguments(parser)
+    args = parser.parse_args()
+    main(bulk_args=args if args.bulk or args.bench else None)
@@ -7,10 +7,11 @@ from typing import List
 # Add parent dir to path to import utils
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from utils.response_saver import save_response
+from utils.batch_extract import add_extract_arguments, run_extraction
 
 # Configure
-lm = dspy.LM('ollama/gemma3:1b', api_base='http://localhost:11434')
-dspy.configure(lm=lm)
+from utils.lm_config import configure_lm
+lm = configure_lm()  # built on first use; OLLAMA_MODEL_NAME / OLLAMA_API_BASE override
 
 class ExtractMovie(dspy.Signature):
     """Extract structured movie information from the given text."""
@@ -49,6 +50,20 @@ def main():
 
     save_response(lm, response_path)
 
+def batch_main(args):
+    # Same extractor over a whole corpus: worker pool, typed-field validation, JSONL/Parquet output
+    output = args.output or os.path.splitext(args.batch)[0] + '.out.jsonl'
+    summary = run_extraction(dspy.Predict(ExtractMovie), args.batch, output, workers=args.workers,
+                             max_in_flight=args.max_in_flight, resume=not args.no_resume)
+    print(f"Batch complete: {summary} -> {output}")
+
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="Typed movie extraction, for one text or a whole file.")
+    add_extract_arguments(parser)
+    args = parser.parse_args()
+    if args.batch:
+        batch_main(args)
+    else:
+        main()
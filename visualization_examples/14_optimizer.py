@@ -6,10 +6,12 @@ import os
 # Add parent dir to path to import utils
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from utils.response_saver import save_response
+from utils.artifacts import compile_or_load
+from utils.budget import compile_within_budget
 
 # Configure
-lm = dspy.LM('ollama/gemma3:1b', api_base='http://localhost:11434')
-dspy.configure(lm=lm)
+from utils.lm_config import configure_lm
+lm = configure_lm()  # built on first use; OLLAMA_MODEL_NAME / OLLAMA_API_BASE override
 
 class BasicQA(dspy.Signature):
     """Answer questions with short factoid answers."""
@@ -31,7 +33,7 @@ def answer_match(example, prediction, trace=None):
     predicted = prediction.answer.lower().strip()
     return expected in predicted or predicted in expected
 
-def main():
+def main(evaluate=False):
     # Training set: examples with known answers
     trainset = [
         dspy.Example(question="What is the capital of France?", answer="Paris").with_inputs("question"),
@@ -53,10 +55,16 @@ def main():
         max_rounds=1,
     )
 
-    # Compile (optimize) the module
+    # Compile (optimize) the module within the LM_BUDGET_* caps; compiled programs
+    # are stored under .cache/programs/ by content hash and reloaded on later runs
     print("Optimizing with BootstrapFewShot...")
-    optimized_qa = optimizer.compile(qa_module, trainset=trainset)
-    print("Optimization complete.")
+    optimized_qa, artifact = compile_or_load(
+        optimizer,
+        qa_module,
+        trainset=trainset,
+        compile=compile_within_budget,
+    )
+    print(artifact['status'])
 
     # Test the optimized module on a new question
     question = "What is the capital of Australia?"
@@ -65,13 +73,28 @@ def main():
     response = optimized_qa(question=question)
     print(f"Answer: {response.answer}")
 
+    if evaluate:
+        # Compare baseline and optimized programs on a held-out dev set (parallel, retried, cached)
+        from utils.evaluation import evaluate as evaluate_program
+        devset = [
+            dspy.Example(question=f"What is the capital of {country}?", answer=capital).with_inputs("question")
+            for country, capital in [
+                ("Canada", "Ottawa"), ("Egypt", "Cairo"), ("India", "New Delhi"), ("Kenya", "Nairobi"),
+                ("Mexico", "Mexico City"), ("Norway", "Oslo"), ("Peru", "Lima"), ("Portugal", "Lisbon"),
+            ]
+        ]
+        for name, program in [("Baseline", qa_module), ("Optimized", optimized_qa)]:
+            result = evaluate_program(program, devset, answer_match, num_threads=8)
+            print(f"{name}: {result.summary()}")
+
     # Save and Visualize
     script_path = os.path.abspath(__file__)
     response_path = os.path.join(os.path.dirname(__file__), 'responses/14_prompt+response.txt')
     html_path = os.path.join(os.path.dirname(__file__), 'responses/14_viz.html')
 
     save_response(lm, response_path)
+    return optimized_qa
 
 
 if __name__ == "__main__":
-    main()
+    main(evaluate="--evaluate" in sys.argv)
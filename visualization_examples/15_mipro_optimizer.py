@@ -6,10 +6,14 @@ import os
 # Add parent dir to path to import utils
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from utils.response_saver import save_response
+from utils.artifacts import compile_or_load
+from utils.budget import compile_within_budget
+from utils.mipro_checkpoint import CheckpointedMIPROv2
 
 # Configure
-lm = dspy.LM('ollama/gemma3:1b', api_base='http://localhost:11434')
-dspy.configure(lm=lm)
+from utils.lm_config import configure_lm
+lm = configure_lm()  # built on first use; OLLAMA_MODEL_NAME / OLLAMA_API_BASE override
+
 
 class SentimentAnalysis(dspy.Signature):
     """Process the input"""
@@ -47,7 +51,7 @@ def sentiment_accuracy(example, prediction, trace=None):
 
     return sentiments_match and confidence_valid
 
-def main():
+def main(evaluate=False, resume=False):
     # Training set: examples with known sentiments
     trainset = [
         dspy.Example(
@@ -91,20 +95,26 @@ def main():
     # Create uncompiled (unoptimized) module
     sentiment_module = SentimentModule()
 
-    # Set up MIPRO optimizer with tracking enabled
-    optimizer = dspy.MIPROv2(
+    # Set up MIPRO optimizer with tracking enabled; progress is checkpointed under .cache/mipro/
+    # and --resume reuses the bootstrapped demos, proposals and scored trials
+    optimizer = CheckpointedMIPROv2(
         metric=sentiment_accuracy,
         init_temperature=1.4,
         track_stats=True,
+        resume=resume,
     )
 
-    # Compile (optimize) the module
+    # Compile (optimize) the module within the LM_BUDGET_CALLS / _PROMPT_TOKENS / _SECONDS caps;
+    # the result is loaded from .cache/programs/ if this exact setup was compiled before
     print("Optimizing with MIPROv2...")
-    optimized_module = optimizer.compile(
+    optimized_module, artifact = compile_or_load(
+        optimizer,
         sentiment_module,
         trainset=trainset,
+        compile=compile_within_budget,
     )
-    print("Optimization complete.")
+    print(artifact['status'])
+
     optimized_instruction = optimized_module.predictor.predict.signature.instructions
     print(f"\n{'='*70}")
     print(f"INSTRUCTION OVERRIDE DEMONSTRATION")
@@ -146,13 +156,38 @@ def main():
         print(f"Total LM Calls: {optimized_module.total_calls}")
     if hasattr(optimized_module, 'prompt_model_total_calls'):
         print(f"Prompt Generation LM Calls: {optimized_module.prompt_model_total_calls}")
+    budget = artifact['details']
+    if budget:
+        print(f"LM requests sent: {budget['calls']} ({budget['cached_calls']} cache hits, {budget['refused_calls']} refused), "
+              f"prompt tokens: {budget['prompt_tokens']}, optimization time: {budget['seconds']:.1f}s")
+    else:
+        print(f"Compiled program loaded in {artifact['seconds'] * 1000:.1f} ms (no LM calls)")
+
+    if evaluate:
+        # Compare baseline and optimized programs on a held-out dev set (parallel, retried, cached)
+        from utils.evaluation import evaluate as evaluate_program
+        devset = [
+            dspy.Example(text=text, sentiment=sentiment).with_inputs("text")
+            for text, sentiment in [
+                ("The staff were friendly and the food was delicious.", "positive"),
+                ("My package arrived broken and support ignored me.", "negative"),
+                ("The meeting starts at 10 am in room 4.", "neutral"),
+                ("What a wonderful surprise, thank you so much!", "positive"),
+                ("The update made the app slow and buggy.", "negative"),
+                ("The library closes at 8 pm on weekdays.", "neutral"),
+            ]
+        ]
+        for name, program in [("Baseline", sentiment_module), ("Optimized", optimized_module)]:
+            result = evaluate_program(program, devset, sentiment_accuracy, num_threads=8)
+            print(f"{name}: {result.summary()}")
 
     # Save and Visualize
     script_path = os.path.abspath(__file__)
     response_path = os.path.join(os.path.dirname(__file__), 'responses/15_prompt+response.txt')
 
     save_response(lm, response_path)
+    return optimized_module
 
 
 if __name__ == "__main__":
-    main()
+    main(evaluate="--evaluate" in sys.argv, resume="--resume" in sys.argv)
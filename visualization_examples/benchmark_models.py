@@ -0,0 +1,387 @@
+"""Benchmark the numbered examples across a matrix of models and backends.
+
+Every cell of the matrix is one (model, backend) pair.  For each cell, each
+selected example's ``main()`` is run once (in this process, as in
+run_inprocess.py) and, where the example has a labeled task below, its
+program is scored on a few held-out examples with ``utils.evaluation``.
+A TracingCallback records every LM call and adapter parse, giving per row:
+
+    LM calls, mean / p95 LM latency, prompt and completion tokens,
+    completion tokens per second of LM time, adapter parse failures
+    (e.g. 09's ``year: int`` / ``cast: List[str]``), and the metric score.
+
+Backends:
+    ollama            OLLAMA_API_BASE (default http://localhost:11434)
+    standin           utils/ollama_standin.py, started in-process
+    replay            utils/lm_replay.py in replay mode over .cache/lm_recordings.sqlite
+    NAME=URL          any other Ollama-compatible server
+
+Results go to ``benchmark_results/model_matrix.csv`` (one row per cell and
+example) and ``model_matrix.html`` (per-cell summary and the same rows).
+``--min-score`` picks the cheapest cell (least LM time, or token cost with
+``--price``) whose mean score still meets it.
+
+Usage:
+    python benchmark_models.py --models gemma3:1b,qwen2.5:0.5b --backends ollama
+    python benchmark_models.py --models gemma3:1b --backends standin,replay --examples 03 09 14
+    python benchmark_models.py --models gemma3:1b,llama3.2:3b --min-score 70 --price llama3.2:3b=0.02
+"""
+
+import argparse
+import contextlib
+import csv
+import html
+import io
+import os
+import re
+import time
+
+from run_inprocess import BASE_DIR, example_scripts, load_example, run_example
+
+import dspy
+
+from utils.evaluation import evaluate
+from utils.lm_config import DEFAULT_API_BASE, lm_from_env
+from utils.response_saver import save_response
+from utils.tracing import TracingCallback
+
+FIELDS = ['model', 'backend', 'example', 'status', 'seconds', 'lm_calls', 'lm_errors', 'lm_mean_ms', 'lm_p95_ms',
+          'prompt_tokens', 'completion_tokens', 'tokens_per_sec', 'parses', 'parse_failures',
+          'parse_failure_rate', 'score', 'scored', 'score_errors', 'error']
+
+
+# -- labeled tasks ---------------------------------------------------------------
+# Each returns (program, devset, metric) built from the example module.  The
+# examples whose program is more than a bare predictor (08's demos, 14/15's
+# compiled modules) are scored on what their ``main()`` returned; see
+# main_program.
+
+def _contains(field):
+    def metric(example, prediction, trace=None):
+        expected = str(example[field]).lower().strip()
+        predicted = str(prediction[field]).lower().strip()
+        return bool(predicted) and (expected in predicted or predicted in expected)
+    return metric
+
+
+CAPITALS = [("Canada", "Ottawa"), ("Egypt", "Cairo"), ("Kenya", "Nairobi"), ("Norway", "Oslo"),
+            ("Peru", "Lima"), ("Portugal", "Lisbon")]
+SENTIMENTS = [("The staff were friendly and the food was delicious.", "positive"),
+              ("My package arrived broken and support ignored me.", "negative"),
+              ("The meeting starts at 10 am in room 4.", "neutral"),
+              ("What a wonderful surprise, thank you so much!", "positive"),
+              ("The update made the app slow and buggy.", "negative"),
+              ("The library closes at 8 pm on weekdays.", "neutral")]
+
+
+def _capitals():
+    return [dspy.Example(question=f"What is the capital of {c}?", answer=a).with_inputs("question")
+            for c, a in CAPITALS]
+
+
+def _sentiments():
+    return [dspy.Example(text=t, sentiment=s).with_inputs("text") for t, s in SENTIMENTS]
+
+
+def main_program(module, program=None):
+    """``program`` if ``main()`` already returned it, else run ``main()`` quietly for it.
+
+    For 14 and 15 that loads the compiled program from .cache/programs/ (its
+    key covers the cell's model and api_base) or compiles it for this cell.
+    """
+    if program is None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            program = module.main()
+    return program
+
+
+def task_01(module, program=None):
+    return dspy.Predict(module.BasicQA), _capitals(), _contains('answer')
+
+
+def task_02(module, program=None):
+    devset = [dspy.Example(question=q, answer=a).with_inputs("question") for q, a in [
+        ("A box holds 4 pens. How many pens are in 3 boxes?", "12"),
+        ("Tom has 10 sweets and gives away 4. How many are left?", "6"),
+        ("A train travels 60 km per hour for 2 hours. How many km does it travel?", "120"),
+        ("There are 7 birds on a tree and 5 more arrive. How many birds are there?", "12"),
+    ]]
+
+    def metric(example, prediction, trace=None):
+        return example.answer in re.findall(r'-?\d+', str(prediction.answer))
+    return dspy.ChainOfThought(module.MathSolver), devset, metric
+
+
+def task_03(module, program=None):
+    devset = [dspy.Example(submission=s, intent=i).with_inputs("submission") for s, i in [
+        ("The app crashes every time I open settings.", "Bug Report"),
+        ("Could you add a dark mode?", "Feature Request"),
+        ("How do I reset my password?", "Question"),
+        ("Thanks for the great support last week!", "Other"),
+        ("Export to PDF produces an empty file.", "Bug Report"),
+        ("Please support exporting to CSV.", "Feature Request"),
+    ]]
+    return dspy.Predict(module.IntentClassifier), devset, _contains('intent')
+
+
+def task_08(module, program=None):
+    return main_program(module, program), _sentiments(), _contains('sentiment')
+
+
+def task_09(module, program=None):
+    devset = [dspy.Example(text=t, year=y, director=d).with_inputs("text") for t, y, d in [
+        ("Inception (2010) is a science fiction film by Christopher Nolan starring Leonardo DiCaprio.",
+         2010, "Christopher Nolan"),
+        ("Directed by Steven Spielberg, Jurassic Park came out in 1993 with Sam Neill and Laura Dern.",
+         1993, "Steven Spielberg"),
+        ("Spirited Away, Hayao Miyazaki's 2001 animated fantasy, features Rumi Hiiragi.",
+         2001, "Hayao Miyazaki"),
+        ("The Godfather (1972), directed by Francis Ford Coppola, stars Marlon Brando and Al Pacino.",
+         1972, "Francis Ford Coppola"),
+    ]]
+
+    def metric(example, prediction, trace=None):
+        # Typed fields must have parsed (int year, list cast) and match the text.
+        return (prediction.year == example.year and isinstance(prediction.cast, list)
+                and _contains('director')(example, prediction))
+    return dspy.Predict(module.ExtractMovie), devset, metric
+
+
+def task_14(module, program=None):
+    return main_program(module, program), _capitals(), module.answer_match
+
+
+def task_15(module, program=None):
+    return main_program(module, program), _sentiments(), module.sentiment_accuracy
+
+
+TASKS = {'01': task_01, '02': task_02, '03': task_03, '08': task_08, '09': task_09,
+         '14': task_14, '15': task_15}
+
+
+# -- backends --------------------------------------------------------------------
+
+def start_backends(specs, standin_latency=0.0):
+    """{name: api_base} for the backend specs, starting local servers as needed."""
+    backends = {}
+    for spec in specs:
+        name, _, url = spec.partition('=')
+        if url:
+            backends[name] = url
+        elif name == 'ollama':
+            backends[name] = os.getenv('OLLAMA_API_BASE', DEFAULT_API_BASE)
+        elif name == 'standin':
+            from utils.ollama_standin import start_server
+            backends[name] = "http://%s:%d" % start_server(latency=standin_latency).server_address
+        elif name == 'replay':
+            from utils.lm_replay import start_proxy
+            backends[name] = "http://%s:%d" % start_proxy(mode='replay').server_address
+        else:
+            raise ValueError(f"Unknown backend {spec!r}; use ollama, standin, replay or NAME=URL")
+    return backends
+
+
+# -- one cell ------------------------------------------------------------------
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(pct / 100 * len(sorted_values)))]
+
+
+def trace_metrics(tracer):
+    """LM latency, token and adapter-parse counters from the spans of ``tracer``."""
+    spans = [s for s in tracer.spans if s.end is not None]
+    lm = [s for s in spans if s.kind == 'lm']
+    parses = [s for s in spans if s.kind == 'adapter' and s.name.endswith('.parse')]
+    durations = sorted(s.duration for s in lm)
+    completion = sum(s.attributes.get('completion_tokens') or 0 for s in lm)
+    return {
+        'lm_calls': len(lm),
+        'lm_errors': sum(1 for s in lm if s.error),
+        'lm_mean_ms': round(1000 * sum(durations) / len(durations), 1) if durations else 0.0,
+        'lm_p95_ms': round(1000 * _percentile(durations, 95), 1),
+        'prompt_tokens': sum(s.attributes.get('prompt_tokens') or 0 for s in lm),
+        'completion_tokens': completion,
+        'tokens_per_sec': round(completion / sum(durations), 1) if durations and sum(durations) else 0.0,
+        'parses': len(parses),
+        'parse_failures': sum(1 for s in parses if s.error),
+        'parse_failure_rate': round(sum(1 for s in parses if s.error) / len(parses), 3) if parses else 0.0,
+        'lm_seconds': sum(durations),
+    }
+
+
+def run_cell(model, backend, api_base, modules, out_dir, run_main=True, num_threads=4):
+    """Benchmark every example module against one model/backend; returns one row per example."""
+    cell_dir = os.path.join(out_dir, 'responses', f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', model)}@{backend}")
+    lm = lm_from_env(model=model, api_base=api_base, cache=False)
+    rows = []
+    for num, module in modules:
+        tracer = TracingCallback()
+        row = {'model': model, 'backend': backend, 'example': num, 'status': 'ok', 'error': '',
+               'score': '', 'scored': 0, 'score_errors': 0}
+        # Keep the tutorial's committed responses/ untouched; this cell's replies go to cell_dir.
+        module.save_response = lambda lm, path: save_response(lm, os.path.join(cell_dir, os.path.basename(path)))
+        start = time.perf_counter()
+        main_result = None
+        with dspy.context(lm=lm, callbacks=[tracer]):
+            if run_main:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    result = run_example(num, module, lm)
+                if result['status'] != 'ok':
+                    row.update(status=result['status'], error=result['error'])
+                main_result = result['program']
+            if num in TASKS:
+                try:
+                    program, devset, metric = TASKS[num](module, main_result)
+                    scored = evaluate(program, devset, metric, num_threads=num_threads, retries=0, cache=False)
+                    row.update(score=round(scored.score, 1), scored=len(devset), score_errors=scored.errors)
+                except Exception as e:
+                    row.update(status='failed', error=f"score {type(e).__name__}: {e}")
+        row['seconds'] = round(time.perf_counter() - start, 3)
+        row.update(trace_metrics(tracer))
+        rows.append(row)
+        print(f"  {model:>20} @ {backend:8} {num}: {row['status']:6} {row['seconds']:7.2f}s "
+              f"{row['lm_calls']:3d} calls  parse fail {row['parse_failures']}/{row['parses']}"
+              + (f"  score {row['score']}%" if row['score'] != '' else '')
+              + (f"  {row['error']}" if row['error'] else ''))
+    return rows
+
+
+# -- reports -----------------------------------------------------------------------
+
+def summarize(rows, prices=None):
+    """One summary dict per (model, backend) cell, in first-seen order."""
+    prices = prices or {}
+    cells = {}
+    for row in rows:
+        cells.setdefault((row['model'], row['backend']), []).append(row)
+    summaries = []
+    for (model, backend), group in cells.items():
+        scores = [r['score'] for r in group if r['score'] != '']
+        calls = sum(r['lm_calls'] for r in group)
+        lm_seconds = sum(r['lm_seconds'] for r in group)
+        parses = sum(r['parses'] for r in group)
+        tokens = sum(r['prompt_tokens'] + r['completion_tokens'] for r in group)
+        summaries.append({
+            'model': model, 'backend': backend,
+            'examples': len(group), 'failed': sum(1 for r in group if r['status'] != 'ok'),
+            'lm_calls': calls, 'lm_seconds': round(lm_seconds, 2),
+            'lm_mean_ms': round(1000 * lm_seconds / calls, 1) if calls else 0.0,
+            'tokens': tokens,
+            'tokens_per_sec': round(sum(r['completion_tokens'] for r in group) / lm_seconds, 1) if lm_seconds else 0.0,
+            'parse_failure_rate': round(sum(r['parse_failures'] for r in group) / parses, 3) if parses else 0.0,
+            'score': round(sum(scores) / len(scores), 1) if scores else None,
+            'cost': round(tokens / 1000 * prices[model], 4) if model in prices else None,
+        })
+    return summaries
+
+
+def cheapest(summaries, min_score):
+    """The summary with the lowest cost (or LM time) whose mean score is at least ``min_score``."""
+    eligible = [s for s in summaries if s['score'] is not None and s['score'] >= min_score and not s['failed']]
+    if not eligible:
+        return None
+    return min(eligible, key=lambda s: (s['cost'] if s['cost'] is not None else float('inf'), s['lm_seconds']))
+
+
+def write_csv(rows, path):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _table(records, columns, highlight=None):
+    head = ''.join(f"<th>{html.escape(c)}</th>" for c in columns)
+    body = []
+    for record in records:
+        cls = ' class="best"' if highlight is not None and record is highlight else ''
+        cells = ''.join(f"<td>{html.escape('' if record.get(c) is None else str(record.get(c)))}</td>"
+                        for c in columns)
+        body.append(f"<tr{cls}>{cells}</tr>")
+    return f"<table><thead><tr>{head}</tr></thead><tbody>{''.join(body)}</tbody></table>"
+
+
+def write_html(rows, summaries, best, min_score, path):
+    verdict = (f"Cheapest cell with mean score &ge; {min_score:g}%: <b>{html.escape(best['model'])} @ "
+               f"{html.escape(best['backend'])}</b> ({best['score']}%, {best['lm_seconds']}s LM time)"
+               if best else f"No cell reached a mean score of {min_score:g}%.")
+    summary_columns = ['model', 'backend', 'examples', 'failed', 'lm_calls', 'lm_seconds', 'lm_mean_ms',
+                       'tokens', 'tokens_per_sec', 'parse_failure_rate', 'score', 'cost']
+    document = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<title>Model matrix</title>
+<style>
+body {{ font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif; margin: 24px; color: #222; }}
+table {{ border-collapse: collapse; margin: 12px 0 28px; font-size: 13px; }}
+th, td {{ border: 1px solid #ddd; padding: 4px 8px; text-align: right; }}
+th {{ background: #f4f4f4; }}
+td:nth-child(-n+3) {{ text-align: left; }}
+tr.best {{ background: #e6f4ea; font-weight: bold; }}
+</style>
+</head>
+<body>
+<h1>Model matrix</h1>
+<p>Generated {time.strftime('%Y-%m-%d %H:%M:%S')}. {verdict}</p>
+<h2>Per cell</h2>
+{_table(summaries, summary_columns, best)}
+<h2>Per example</h2>
+{_table(rows, FIELDS)}
+</body>
+</html>
+"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(document)
+
+
+def _split(values):
+    return [v.strip() for value in values for v in value.split(',') if v.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the DSPy examples across models and backends.")
+    parser.add_argument("--models", action="append", default=[], help="Comma-separated Ollama model names")
+    parser.add_argument("--backends", action="append", default=[],
+                        help="Comma-separated: ollama, standin, replay or NAME=URL (default: ollama)")
+    parser.add_argument("--examples", nargs="*", default=[], help="Example numbers (default: all)")
+    parser.add_argument("--score-only", action="store_true", help="Only run the labeled tasks (08, 14 and 15 still call main() for their program)")
+    parser.add_argument("--threads", type=int, default=4, help="Threads for scoring each labeled task")
+    parser.add_argument("--standin-latency", type=float, default=0.0, help="Reply delay of the standin backend")
+    parser.add_argument("--min-score", type=float, default=0.0, help="Accuracy a recommended cell must reach")
+    parser.add_argument("--price", action="append", default=[],
+                        help="MODEL=COST per 1k tokens; eligible cells are ranked by cost (unpriced models last), then LM time")
+    parser.add_argument("--out-dir", default=os.path.join(BASE_DIR, 'benchmark_results'))
+    args = parser.parse_args()
+
+    models = _split(args.models) or [os.getenv('OLLAMA_MODEL_NAME', 'gemma3:1b')]
+    backends = start_backends(_split(args.backends) or ['ollama'], args.standin_latency)
+    prices = {m: float(p) for m, _, p in (spec.rpartition('=') for spec in args.price)}
+    modules = [(num, load_example(num, path)[0]) for num, path in example_scripts(set(args.examples) or None)]
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    rows = []
+    for model in models:
+        for backend, api_base in backends.items():
+            print(f"{model} @ {backend} ({api_base})")
+            rows.extend(run_cell(model, backend, api_base, modules, args.out_dir, not args.score_only, args.threads))
+
+    summaries = summarize(rows, prices)
+    best = cheapest(summaries, args.min_score)
+    csv_path = os.path.join(args.out_dir, 'model_matrix.csv')
+    html_path = os.path.join(args.out_dir, 'model_matrix.html')
+    write_csv(rows, csv_path)
+    write_html(rows, summaries, best, args.min_score, html_path)
+
+    print(f"\n{'model':20} {'backend':8} {'calls':>6} {'LM s':>8} {'tok/s':>8} {'parse fail':>10} {'score':>6}")
+    for s in summaries:
+        score = '-' if s['score'] is None else f"{s['score']:.1f}"
+        print(f"{s['model'][:20]:20} {s['backend'][:8]:8} {s['lm_calls']:6d} {s['lm_seconds']:8.2f} "
+              f"{s['tokens_per_sec']:8.1f} {s['parse_failure_rate']:10.1%} {score:>6}")
+    if best:
+        print(f"\nCheapest cell with mean score >= {args.min_score:g}%: {best['model']} @ {best['backend']}")
+    else:
+        print(f"\nNo cell reached a mean score of {args.min_score:g}%.")
+    print(f"Wrote {csv_path} and {html_path}")
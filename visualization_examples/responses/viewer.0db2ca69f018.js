@@ -0,0 +1,673 @@
+
+        // Data injected per viewer (VIEWER_DATA, defined in the page)
+        let groups = VIEWER_DATA.groups;
+        const file1Lines = VIEWER_DATA.file1Lines;
+        const file2Lines = VIEWER_DATA.file2Lines;
+
+        const BLOCK_LINES = 50;          // lines per rendered block
+        const VIRTUAL_MIN_LINES = 1000;  // smaller files are rendered in full
+        const BUFFER_PX = 800;           // blocks this close to the viewport stay rendered
+
+        let connectors = {}; // gid -> [{connector: Connector, el2: Element}]
+        let allVisible = false;
+        let pinnedGroups = new Set(); // groups whose arrows stay visible
+        let currentContextGroupId = null;
+        let views = {}; // fileNum -> {container, linesArr, lineHighlights, blocks, observer}
+        let groupsById = {};
+        let linesReady = false;
+        let totalArrows = 0;
+        let timings = []; // most recent first: {name, scriptMs, frameMs, detail}
+
+        function escapeHtml(text) {
+            if (!text) return "";
+            return text
+                .replace(/&/g, "&amp;")
+                .replace(/</g, "&lt;")
+                .replace(/>/g, "&gt;")
+                .replace(/"/g, "&quot;")
+                .replace(/'/g, "&#039;");
+        }
+
+        function parsePos(posStr) {
+            if (!posStr || posStr.indexOf(':') === -1) return null;
+            const parts = posStr.split(':');
+            return { line: parseInt(parts[0]), col: parseInt(parts[1]) };
+        }
+
+        // Expand a span entry into per-line segments.
+        // A span is {pos, length} (single-line) or {pos, endPos} (multi-line range).
+        // Returns array of {lineNum, col, length, segIdx} where segIdx distinguishes
+        // multiple DOM elements for the same logical span.
+        function expandSpanToLines(span, linesArr) {
+            const start = parsePos(span.pos);
+            if (!start) return [];
+
+            if (span.endPos) {
+                // Multi-line range: startLine:startCol - endLine:endCol
+                const end = parsePos(span.endPos);
+                if (!end) return [];
+                const segments = [];
+                for (let ln = start.line; ln <= end.line; ln++) {
+                    const lineText = linesArr[ln - 1] || '';
+                    const col = (ln === start.line) ? start.col : 1;
+                    const endCol = (ln === end.line) ? end.col : lineText.length + 1;
+                    const len = endCol - col;
+                    if (len > 0) {
+                        segments.push({ lineNum: ln, col, length: len, segIdx: ln - start.line });
+                    }
+                }
+                return segments;
+            } else {
+                // Single-line legacy
+                return [{ lineNum: start.line, col: start.col, length: span.length, segIdx: 0 }];
+            }
+        }
+
+        function getAllSpansForGroup(gid) {
+            const spans = [];
+            document.querySelectorAll(`[data-group-id="${gid}"]`).forEach(el => spans.push(el));
+            return spans;
+        }
+
+        // Per-line highlight entries of one file, keyed by line number
+        function buildLineHighlights(fileNum, linesArr) {
+            const lineHighlights = {};
+
+            function addHighlight(lineNum, entry) {
+                if (!lineHighlights[lineNum]) lineHighlights[lineNum] = [];
+                lineHighlights[lineNum].push(entry);
+            }
+
+            groups.forEach(g => {
+                if (fileNum === 1) {
+                    const span = { pos: g.File1_Pos, length: g.File1_Length, endPos: g.File1_EndPos };
+                    expandSpanToLines(span, linesArr).forEach(seg => {
+                        addHighlight(seg.lineNum, {
+                            groupId: g.Group_ID,
+                            col: seg.col,
+                            length: seg.length,
+                            spanId: `group-${g.Group_ID}-f1-seg${seg.segIdx}`,
+                            label: g.Label
+                        });
+                    });
+                } else {
+                    g.File2_Positions.forEach((fp, idx) => {
+                        expandSpanToLines(fp, linesArr).forEach(seg => {
+                            addHighlight(seg.lineNum, {
+                                groupId: g.Group_ID,
+                                col: seg.col,
+                                length: seg.length,
+                                spanId: `group-${g.Group_ID}-f2-${idx}-seg${seg.segIdx}`,
+                                label: g.Label
+                            });
+                        });
+                    });
+                }
+            });
+
+            return lineHighlights;
+        }
+
+        // Render one line (with its highlight spans) into a new element
+        function renderLine(fileNum, lineNum, lineText, highlights) {
+            const div = document.createElement('div');
+            div.className = 'code-line';
+            div.dataset.line = lineNum;
+            div.dataset.file = fileNum;
+
+            if (highlights) {
+                const sorted = highlights.sort((a, b) => a.col - b.col);
+
+                // Build character-level group assignments for overlap detection
+                // charGroups[i] = array of highlight entries covering char at position i
+                const charGroups = new Array(lineText.length).fill(null).map(() => []);
+                sorted.forEach(h => {
+                    const start = h.col - 1;
+                    let len = h.length;
+                    if (start + len > lineText.length) len = lineText.length - start;
+                    for (let i = start; i < start + len; i++) {
+                        charGroups[i].push(h);
+                    }
+                });
+
+                // Find which groupIds actually overlap with at least one other group
+                const overlappingGroups = new Set();
+                for (let i = 0; i < lineText.length; i++) {
+                    if (charGroups[i].length > 1) {
+                        charGroups[i].forEach(h => overlappingGroups.add(h.groupId));
+                    }
+                }
+
+                // Assign color index only to groups that overlap; others stay at index 0 (default blue)
+                const groupColorMap = {};
+                let colorCounter = 1; // 0 reserved for non-overlapping default
+                overlappingGroups.forEach(gid => {
+                    groupColorMap[gid] = colorCounter++;
+                });
+
+                // Walk character positions and emit spans for contiguous regions with same group set
+                let htmlContent = "";
+                let i = 0;
+                while (i < lineText.length) {
+                    const cur = charGroups[i];
+                    if (cur.length === 0) {
+                        // Find end of plain region
+                        let j = i + 1;
+                        while (j < lineText.length && charGroups[j].length === 0) j++;
+                        htmlContent += escapeHtml(lineText.substring(i, j));
+                        i = j;
+                    } else {
+                        // Find end of region with same group set signature
+                        const sig = cur.map(h => h.groupId).sort().join(',');
+                        let j = i + 1;
+                        while (j < lineText.length) {
+                            const nsig = charGroups[j].map(h => h.groupId).sort().join(',');
+                            if (nsig !== sig) break;
+                            j++;
+                        }
+
+                        const segText = lineText.substring(i, j);
+                        const isMulti = cur.length > 1;
+
+                        // Use first highlight's metadata for id/events; list all group ids
+                        const primary = cur[0];
+                        const allGids = cur.map(h => h.groupId).join(' ');
+                        const allLabels = cur.map(h => h.label).join(' | ');
+
+                        let classes = 'match-span';
+                        if (isMulti) {
+                            classes += ' overlap-multi';
+                        } else {
+                            const colorIdx = (groupColorMap[primary.groupId] ?? 0) % 6;
+                            classes += ` overlap-${colorIdx}`;
+                        }
+
+                        // Build data attrs and click handler for all groups
+                        const onclickHandlers = cur.map(h => `handleGroupClick(event, '${h.groupId}')`).join('; ');
+                        htmlContent += `<span id="${primary.spanId}" class="${classes}" data-group-ids="${allGids}" data-group-id="${primary.groupId}" title="${escapeHtml(allLabels)}" onclick="${onclickHandlers}">${escapeHtml(segText)}</span>`;
+
+                        // Also emit hidden zero-width anchors for non-primary spans so connectors can find them
+                        cur.slice(1).forEach(h => {
+                            htmlContent += `<span id="${h.spanId}" data-group-id="${h.groupId}" style="display:inline;width:0;height:0;overflow:hidden;position:absolute"></span>`;
+                        });
+
+                        i = j;
+                    }
+                }
+                if (i < lineText.length) htmlContent += escapeHtml(lineText.substring(i));
+
+                div.innerHTML = htmlContent;
+            } else {
+                div.innerHTML = escapeHtml(lineText);
+            }
+            return div;
+        }
+
+        // Measure line height and characters per row to size blocks that are not rendered
+        function measureView(view) {
+            const probe = document.createElement('div');
+            probe.className = 'code-line';
+            probe.innerHTML = '<span>M</span>';
+            view.container.appendChild(probe);
+            const style = getComputedStyle(view.container);
+            const width = view.container.clientWidth - parseFloat(style.paddingLeft) - parseFloat(style.paddingRight);
+            view.lineHeight = probe.offsetHeight || 21;
+            view.charsPerRow = Math.max(1, Math.floor(width / (probe.firstChild.getBoundingClientRect().width || 8)));
+            probe.remove();
+        }
+
+        function estimateBlockHeight(view, block) {
+            let rows = 0;
+            for (let ln = block.start; ln < block.end; ln++) {
+                rows += Math.max(1, Math.ceil(view.linesArr[ln].length / view.charsPerRow));
+            }
+            return rows * view.lineHeight;
+        }
+
+        function fillBlock(view, block) {
+            const frag = document.createDocumentFragment();
+            for (let ln = block.start; ln < block.end; ln++) {
+                frag.appendChild(renderLine(view.fileNum, ln + 1, view.linesArr[ln], view.lineHighlights[ln + 1]));
+            }
+            block.el.style.height = '';
+            block.el.appendChild(frag);
+            block.rendered = true;
+            block.el.querySelectorAll('.match-span').forEach(bindSpan);
+        }
+
+        function emptyBlock(block) {
+            // Keep the measured height so the scroll position does not jump
+            block.el.style.height = block.el.offsetHeight + 'px';
+            block.el.innerHTML = '';
+            block.rendered = false;
+        }
+
+        // Render a single file panel.  Lines are grouped into blocks of BLOCK_LINES;
+        // in large files only blocks within BUFFER_PX of the viewport are rendered,
+        // the others are empty placeholders of the same height.
+        function renderFile(fileNum, linesArr, containerId) {
+            const container = document.getElementById(containerId);
+            container.innerHTML = '';
+
+            const view = {
+                fileNum, linesArr, container, blocks: [], observer: null,
+                lineHighlights: buildLineHighlights(fileNum, linesArr), groupLines: {},
+            };
+            views[fileNum] = view;
+            // gid -> line numbers holding its spans, for updates that touch one group
+            Object.entries(view.lineHighlights).forEach(([lineNum, entries]) => {
+                entries.forEach(h => {
+                    if (!view.groupLines[h.groupId]) view.groupLines[h.groupId] = new Set();
+                    view.groupLines[h.groupId].add(Number(lineNum));
+                });
+            });
+            const virtual = linesArr.length >= VIRTUAL_MIN_LINES && 'IntersectionObserver' in window;
+            if (virtual) measureView(view);
+
+            for (let start = 0; start < linesArr.length; start += BLOCK_LINES) {
+                const block = {
+                    start, end: Math.min(start + BLOCK_LINES, linesArr.length),
+                    el: document.createElement('div'), rendered: false, groupIds: new Set(),
+                };
+                block.el.className = 'code-block';
+                block.el.dataset.block = view.blocks.length;
+                for (let ln = block.start; ln < block.end; ln++) {
+                    (view.lineHighlights[ln + 1] || []).forEach(h => block.groupIds.add(h.groupId));
+                }
+                if (virtual) {
+                    block.el.style.height = estimateBlockHeight(view, block) + 'px';
+                } else {
+                    fillBlock(view, block);
+                }
+                view.blocks.push(block);
+                container.appendChild(block.el);
+            }
+
+            if (virtual) {
+                view.observer = new IntersectionObserver(entries => {
+                    const touched = new Set();
+                    entries.forEach(entry => {
+                        const block = view.blocks[entry.target.dataset.block];
+                        if (entry.isIntersecting === block.rendered) return;
+                        if (entry.isIntersecting) fillBlock(view, block);
+                        else emptyBlock(block);
+                        block.groupIds.forEach(gid => touched.add(gid));
+                    });
+                    // Arrows of groups whose spans appeared or went away
+                    if (linesReady) touched.forEach(connectGroup);
+                }, { root: container, rootMargin: `${BUFFER_PX}px 0px` });
+                view.blocks.forEach(block => view.observer.observe(block.el));
+            }
+        }
+
+        function showTooltip(gid, el) {
+            const g = groups.find(g => g.Group_ID === gid);
+            if (!g) return;
+
+            const tooltip = document.getElementById('tooltip');
+            let html = `<strong>${escapeHtml(g.Label)}</strong>`;
+
+            if (g.Description) {
+                html += `<div style="margin-top:6px;color:#94a3b8;font-size:12px">${escapeHtml(g.Description)}</div>`;
+            }
+
+            // Extract text from a span (single or multi-line)
+            function extractSpanText(span, linesArr) {
+                const segs = expandSpanToLines(span, linesArr);
+                return segs.map(s => {
+                    const line = linesArr[s.lineNum - 1] || '';
+                    return line.substring(s.col - 1, s.col - 1 + s.length);
+                }).join('\n');
+            }
+
+            // Show source text from File1
+            const pos1 = parsePos(g.File1_Pos);
+            if (pos1) {
+                const text = extractSpanText({pos: g.File1_Pos, length: g.File1_Length, endPos: g.File1_EndPos}, file1Lines);
+                html += `<div style="margin-top:8px;padding-top:8px;border-top:1px solid #475569">`;
+                html += `<span style="color:#94a3b8">Source:</span> <span style="background:rgba(56,189,248,0.2);padding:2px 4px;border-radius:2px">"${escapeHtml(text)}"</span>`;
+                html += `</div>`;
+            }
+
+            // Show target locations in File2
+            if (g.File2_Positions.length > 0) {
+                html += `<div style="margin-top:6px"><span style="color:#94a3b8">Maps to ${g.File2_Positions.length} location(s):</span></div>`;
+                g.File2_Positions.forEach((fp, idx) => {
+                    const pos = parsePos(fp.pos);
+                    if (pos) {
+                        const text = extractSpanText(fp, file2Lines);
+                        html += `<div style="margin-top:4px;font-size:12px;padding-left:8px">`;
+                        html += `<span style="color:#64748b">Line ${pos.line}:</span> <span style="background:rgba(56,189,248,0.2);padding:1px 3px;border-radius:2px">"${escapeHtml(text)}"</span>`;
+                        html += `</div>`;
+                    }
+                });
+            }
+
+            tooltip.innerHTML = html;
+            tooltip.style.display = 'block';
+
+            const rect = el.getBoundingClientRect();
+            tooltip.style.left = rect.left + 'px';
+            tooltip.style.top = (rect.bottom + 8) + 'px';
+        }
+
+        function hideTooltip() {
+            document.getElementById('tooltip').style.display = 'none';
+        }
+
+        // One SVG layer holds every connector.  Changes only mark the layer dirty; the
+        // paths are recomputed in a single requestAnimationFrame pass that reads all
+        // positions first, then writes, and skips connectors with an end off-screen.
+        const SVG_NS = 'http://www.w3.org/2000/svg';
+        const liveConnectors = new Set();
+        let connectorFrame = null;
+
+        class Connector {
+            constructor(el1, el2, options) {
+                this.el1 = el1;
+                this.el2 = el2;
+                this.color = options.color;
+                this.size = options.size;
+                this.visible = !options.hide;
+                this.path = null;
+                liveConnectors.add(this);
+                scheduleConnectors();
+            }
+
+            show() { this.visible = true; scheduleConnectors(); }
+
+            hide() { this.visible = false; scheduleConnectors(); }
+
+            setOptions(options) {
+                if (options.color) this.color = options.color;
+                if (options.size) this.size = options.size;
+                scheduleConnectors();
+            }
+
+            remove() {
+                liveConnectors.delete(this);
+                if (this.path) this.path.remove();
+            }
+        }
+
+        function scheduleConnectors() {
+            if (connectorFrame === null) connectorFrame = requestAnimationFrame(drawConnectors);
+        }
+
+        // The on-screen part of a panel, or null if el is not in a rendered panel
+        function visibleRect(el, panelRects) {
+            const panel = el.closest('.code-view');
+            if (!panel || !el.isConnected) return null;
+            if (!panelRects.has(panel)) panelRects.set(panel, panel.getBoundingClientRect());
+            return panelRects.get(panel);
+        }
+
+        function drawConnectors() {
+            connectorFrame = null;
+            const layer = document.getElementById('connector-layer');
+            const panelRects = new Map();
+            const updates = [];
+
+            // Read phase: layout is queried only here
+            liveConnectors.forEach(c => {
+                if (!c.visible) { updates.push([c, null]); return; }
+                const p1 = visibleRect(c.el1, panelRects), p2 = visibleRect(c.el2, panelRects);
+                if (!p1 || !p2) { updates.push([c, null]); return; }
+                const r1 = c.el1.getBoundingClientRect(), r2 = c.el2.getBoundingClientRect();
+                const y1 = (r1.top + r1.bottom) / 2, y2 = (r2.top + r2.bottom) / 2;
+                if (y1 < p1.top || y1 > p1.bottom || y2 < p2.top || y2 > p2.bottom) { updates.push([c, null]); return; }
+                updates.push([c, [r1.right, y1, r2.left, y2]]);
+            });
+
+            // Write phase: curved path from the right of the source to the left of the target
+            updates.forEach(([c, pts]) => {
+                if (!pts) {
+                    if (c.path) c.path.style.display = 'none';
+                    return;
+                }
+                if (!c.path) {
+                    c.path = document.createElementNS(SVG_NS, 'path');
+                    layer.appendChild(c.path);
+                }
+                const [x1, y1, x2, y2] = pts;
+                const bend = Math.max(40, Math.abs(x2 - x1) / 2);
+                const head = 4 + 2 * c.size;
+                c.path.setAttribute('d',
+                    `M ${x1} ${y1} C ${x1 + bend} ${y1}, ${x2 - bend} ${y2}, ${x2} ${y2} ` +
+                    `M ${x2 - head} ${y2 - head * 0.6} L ${x2} ${y2} L ${x2 - head} ${y2 + head * 0.6}`);
+                c.path.setAttribute('stroke', c.color);
+                c.path.setAttribute('stroke-width', c.size);
+                c.path.style.display = '';
+            });
+        }
+
+        // The element an arrow attaches to: the first segment of a span, or the first
+        // rendered one when the start of a multi-line span is scrolled out.
+        function findAnchor(prefix) {
+            return document.getElementById(prefix + '0') || document.querySelector(`[id^="${prefix}"]`);
+        }
+
+        // (Re)draw the arrows of one group between whichever of its spans are rendered
+        function connectGroup(gid) {
+            (connectors[gid] || []).forEach(item => item.connector.remove());
+            delete connectors[gid];
+            const g = groupsById[gid];
+            if (!g) return;
+            // Use first segment of File1 span as arrow source
+            const el1 = findAnchor(`group-${gid}-f1-seg`);
+            if (!el1) return;
+
+            const pinned = pinnedGroups.has(gid);
+            const groupItems = [];
+            g.File2_Positions.forEach((_, idx) => {
+                // Use first segment of each File2 span as arrow target
+                const el2 = findAnchor(`group-${gid}-f2-${idx}-seg`);
+                if (el2) {
+                    const connector = new Connector(el1, el2, {
+                        color: 'rgba(56, 189, 248, 0.6)',
+                        size: 2,
+                        hide: !pinned
+                    });
+                    groupItems.push({ connector, el2 });
+                }
+            });
+            connectors[gid] = groupItems;
+        }
+
+        // Hover: show all arrows + tooltip for the span's group
+        function bindSpan(span) {
+            const gid = span.dataset.groupId;
+            if (pinnedGroups.has(gid)) span.classList.add('highlighted');
+            span.onmouseenter = () => {
+                if (pinnedGroups.has(gid)) return;
+                getAllSpansForGroup(gid).forEach(s => s.classList.add('highlighted'));
+                (connectors[gid] || []).forEach(item => {
+                    item.connector.setOptions({ color: 'rgba(56, 189, 248, 1)', size: 3 });
+                    item.connector.show();
+                });
+                showTooltip(gid, span);
+            };
+            span.onmouseleave = () => {
+                if (pinnedGroups.has(gid)) return;
+                getAllSpansForGroup(gid).forEach(s => s.classList.remove('highlighted'));
+                (connectors[gid] || []).forEach(item => {
+                    item.connector.hide();
+                    item.connector.setOptions({ color: 'rgba(56, 189, 248, 0.6)', size: 2 });
+                });
+                hideTooltip();
+            };
+        }
+
+        function renderAll() {
+            // Clear existing connectors and block observers
+            Object.values(connectors).forEach(arr => arr.forEach(item => item.connector.remove()));
+            connectors = {};
+            Object.values(views).forEach(view => view.observer && view.observer.disconnect());
+            linesReady = false;
+            pinnedGroups = new Set(allVisible ? groups.map(g => g.Group_ID) : []);
+            groupsById = {};
+            groups.forEach(g => { groupsById[g.Group_ID] = g; });
+
+            renderFile(1, file1Lines, 'file1-container');
+            renderFile(2, file2Lines, 'file2-container');
+
+            totalArrows = groups.reduce((sum, g) => sum + g.File2_Positions.length, 0);
+            updateBadge();
+
+            // Draw connector arrows per group
+            setTimeout(() => {
+                linesReady = true;
+                groups.forEach(g => connectGroup(g.Group_ID));
+            }, 100);
+            return `${file1Lines.length + file2Lines.length} lines, ${groups.length} groups`;
+        }
+
+        function updateBadge() {
+            document.getElementById('match-count').textContent =
+                `${groups.length} mappings, ${totalArrows} arrows`;
+        }
+
+        // Run an update and record its script time and the time until the next frame
+        function timed(name, update) {
+            const start = performance.now();
+            const detail = update();
+            const scriptMs = performance.now() - start;
+            requestAnimationFrame(() => {
+                timings.unshift({ name, scriptMs, frameMs: performance.now() - start, detail: detail || '' });
+                timings = timings.slice(0, 8);
+                showTimings();
+            });
+        }
+
+        function showTimings() {
+            const overlay = document.getElementById('timing-overlay');
+            overlay.textContent = timings.map(t =>
+                `${t.name.padEnd(12)} ${t.scriptMs.toFixed(1).padStart(7)} ms script ` +
+                `${t.frameMs.toFixed(1).padStart(7)} ms to frame  ${t.detail}`
+            ).join('\n');
+        }
+
+        // Re-render the given lines of a file in place (only those whose block is rendered)
+        function rerenderLines(view, lineNums) {
+            let count = 0;
+            lineNums.forEach(lineNum => {
+                const block = view.blocks[Math.floor((lineNum - 1) / BLOCK_LINES)];
+                if (!block.rendered) return;
+                const old = block.el.children[lineNum - 1 - block.start];
+                const div = renderLine(view.fileNum, lineNum, view.linesArr[lineNum - 1], view.lineHighlights[lineNum]);
+                block.el.replaceChild(div, old);
+                div.querySelectorAll('.match-span').forEach(bindSpan);
+                count++;
+            });
+            return count;
+        }
+
+        // Remove one group: only the lines holding its spans are re-rendered, and only
+        // the arrows of groups that share those lines are redrawn.
+        function removeGroup(gid) {
+            const g = groupsById[gid];
+            if (!g) return '';
+            groups.splice(groups.indexOf(g), 1);
+            delete groupsById[gid];
+            pinnedGroups.delete(gid);
+            (connectors[gid] || []).forEach(item => item.connector.remove());
+            delete connectors[gid];
+            totalArrows -= g.File2_Positions.length;
+
+            const neighbours = new Set();
+            let lineCount = 0;
+            Object.values(views).forEach(view => {
+                const lineNums = view.groupLines[gid] || new Set();
+                delete view.groupLines[gid];
+                lineNums.forEach(lineNum => {
+                    const entries = view.lineHighlights[lineNum].filter(h => h.groupId !== gid);
+                    if (entries.length) view.lineHighlights[lineNum] = entries;
+                    else delete view.lineHighlights[lineNum];
+                    entries.forEach(h => neighbours.add(h.groupId));
+                    view.blocks[Math.floor((lineNum - 1) / BLOCK_LINES)].groupIds.delete(gid);
+                });
+                lineCount += rerenderLines(view, lineNums);
+            });
+            // Their spans were re-created, so the arrows need the new elements
+            if (linesReady) neighbours.forEach(connectGroup);
+            updateBadge();
+            return `${lineCount} lines, ${neighbours.size} groups redrawn`;
+        }
+
+        function handleGroupClick(e, gid) {
+            e.stopPropagation();
+
+            // Show context menu
+            const menu = document.getElementById('context-menu');
+            menu.style.display = 'block';
+            menu.style.left = e.pageX + 'px';
+            menu.style.top = e.pageY + 'px';
+            currentContextGroupId = gid;
+
+            // Toggle permanent arrow state for the group
+            const groupItems = connectors[gid] || [];
+            const allSpans = getAllSpansForGroup(gid);
+            if (pinnedGroups.has(gid)) {
+                pinnedGroups.delete(gid);
+                groupItems.forEach(item => item.connector.hide());
+                allSpans.forEach(s => s.classList.remove('highlighted'));
+                hideTooltip();
+            } else {
+                pinnedGroups.add(gid);
+                groupItems.forEach(item => item.connector.show());
+                allSpans.forEach(s => s.classList.add('highlighted'));
+            }
+        }
+
+        function deleteGroup(gid) {
+            if (!confirm('Delete this mapping?')) return;
+            document.getElementById('context-menu').style.display = 'none';
+            hideTooltip();
+            timed('deleteGroup', () => removeGroup(gid));
+        }
+
+        // Pin or unpin every group in place; panels and arrows are not rebuilt
+        function toggleAll() {
+            timed('toggleAll', () => {
+                allVisible = !allVisible;
+                pinnedGroups = new Set(allVisible ? groups.map(g => g.Group_ID) : []);
+                let arrows = 0;
+                Object.values(connectors).forEach(arr => arr.forEach(item => {
+                    item.connector.setOptions({ color: 'rgba(56, 189, 248, 0.6)', size: 2 });
+                    if (allVisible) item.connector.show();
+                    else item.connector.hide();
+                    arrows++;
+                }));
+                const spans = document.querySelectorAll('.match-span');
+                spans.forEach(s => s.classList.toggle('highlighted', allVisible));
+                hideTooltip();
+                return `${arrows} arrows, ${spans.length} spans`;
+            });
+        }
+
+        document.addEventListener('keydown', (e) => {
+            if (e.key === 't' && !e.ctrlKey && !e.metaKey && !e.altKey) {
+                const overlay = document.getElementById('timing-overlay');
+                overlay.style.display = overlay.style.display === 'block' ? 'none' : 'block';
+            }
+        });
+        if (location.hash === '#timing') document.getElementById('timing-overlay').style.display = 'block';
+
+        // Hide context menu on click elsewhere
+        document.addEventListener('click', (e) => {
+            if (!e.target.closest('.match-span') && !e.target.closest('#context-menu')) {
+                document.getElementById('context-menu').style.display = 'none';
+            }
+        });
+
+        // Redraw connectors (at most once per frame) on scroll/resize
+        ['file1-container', 'file2-container'].forEach(id => {
+            const el = document.getElementById(id);
+            if (el) {
+                el.addEventListener('scroll', scheduleConnectors, { passive: true });
+            }
+        });
+
+        window.addEventListener('resize', scheduleConnectors);
+
+        window.onload = () => timed('renderAll', renderAll);
@@ -0,0 +1,247 @@
+"""Run the visualization examples as a dependency graph instead of one by one.
+
+Every example contributes two tasks:
+
+    run:NN   NN_*.py                            -> responses/NN_prompt+response.txt
+    viz:NN   script + response + NN_mapping.md  -> responses/NN_mapping_viewer.html
+
+``viz:NN`` depends on ``run:NN``; everything else is independent, so up to
+``--workers`` tasks run at once.  A task is skipped when the content hashes of
+its inputs (for ``run:NN`` also the model and server from OLLAMA_MODEL_NAME /
+OLLAMA_API_BASE) match the last successful run and its outputs still exist
+(state is kept in ``.cache/run_all_state.json``).  A wall-clock summary is printed at
+the end.
+
+Usage:
+    python run_all.py                    # all examples, 4 workers
+    python run_all.py 01 04 --workers 2  # a subset
+    python run_all.py --force            # ignore the recorded hashes
+"""
+
+import argparse
+import ast
+import glob
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BASE_DIR)
+RESPONSES = os.path.join(BASE_DIR, 'responses')
+STATE_PATH = os.path.join(ROOT_DIR, '.cache', 'run_all_state.json')
+# Directories searched, in order, for the local modules a script imports.
+MODULE_ROOTS = [BASE_DIR, ROOT_DIR]
+sys.path.append(ROOT_DIR)
+
+from utils.lm_config import lm_settings
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _resolve_module(name):
+    """Path of the repo module (or package ``__init__``) ``name`` refers to, else None."""
+    parts = name.split('.')
+    for root in MODULE_ROOTS:
+        base = os.path.join(root, *parts)
+        for path in (base + '.py', os.path.join(base, '__init__.py')):
+            if os.path.isfile(path):
+                return path
+    return None
+
+
+def local_inputs(script):
+    """``script`` plus every repo module it imports, followed transitively.
+
+    Imports inside functions count too (several examples import lazily), and
+    ``from utils import x`` resolves ``utils/x.py``.  Third-party and stdlib
+    modules are not found under MODULE_ROOTS and are ignored.
+    """
+    seen = []
+    pending = [os.path.abspath(script)]
+    while pending:
+        path = pending.pop()
+        if path in seen:
+            continue
+        seen.append(path)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                tree = ast.parse(f.read(), filename=path)
+        except (OSError, SyntaxError):
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+            else:
+                continue
+            for name in names:
+                found = _resolve_module(name)
+                if found and found not in seen:
+                    pending.append(found)
+    return [seen[0]] + sorted(seen[1:])
+
+
+class Task:
+    """One node of the graph: a command with hashed inputs and expected outputs."""
+
+    def __init__(self, name, command, inputs, outputs, deps=(), settings=None):
+        self.name = name
+        self.command = command
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.deps = list(deps)
+        self.settings = settings
+        self.status = 'pending'
+        self.seconds = 0.0
+        self.log = ''
+
+    def fingerprint(self):
+        """Hash of the command, its settings and the content of every input (missing inputs hash as absent)."""
+        digest = hashlib.sha256(json.dumps([self.command, self.settings]).encode('utf-8'))
+        for path in self.inputs:
+            rel = os.path.relpath(path, ROOT_DIR)
+            digest.update(f"{rel}={file_hash(path) if os.path.exists(path) else 'missing'}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def run(self):
+        start = time.perf_counter()
+        proc = subprocess.run(self.command, cwd=BASE_DIR, capture_output=True, text=True)
+        self.seconds = time.perf_counter() - start
+        self.log = proc.stdout + proc.stderr
+        return proc.returncode == 0
+
+
+def build_tasks(python, only=None):
+    """run:NN / viz:NN tasks for every numbered example (or just the ``only`` numbers)."""
+    tasks = {}
+    for script in sorted(glob.glob(os.path.join(BASE_DIR, '[0-9][0-9]_*.py'))):
+        num = re.match(r'(\d+)_', os.path.basename(script)).group(1)
+        if only and num not in only:
+            continue
+        response = os.path.join(RESPONSES, f"{num}_prompt+response.txt")
+        mapping = os.path.join(RESPONSES, f"{num}_mapping.md")
+        viewer = os.path.join(RESPONSES, f"{num}_mapping_viewer.html")
+        # The model and server (OLLAMA_MODEL_NAME / OLLAMA_API_BASE) decide the response too.
+        tasks[f"run:{num}"] = Task(f"run:{num}", [python, script], local_inputs(script), [response],
+                                   settings={'lm': lm_settings()})
+        if os.path.exists(mapping):
+            visualizer = os.path.join(BASE_DIR, 'visualizer.py')
+            tasks[f"viz:{num}"] = Task(
+                f"viz:{num}", [python, visualizer, script, response, mapping, viewer],
+                [script, response, mapping] + local_inputs(visualizer), [viewer], deps=[f"run:{num}"],
+            )
+        else:
+            print(f"Warning: {mapping} not found, skipping mapping visualization.")
+    return tasks
+
+
+def load_state():
+    try:
+        with open(STATE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    tmp = STATE_PATH + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp, STATE_PATH)
+
+
+def run_graph(tasks, workers=4, force=False, verbose=False):
+    """Run ``tasks`` respecting ``deps``; returns the wall-clock seconds.
+
+    Each task's fingerprint is taken when it becomes ready, i.e. after its
+    dependencies have (re)written their outputs.
+    """
+    state = {} if force else load_state()
+    state_lock = threading.Lock()
+
+    def execute(task):
+        fingerprint = task.fingerprint()
+        if (state.get(task.name) == fingerprint
+                and all(os.path.exists(p) for p in task.outputs)):
+            task.status = 'skipped'
+            return task
+        print(f"[start] {task.name}")
+        task.status = 'ok' if task.run() else 'failed'
+        with state_lock:
+            if task.status == 'ok':
+                state[task.name] = fingerprint
+            else:
+                state.pop(task.name, None)
+        if verbose or task.status == 'failed':
+            print(f"---- {task.name} output ----\n{task.log.rstrip()}")
+        print(f"[{task.status}] {task.name} {task.seconds:.2f}s")
+        return task
+
+    os.makedirs(RESPONSES, exist_ok=True)
+    start = time.perf_counter()
+    waiting = dict(tasks)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        running = set()
+        while waiting or running:
+            for name, task in list(waiting.items()):
+                dep_status = [tasks[d].status for d in task.deps if d in tasks]
+                if any(s in ('failed', 'blocked') for s in dep_status):
+                    task.status = 'blocked'
+                    del waiting[name]
+                elif all(s in ('ok', 'skipped') for s in dep_status):
+                    running.add(pool.submit(execute, task))
+                    del waiting[name]
+            if not running:
+                break
+            done, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                future.result()
+    wall = time.perf_counter() - start
+
+    if force:
+        state = {**load_state(), **state}
+    save_state(state)
+    return wall
+
+
+def print_summary(tasks, wall):
+    print(f"\n{'task':10} {'status':8} {'seconds':>8}")
+    for name in sorted(tasks, key=lambda n: (n.split(':')[1], n)):
+        task = tasks[name]
+        print(f"{name:10} {task.status:8} {task.seconds:8.2f}")
+    counts = {}
+    for task in tasks.values():
+        counts[task.status] = counts.get(task.status, 0) + 1
+    serial = sum(t.seconds for t in tasks.values())
+    print(f"\nWall clock {wall:.2f}s (task time {serial:.2f}s) "
+          + ' '.join(f"{k}={v}" for k, v in sorted(counts.items())))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the visualization examples as a parallel task graph.")
+    parser.add_argument("examples", nargs="*", help="Example numbers to run (default: all)")
+    parser.add_argument("--workers", type=int, default=4, help="Tasks run concurrently")
+    parser.add_argument("--force", action="store_true", help="Re-run tasks even if their inputs are unchanged")
+    parser.add_argument("--python", default=sys.executable, help="Interpreter used for every task")
+    parser.add_argument("--verbose", action="store_true", help="Print each task's output")
+    args = parser.parse_args()
+
+    tasks = build_tasks(args.python, set(args.examples) or None)
+    wall = run_graph(tasks, workers=args.workers, force=args.force, verbose=args.verbose)
+    print_summary(tasks, wall)
+    print(f"\nResponses and viewers are in {RESPONSES}")
+    sys.exit(1 if any(t.status in ('failed', 'blocked') for t in tasks.values()) else 0)
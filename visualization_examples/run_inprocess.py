@@ -0,0 +1,203 @@
+"""Run the numbered examples inside one Python process.
+
+``run_all.sh`` / ``run_all.py`` start a fresh interpreter per example, so each
+one pays for ``import dspy`` and its own LM client again.  This runner imports
+dspy once, loads every example as a module and calls its ``main()``, in turn
+or on ``--workers`` threads.  All examples share one configured LM: each gets
+``lm.copy()``, which keeps the provider client (and its connection pool) but
+has its own history, so ``save_response`` still records that example's call.
+
+Per-example startup (module load) is reported, and ``--compare`` also times
+the subprocess approach (interpreter start + imports + module body) for each
+example.
+
+Usage:
+    python run_inprocess.py                   # all examples, one after another
+    python run_inprocess.py 01 02 --workers 4 --viz
+    python run_inprocess.py --compare --no-run
+"""
+
+import argparse
+import contextlib
+import glob
+import importlib.util
+import io
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BASE_DIR))
+
+_start = time.perf_counter()
+import dspy
+DSPY_IMPORT_SECONDS = time.perf_counter() - _start
+
+from utils.lm_config import lm_from_env
+
+# Imports an example without running main(), for the subprocess comparison.
+PROBE = "import runpy, sys; runpy.run_path(sys.argv[1], run_name='__probe__')"
+
+
+class ThreadLocalStdout:
+    """sys.stdout replacement that lets each thread capture its own output."""
+
+    def __init__(self, default):
+        self.default = default
+        self._local = threading.local()
+
+    def _target(self):
+        stack = getattr(self._local, 'stack', None)
+        return stack[-1] if stack else self.default
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    @contextlib.contextmanager
+    def capture(self, stream):
+        stack = self._local.__dict__.setdefault('stack', [])
+        stack.append(stream)
+        try:
+            yield stream
+        finally:
+            stack.pop()
+
+    def __getattr__(self, name):
+        return getattr(self.default, name)
+
+
+def example_scripts(only=None):
+    scripts = []
+    for path in sorted(glob.glob(os.path.join(BASE_DIR, '[0-9][0-9]_*.py'))):
+        num = re.match(r'(\d+)_', os.path.basename(path)).group(1)
+        if not only or num in only:
+            scripts.append((num, path))
+    return scripts
+
+
+def load_example(num, path):
+    """Import an example as module ``example_NN``; returns (module, seconds)."""
+    start = time.perf_counter()
+    spec = importlib.util.spec_from_file_location(f"example_{num}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module, time.perf_counter() - start
+
+
+def subprocess_startup(path, python=sys.executable):
+    """Seconds for a fresh interpreter to import dspy and load ``path`` (without main())."""
+    start = time.perf_counter()
+    subprocess.run([python, '-c', PROBE, path], cwd=BASE_DIR, capture_output=True, check=True)
+    return time.perf_counter() - start
+
+
+def run_example(num, module, shared_lm, viz=False, capture=None):
+    """Call ``module.main()`` with its own copy of the shared LM; returns a result dict.
+
+    ``result['program']`` is whatever ``main()`` returned (the few-shot and
+    optimizer examples return the program they ran).
+    """
+    result = {'example': num, 'status': 'ok', 'seconds': 0.0, 'error': None, 'program': None}
+    lm = shared_lm.copy()
+    module.lm = lm  # main() passes the module-level lm to save_response
+    start = time.perf_counter()
+    output = contextlib.nullcontext() if capture is None else sys.stdout.capture(capture)
+    try:
+        with output, dspy.context(lm=lm):
+            result['program'] = module.main()
+            if viz:
+                render_viewer(num, module.__file__)
+    except BaseException as e:
+        if isinstance(e, KeyboardInterrupt):
+            raise
+        result['status'] = 'failed'
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def render_viewer(num, script_path):
+    import visualizer
+    responses = os.path.join(BASE_DIR, 'responses')
+    mapping = os.path.join(responses, f"{num}_mapping.md")
+    if os.path.exists(mapping):
+        visualizer.create_visualization(script_path, os.path.join(responses, f"{num}_prompt+response.txt"),
+                                        mapping, os.path.join(responses, f"{num}_mapping_viewer.html"))
+
+
+def run_all(modules, shared_lm, workers=1, viz=False):
+    """Run every loaded example; returns results in input order."""
+    if workers <= 1:
+        return [run_example(num, module, shared_lm, viz) for num, module in modules]
+
+    original = sys.stdout
+    sys.stdout = ThreadLocalStdout(original)
+    lock = threading.Lock()
+
+    def run(num, module):
+        buffer = io.StringIO()
+        result = run_example(num, module, shared_lm, viz, capture=buffer)
+        with lock:  # print each example's output in one piece
+            original.write(f"---- {num} ({result['status']}, {result['seconds']:.2f}s) ----\n")
+            original.write(buffer.getvalue())
+            original.flush()
+        return result
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(lambda item: run(*item), modules))
+    finally:
+        sys.stdout = original
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the numbered DSPy examples in one process.")
+    parser.add_argument("examples", nargs="*", help="Example numbers to run (default: all)")
+    parser.add_argument("--workers", type=int, default=1, help="Examples run concurrently (threads)")
+    parser.add_argument("--viz", action="store_true", help="Also render each mapping viewer")
+    parser.add_argument("--compare", action="store_true", help="Also time a subprocess start for each example")
+    parser.add_argument("--no-run", action="store_true", help="Only measure startup, do not call main()")
+    args = parser.parse_args()
+
+    modules, startup = [], {}
+    for num, path in example_scripts(set(args.examples) or None):
+        module, seconds = load_example(num, path)
+        modules.append((num, module))
+        startup[num] = seconds
+    # The first example installed its (still unbuilt) LazyLM as default; the shared LM replaces it.
+    shared_lm = lm_from_env()
+    dspy.configure(lm=shared_lm)
+
+    results = {}
+    wall = 0.0
+    if not args.no_run:
+        start = time.perf_counter()
+        results = {r['example']: r for r in run_all(modules, shared_lm, args.workers, args.viz)}
+        wall = time.perf_counter() - start
+
+    scripts = dict(example_scripts(set(args.examples) or None))
+    spawned = {num: subprocess_startup(scripts[num]) for num, _ in modules} if args.compare else {}
+
+    print(f"\nimport dspy (once): {DSPY_IMPORT_SECONDS:.2f}s")
+    print(f"{'example':8} {'in-process start':>17} {'subprocess start':>17} {'run':>8} status")
+    for num, _ in modules:
+        result = results.get(num, {})
+        sub = f"{spawned[num]:17.3f}" if num in spawned else f"{'-':>17}"
+        run = f"{result['seconds']:8.2f}" if result else f"{'-':>8}"
+        print(f"{num:8} {startup[num]:17.3f} {sub} {run} {result.get('status', '-')}"
+              + (f"  {result['error']}" if result.get('error') else ''))
+    total_in = DSPY_IMPORT_SECONDS + sum(startup.values())
+    line = f"\nStartup total: in-process {total_in:.2f}s (incl. one dspy import)"
+    if spawned:
+        line += f", subprocesses {sum(spawned.values()):.2f}s"
+    print(line)
+    if results:
+        print(f"Run wall clock: {wall:.2f}s with {args.workers} worker(s)")
+    sys.exit(1 if any(r['status'] != 'ok' for r in results.values()) else 0)
@@ -1,8 +1,10 @@
 import argparse
 import os
 import json
+import hashlib
 import html
 import re
+import tempfile
 
 
 def _parse_span(pos_str, len_str, fallback_length=0):
@@ -104,41 +106,9 @@ def parse_markdown_table(markdown_content):
     return groups, headers
 
 
-def create_visualization(file1_path, file2_path, markdown_path, output_html_path):
-    if not os.path.exists(markdown_path):
-        print(f"Error: Markdown file not found: {markdown_path}")
-        return
-
-    # Read mapping groups from Markdown
-    with open(markdown_path, 'r', encoding='utf-8') as f:
-        markdown_content = f.read()
-
-    groups, fieldnames = parse_markdown_table(markdown_content)
-
-    if not groups:
-        print(f"Error: No mapping table found in {markdown_path}")
-        return
-
-    # Read Files
-    def read_file_lines(path):
-        if not os.path.exists(path):
-            return []
-        with open(path, 'r', encoding='utf-8') as f:
-            return [line.rstrip('\n') for line in f.readlines()]
-
-    f1_lines = read_file_lines(file1_path)
-    f2_lines = read_file_lines(file2_path)
-
-    template = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>DSPy Visualizer</title>
-    <script src="https://cdn.jsdelivr.net/npm/leader-line-new@1.1.9/leader-line.min.js"></script>
-    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;600&family=Fira+Code&display=swap" rel="stylesheet">
-    <style>
+# Viewer code shared by every page.  By default it is written once per output
+# directory as content-hashed viewer.<hash>.css / .js files (see write_assets).
+VIEWER_CSS = """
         :root {
             --bg-color: #0f172a;
             --panel-bg: #1e293b;
@@ -281,6 +251,23 @@ def create_visualization(file1_path, file2_path, markdown_path, output_html_path
             box-shadow: 0 0 8px currentColor;
         }
 
+        /* Connector arrows (one SVG over the whole page) */
+        #connector-layer {
+            position: fixed;
+            top: 0;
+            left: 0;
+            width: 100vw;
+            height: 100vh;
+            pointer-events: none;
+            z-index: 100;
+        }
+
+        #connector-layer path {
+            fill: none;
+            stroke-linecap: round;
+            stroke-linejoin: round;
+        }
+
         /* Context Menu */
         #context-menu {
             position: absolute;
@@ -311,6 +298,24 @@ def create_visualization(file1_path, file2_path, markdown_path, output_html_path
             line-height: 1.5;
         }
 
+        /* Timing overlay (press "t" or open with #timing) */
+        #timing-overlay {
+            position: fixed;
+            right: 12px;
+            bottom: 12px;
+            background: rgba(15, 23, 42, 0.92);
+            border: 1px solid #334155;
+            border-radius: 6px;
+            padding: 8px 12px;
+            font-family: 'Fira Code', monospace;
+            font-size: 11px;
+            color: #94a3b8;
+            z-index: 1001;
+            display: none;
+            pointer-events: none;
+            white-space: pre;
+        }
+
         .badge {
             font-size: 0.8rem;
             color: #94a3b8;
@@ -322,45 +327,27 @@ def create_visualization(file1_path, file2_path, markdown_path, output_html_path
         ::selection {
             background: rgba(56, 189, 248, 0.3);
         }
-    </style>
-</head>
-<body>
-    <header>
-        <h1>DSPy Visualizer: TITLE_PLACEHOLDER <span class="badge" id="match-count"></span></h1>
-        <div class="controls">
-            <button class="btn" onclick="toggleAll()">Toggle All Arrows</button>
-        </div>
-    </header>
-
-    <div class="main-container">
-        <div class="file-panel">
-            <div class="panel-header">FILE1_NAME</div>
-            <div class="code-view" id="file1-container"></div>
-        </div>
-
-        <div class="file-panel">
-            <div class="panel-header">FILE2_NAME</div>
-            <div class="code-view" id="file2-container"></div>
-        </div>
-    </div>
-
-    <!-- Context Menu for Match Actions -->
-    <div id="context-menu">
-        <button class="btn danger" onclick="deleteGroup(currentContextGroupId)">Delete Mapping</button>
-    </div>
+"""
 
-    <!-- Tooltip for mapping details -->
-    <div id="tooltip"></div>
+VIEWER_JS = """
+        // Data injected per viewer (VIEWER_DATA, defined in the page)
+        let groups = VIEWER_DATA.groups;
+        const file1Lines = VIEWER_DATA.file1Lines;
+        const file2Lines = VIEWER_DATA.file2Lines;
 
-    <script>
-        // Data injected from Python
-        let groups = GROUPS_DATA;
-        const file1Lines = FILE1_LINES;
-        const file2Lines = FILE2_LINES;
+        const BLOCK_LINES = 50;          // lines per rendered block
+        const VIRTUAL_MIN_LINES = 1000;  // smaller files are rendered in full
+        const BUFFER_PX = 800;           // blocks this close to the viewport stay rendered
 
-        let leaderLines = {}; // gid -> [{line: LeaderLine, el2: Element}]
+        let connectors = {}; // gid -> [{connector: Connector, el2: Element}]
         let allVisible = false;
+        let pinnedGroups = new Set(); // groups whose arrows stay visible
         let currentContextGroupId = null;
+        let views = {}; // fileNum -> {container, linesArr, lineHighlights, blocks, observer}
+        let groupsById = {};
+        let linesReady = false;
+        let totalArrows = 0;
+        let timings = []; // most recent first: {name, scriptMs, frameMs, detail}
 
         function escapeHtml(text) {
             if (!text) return "";
@@ -413,12 +400,8 @@ def create_visualization(file1_path, file2_path, markdown_path, output_html_path
             return spans;
         }
 
-        // Render a single file panel
-        function renderFile(fileNum, linesArr, containerId) {
-            const container = document.getElementById(containerId);
-            container.innerHTML = '';
-
-            // Build per-line highlights from groups
+        // Per-line highlight entries of one file, keyed by line number
+        function buildLineHighlights(fileNum, linesArr) {
             const lineHighlights = {};
 
             function addHighlight(lineNum, entry) {
@@ -453,102 +436,199 @@ def create_visualization(file1_path, file2_path, markdown_path, output_html_path
                 }
             });
 
-            linesArr.forEach((lineText, idx) => {
-                const lineNum = idx + 1;
-                const div = document.createElement('div');
-                div.className = 'code-line';
-                div.dataset.line = lineNum;
-                div.dataset.file = fileNum;
-
-                const highlights = lineHighlights[lineNum];
-                if (highlights) {
-                    const sorted = highlights.sort((a, b) => a.col - b.col);
-
-                    // Build character-level group assignments for overlap detection
-                    // charGroups[i] = array of highlight entries covering char at position i
-                    const charGroups = new Array(lineText.length).fill(null).map(() => []);
-                    sorted.forEach(h => {
-                        const start = h.col - 1;
-                        let len = h.length;
-                        if (start + len > lineText.length) len = lineText.length - start;
-                        for (let i = start; i < start + len; i++) {
-                            charGroups[i].push(h);
-                        }
-                    });
+            return lineHighlights;
+        }
 
-                    // Find which groupIds actually overlap with at least one other group
-                    const overlappingGroups = new Set();
-                    for (let i = 0; i < lineText.length; i++) {
-                        if (charGroups[i].length > 1) {
-                            charGroups[i].forEach(h => overlappingGroups.add(h.groupId));
-                        }
+        // Render one line (with its highlight spans) into a new element
+        function renderLine(fileNum, lineNum, lineText, highlights) {
+            const div = document.createElement('div');
+            div.className = 'code-line';
+            div.dataset.line = lineNum;
+            div.dataset.file = fileNum;
+
+            if (highlights) {
+                const sorted = highlights.sort((a, b) => a.col - b.col);
+
+                // Build character-level group assignments for overlap detection
+                // charGroups[i] = array of highlight entries covering char at position i
+                const charGroups = new Array(lineText.length).fill(null).map(() => []);
+                sorted.forEach(h => {
+                    const start = h.col - 1;
+                    let len = h.length;
+                    if (start + len > lineText.length) len = lineText.length - start;
+                    for (let i = start; i < start + len; i++) {
+                        charGroups[i].push(h);
                     }
+                });
 
-                    // Assign color index only to groups that overlap; others stay at index 0 (default blue)
-                    const groupColorMap = {};
-                    let colorCounter = 1; // 0 reserved for non-overlapping default
-                    overlappingGroups.forEach(gid => {
-                        groupColorMap[gid] = colorCounter++;
-                    });
+                // Find which groupIds actually overlap with at least one other group
+                const overlappingGroups = new Set();
+                for (let i = 0; i < lineText.length; i++) {
+                    if (charGroups[i].length > 1) {
+                        charGroups[i].forEach(h => overlappingGroups.add(h.groupId));
+                    }
+                }
 
-                    // Walk character positions and emit spans for contiguous regions with same group set
-                    let htmlContent = "";
-                    let i = 0;
-                    while (i < lineText.length) {
-                        const cur = charGroups[i];
-                        if (cur.length === 0) {
-                            // Find end of plain region
-                            let j = i + 1;
-                            while (j < lineText.length && charGroups[j].length === 0) j++;
-                            htmlContent += escapeHtml(lineText.substring(i, j));
-                            i = j;
-                        } else {
-                            // Find end of region with same group set signature
-                            const sig = cur.map(h => h.groupId).sort().join(',');
-                            let j = i + 1;
-                            while (j < lineText.length) {
-                                const nsig = charGroups[j].map(h => h.groupId).sort().join(',');
-                                if (nsig !== sig) break;
-                                j++;
-                            }
-
-                            const segText = lineText.substring(i, j);
-                            const isMulti = cur.length > 1;
-
-                            // Use first highlight's metadata for id/events; list all group ids
-                            const primary = cur[0];
-                            const allGids = cur.map(h => h.groupId).join(' ');
-                            const allLabels = cur.map(h => h.label).join(' | ');
-
-                            let classes = 'match-span';
-                            if (isMulti) {
-                                classes += ' overlap-multi';
-                            } else {
-                                const colorIdx = (groupColorMap[primary.groupId] ?? 0) % 6;
-                                classes += ` overlap-${colorIdx}`;
-                            }
-
-                            // Build data attrs and click handler for all groups
-                            const onclickHandlers = cur.map(h => `handleGroupClick(event, '${h.groupId}')`).join('; ');
-                            htmlContent += `<span id="${primary.spanId}" class="${classes}" data-group-ids="${allGids}" data-group-id="${primary.groupId}" title="${escapeHtml(allLabels)}" onclick="${onclickHandlers}">${escapeHtml(segText)}</span>`;
-
-                            // Also emit hidden zero-width anchors for non-primary spans so LeaderLine can find them
-                            cur.slice(1).forEach(h => {
-                                htmlContent += `<span id="${h.spanId}" data-group-id="${h.groupId}" style="display:inline;width:0;height:0;overflow:hidden;position:absolute"></span>`;
-                            });
+                // Assign color index only to groups that overlap; others stay at index 0 (default blue)
+                const groupColorMap = {};
+                let colorCounter = 1; // 0 reserved for non-overlapping default
+                overlappingGroups.forEach(gid => {
+                    groupColorMap[gid] = colorCounter++;
+                });
 
-                            i = j;
+                // Walk character positions and emit spans for contiguous regions with same group set
+                let htmlContent = "";
+                let i = 0;
+                while (i < lineText.length) {
+                    const cur = charGroups[i];
+                    if (cur.length === 0) {
+                        // Find end of plain region
+                        let j = i + 1;
+                        while (j < lineText.length && charGroups[j].length === 0) j++;
+                        htmlContent += escapeHtml(lineText.substring(i, j));
+                        i = j;
+                    } else {
+                        // Find end of region with same group set signature
+                        const sig = cur.map(h => h.groupId).sort().join(',');
+                        let j = i + 1;
+                        while (j < lineText.length) {
+                            const nsig = charGroups[j].map(h => h.groupId).sort().join(',');
+                            if (nsig !== sig) break;
+                            j++;
                         }
+
+                        const segText = lineText.substring(i, j);
+                        const isMulti = cur.length > 1;
+
+                        // Use first highlight's metadata for id/events; list all group ids
+                        const primary = cur[0];
+                        const allGids = cur.map(h => h.groupId).join(' ');
+                        const allLabels = cur.map(h => h.label).join(' | ');
+
+                        let classes = 'match-span';
+                        if (isMulti) {
+                            classes += ' overlap-multi';
+                        } else {
+                            const colorIdx = (groupColorMap[primary.groupId] ?? 0) % 6;
+                            classes += ` overlap-${colorIdx}`;
+                        }
+
+                        // Build data attrs and click handler for all groups
+                        const onclickHandlers = cur.map(h => `handleGroupClick(event, '${h.groupId}')`).join('; ');
+                        htmlContent += `<span id="${primary.spanId}" class="${classes}" data-group-ids="${allGids}" data-group-id="${primary.groupId}" title="${escapeHtml(allLabels)}" onclick="${onclickHandlers}">${escapeHtml(segText)}</span>`;
+
+                        // Also emit hidden zero-width anchors for non-primary spans so connectors can find them
+                        cur.slice(1).forEach(h => {
+                            htmlContent += `<span id="${h.spanId}" data-group-id="${h.groupId}" style="display:inline;width:0;height:0;overflow:hidden;position:absolute"></span>`;
+                        });
+
+                        i = j;
                     }
-                    if (i < lineText.length) htmlContent += escapeHtml(lineText.substring(i));
+                }
+                if (i < lineText.length) htmlContent += escapeHtml(lineText.substring(i));
 
-                    div.innerHTML = htmlContent;
+                div.innerHTML = htmlContent;
+            } else {
+                div.innerHTML = escapeHtml(lineText);
+            }
+            return div;
+        }
+
+        // Measure line height and characters per row to size blocks that are not rendered
+        function measureView(view) {
+            const probe = document.createElement('div');
+            probe.className = 'code-line';
+            probe.innerHTML = '<span>M</span>';
+            view.container.appendChild(probe);
+            const style = getComputedStyle(view.container);
+            const width = view.container.clientWidth - parseFloat(style.paddingLeft) - parseFloat(style.paddingRight);
+            view.lineHeight = probe.offsetHeight || 21;
+            view.charsPerRow = Math.max(1, Math.floor(width / (probe.firstChild.getBoundingClientRect().width || 8)));
+            probe.remove();
+        }
+
+        function estimateBlockHeight(view, block) {
+            let rows = 0;
+            for (let ln = block.start; ln < block.end; ln++) {
+                rows += Math.max(1, Math.ceil(view.linesArr[ln].length / view.charsPerRow));
+            }
+            return rows * view.lineHeight;
+        }
+
+        function fillBlock(view, block) {
+            const frag = document.createDocumentFragment();
+            for (let ln = block.start; ln < block.end; ln++) {
+                frag.appendChild(renderLine(view.fileNum, ln + 1, view.linesArr[ln], view.lineHighlights[ln + 1]));
+            }
+            block.el.style.height = '';
+            block.el.appendChild(frag);
+            block.rendered = true;
+            block.el.querySelectorAll('.match-span').forEach(bindSpan);
+        }
+
+        function emptyBlock(block) {
+            // Keep the measured height so the scroll position does not jump
+            block.el.style.height = block.el.offsetHeight + 'px';
+            block.el.innerHTML = '';
+            block.rendered = false;
+        }
+
+        // Render a single file panel.  Lines are grouped into blocks of BLOCK_LINES;
+        // in large files only blocks within BUFFER_PX of the viewport are rendered,
+        // the others are empty placeholders of the same height.
+        function renderFile(fileNum, linesArr, containerId) {
+            const container = document.getElementById(containerId);
+            container.innerHTML = '';
+
+            const view = {
+                fileNum, linesArr, container, blocks: [], observer: null,
+                lineHighlights: buildLineHighlights(fileNum, linesArr), groupLines: {},
+            };
+            views[fileNum] = view;
+            // gid -> line numbers holding its spans, for updates that touch one group
+            Object.entries(view.lineHighlights).forEach(([lineNum, entries]) => {
+                entries.forEach(h => {
+                    if (!view.groupLines[h.groupId]) view.groupLines[h.groupId] = new Set();
+                    view.groupLines[h.groupId].add(Number(lineNum));
+                });
+            });
+            const virtual = linesArr.length >= VIRTUAL_MIN_LINES && 'IntersectionObserver' in window;
+            if (virtual) measureView(view);
+
+            for (let start = 0; start < linesArr.length; start += BLOCK_LINES) {
+                const block = {
+                    start, end: Math.min(start + BLOCK_LINES, linesArr.length),
+                    el: document.createElement('div'), rendered: false, groupIds: new Set(),
+                };
+                block.el.className = 'code-block';
+                block.el.dataset.block = view.blocks.length;
+                for (let ln = block.start; ln < block.end; ln++) {
+                    (view.lineHighlights[ln + 1] || []).forEach(h => block.groupIds.add(h.groupId));
+                }
+                if (virtual) {
+                    block.el.style.height = estimateBlockHeight(view, block) + 'px';
                 } else {
-                    div.innerHTML = escapeHtml(lineText);
+                    fillBlock(view, block);
                 }
+                view.blocks.push(block);
+                container.appendChild(block.el);
+            }
 
-                container.appendChild(div);
-            });
+            if (virtual) {
+                view.observer = new IntersectionObserver(entries => {
+                    const touched = new Set();
+                    entries.forEach(entry => {
+                        const block = view.blocks[entry.target.dataset.block];
+                        if (entry.isIntersecting === block.rendered) return;
+                        if (entry.isIntersecting) fillBlock(view, block);
+                        else emptyBlock(block);
+                        block.groupIds.forEach(gid => touched.add(gid));
+                    });
+                    // Arrows of groups whose spans appeared or went away
+                    if (linesReady) touched.forEach(connectGroup);
+                }, { root: container, rootMargin: `${BUFFER_PX}px 0px` });
+                view.blocks.forEach(block => view.observer.observe(block.el));
+            }
         }
 
         function showTooltip(gid, el) {
@@ -606,80 +686,243 @@ def create_visualization(file1_path, file2_path, markdown_path, output_html_path
             document.getElementById('tooltip').style.display = 'none';
         }
 
+        // One SVG layer holds every connector.  Changes only mark the layer dirty; the
+        // paths are recomputed in a single requestAnimationFrame pass that reads all
+        // positions first, then writes, and skips connectors with an end off-screen.
+        const SVG_NS = 'http://www.w3.org/2000/svg';
+        const liveConnectors = new Set();
+        let connectorFrame = null;
+
+        class Connector {
+            constructor(el1, el2, options) {
+                this.el1 = el1;
+                this.el2 = el2;
+                this.color = options.color;
+                this.size = options.size;
+                this.visible = !options.hide;
+                this.path = null;
+                liveConnectors.add(this);
+                scheduleConnectors();
+            }
+
+            show() { this.visible = true; scheduleConnectors(); }
+
+            hide() { this.visible = false; scheduleConnectors(); }
+
+            setOptions(options) {
+                if (options.color) this.color = options.color;
+                if (options.size) this.size = options.size;
+                scheduleConnectors();
+            }
+
+            remove() {
+                liveConnectors.delete(this);
+                if (this.path) this.path.remove();
+            }
+        }
+
+        function scheduleConnectors() {
+            if (connectorFrame === null) connectorFrame = requestAnimationFrame(drawConnectors);
+        }
+
+        // The on-screen part of a panel, or null if el is not in a rendered panel
+        function visibleRect(el, panelRects) {
+            const panel = el.closest('.code-view');
+            if (!panel || !el.isConnected) return null;
+            if (!panelRects.has(panel)) panelRects.set(panel, panel.getBoundingClientRect());
+            return panelRects.get(panel);
+        }
+
+        function drawConnectors() {
+            connectorFrame = null;
+            const layer = document.getElementById('connector-layer');
+            const panelRects = new Map();
+            const updates = [];
+
+            // Read phase: layout is queried only here
+            liveConnectors.forEach(c => {
+                if (!c.visible) { updates.push([c, null]); return; }
+                const p1 = visibleRect(c.el1, panelRects), p2 = visibleRect(c.el2, panelRects);
+                if (!p1 || !p2) { updates.push([c, null]); return; }
+                const r1 = c.el1.getBoundingClientRect(), r2 = c.el2.getBoundingClientRect();
+                const y1 = (r1.top + r1.bottom) / 2, y2 = (r2.top + r2.bottom) / 2;
+                if (y1 < p1.top || y1 > p1.bottom || y2 < p2.top || y2 > p2.bottom) { updates.push([c, null]); return; }
+                updates.push([c, [r1.right, y1, r2.left, y2]]);
+            });
+
+            // Write phase: curved path from the right of the source to the left of the target
+            updates.forEach(([c, pts]) => {
+                if (!pts) {
+                    if (c.path) c.path.style.display = 'none';
+                    return;
+                }
+                if (!c.path) {
+                    c.path = document.createElementNS(SVG_NS, 'path');
+                    layer.appendChild(c.path);
+                }
+                const [x1, y1, x2, y2] = pts;
+                const bend = Math.max(40, Math.abs(x2 - x1) / 2);
+                const head = 4 + 2 * c.size;
+                c.path.setAttribute('d',
+                    `M ${x1} ${y1} C ${x1 + bend} ${y1}, ${x2 - bend} ${y2}, ${x2} ${y2} ` +
+                    `M ${x2 - head} ${y2 - head * 0.6} L ${x2} ${y2} L ${x2 - head} ${y2 + head * 0.6}`);
+                c.path.setAttribute('stroke', c.color);
+                c.path.setAttribute('stroke-width', c.size);
+                c.path.style.display = '';
+            });
+        }
+
+        // The element an arrow attaches to: the first segment of a span, or the first
+        // rendered one when the start of a multi-line span is scrolled out.
+        function findAnchor(prefix) {
+            return document.getElementById(prefix + '0') || document.querySelector(`[id^="${prefix}"]`);
+        }
+
+        // (Re)draw the arrows of one group between whichever of its spans are rendered
+        function connectGroup(gid) {
+            (connectors[gid] || []).forEach(item => item.connector.remove());
+            delete connectors[gid];
+            const g = groupsById[gid];
+            if (!g) return;
+            // Use first segment of File1 span as arrow source
+            const el1 = findAnchor(`group-${gid}-f1-seg`);
+            if (!el1) return;
+
+            const pinned = pinnedGroups.has(gid);
+            const groupItems = [];
+            g.File2_Positions.forEach((_, idx) => {
+                // Use first segment of each File2 span as arrow target
+                const el2 = findAnchor(`group-${gid}-f2-${idx}-seg`);
+                if (el2) {
+                    const connector = new Connector(el1, el2, {
+                        color: 'rgba(56, 189, 248, 0.6)',
+                        size: 2,
+                        hide: !pinned
+                    });
+                    groupItems.push({ connector, el2 });
+                }
+            });
+            connectors[gid] = groupItems;
+        }
+
+        // Hover: show all arrows + tooltip for the span's group
+        function bindSpan(span) {
+            const gid = span.dataset.groupId;
+            if (pinnedGroups.has(gid)) span.classList.add('highlighted');
+            span.onmouseenter = () => {
+                if (pinnedGroups.has(gid)) return;
+                getAllSpansForGroup(gid).forEach(s => s.classList.add('highlighted'));
+                (connectors[gid] || []).forEach(item => {
+                    item.connector.setOptions({ color: 'rgba(56, 189, 248, 1)', size: 3 });
+                    item.connector.show();
+                });
+                showTooltip(gid, span);
+            };
+            span.onmouseleave = () => {
+                if (pinnedGroups.has(gid)) return;
+                getAllSpansForGroup(gid).forEach(s => s.classList.remove('highlighted'));
+                (connectors[gid] || []).forEach(item => {
+                    item.connector.hide();
+                    item.connector.setOptions({ color: 'rgba(56, 189, 248, 0.6)', size: 2 });
+                });
+                hideTooltip();
+            };
+        }
+
         function renderAll() {
-            // Clear existing LeaderLines
-            Object.values(leaderLines).forEach(arr => arr.forEach(item => item.line.remove()));
-            leaderLines = {};
+            // Clear existing connectors and block observers
+            Object.values(connectors).forEach(arr => arr.forEach(item => item.connector.remove()));
+            connectors = {};
+            Object.values(views).forEach(view => view.observer && view.observer.disconnect());
+            linesReady = false;
+            pinnedGroups = new Set(allVisible ? groups.map(g => g.Group_ID) : []);
+            groupsById = {};
+            groups.forEach(g => { groupsById[g.Group_ID] = g; });
 
             renderFile(1, file1Lines, 'file1-container');
             renderFile(2, file2Lines, 'file2-container');
 
-            // Update count badge
-            const totalArrows = groups.reduce((sum, g) => sum + g.File2_Positions.length, 0);
+            totalArrows = groups.reduce((sum, g) => sum + g.File2_Positions.length, 0);
+            updateBadge();
+
+            // Draw connector arrows per group
+            setTimeout(() => {
+                linesReady = true;
+                groups.forEach(g => connectGroup(g.Group_ID));
+            }, 100);
+            return `${file1Lines.length + file2Lines.length} lines, ${groups.length} groups`;
+        }
+
+        function updateBadge() {
             document.getElementById('match-count').textContent =
                 `${groups.length} mappings, ${totalArrows} arrows`;
+        }
 
-            // Draw LeaderLine arrows per group
-            setTimeout(() => {
-                groups.forEach(g => {
-                    const gid = g.Group_ID;
-                    // Use first segment of File1 span as arrow source
-                    const el1 = document.getElementById(`group-${gid}-f1-seg0`);
-                    if (!el1) return;
-
-                    const groupItems = [];
-                    g.File2_Positions.forEach((_, idx) => {
-                        // Use first segment of each File2 span as arrow target
-                        const el2 = document.getElementById(`group-${gid}-f2-${idx}-seg0`);
-                        if (el2) {
-                            const line = new LeaderLine(el1, el2, {
-                                color: 'rgba(56, 189, 248, 0.6)',
-                                size: 2,
-                                path: 'curved',
-                                startSocket: 'right',
-                                endSocket: 'left',
-                                hide: !allVisible
-                            });
-                            if (allVisible) line._permanent = true;
-                            groupItems.push({ line, el2 });
-                        }
-                    });
+        // Run an update and record its script time and the time until the next frame
+        function timed(name, update) {
+            const start = performance.now();
+            const detail = update();
+            const scriptMs = performance.now() - start;
+            requestAnimationFrame(() => {
+                timings.unshift({ name, scriptMs, frameMs: performance.now() - start, detail: detail || '' });
+                timings = timings.slice(0, 8);
+                showTimings();
+            });
+        }
 
-                    leaderLines[gid] = groupItems;
+        function showTimings() {
+            const overlay = document.getElementById('timing-overlay');
+            overlay.textContent = timings.map(t =>
+                `${t.name.padEnd(12)} ${t.scriptMs.toFixed(1).padStart(7)} ms script ` +
+                `${t.frameMs.toFixed(1).padStart(7)} ms to frame  ${t.detail}`
+            ).join('\\n');
+        }
 
-                    // Collect all spans in this group for hover/highlight
-                    const allSpans = getAllSpansForGroup(gid);
-                    if (allVisible) {
-                        allSpans.forEach(s => s.classList.add('highlighted'));
-                    }
+        // Re-render the given lines of a file in place (only those whose block is rendered)
+        function rerenderLines(view, lineNums) {
+            let count = 0;
+            lineNums.forEach(lineNum => {
+                const block = view.blocks[Math.floor((lineNum - 1) / BLOCK_LINES)];
+                if (!block.rendered) return;
+                const old = block.el.children[lineNum - 1 - block.start];
+                const div = renderLine(view.fileNum, lineNum, view.linesArr[lineNum - 1], view.lineHighlights[lineNum]);
+                block.el.replaceChild(div, old);
+                div.querySelectorAll('.match-span').forEach(bindSpan);
+                count++;
+            });
+            return count;
+        }
 
-                    // Hover: show all arrows + tooltip for the group
-                    allSpans.forEach(span => {
-                        span.onmouseenter = () => {
-                            const isPermanent = groupItems.length > 0 && groupItems[0].line._permanent;
-                            if (!isPermanent) {
-                                allSpans.forEach(s => s.classList.add('highlighted'));
-                                groupItems.forEach(item => {
-                                    item.line.setOptions({ color: 'rgba(56, 189, 248, 1)', size: 3 });
-                                    item.line.show('draw');
-                                });
-                                showTooltip(gid, span);
-                            }
-                        };
-                        span.onmouseleave = () => {
-                            const isPermanent = groupItems.length > 0 && groupItems[0].line._permanent;
-                            if (!isPermanent) {
-                                allSpans.forEach(s => s.classList.remove('highlighted'));
-                                groupItems.forEach(item => {
-                                    item.line.hide();
-                                    item.line.setOptions({ color: 'rgba(56, 189, 248, 0.6)', size: 2 });
-                                });
-                                hideTooltip();
-                            }
-                        };
-                    });
+        // Remove one group: only the lines holding its spans are re-rendered, and only
+        // the arrows of groups that share those lines are redrawn.
+        function removeGroup(gid) {
+            const g = groupsById[gid];
+            if (!g) return '';
+            groups.splice(groups.indexOf(g), 1);
+            delete groupsById[gid];
+            pinnedGroups.delete(gid);
+            (connectors[gid] || []).forEach(item => item.connector.remove());
+            delete connectors[gid];
+            totalArrows -= g.File2_Positions.length;
+
+            const neighbours = new Set();
+            let lineCount = 0;
+            Object.values(views).forEach(view => {
+                const lineNums = view.groupLines[gid] || new Set();
+                delete view.groupLines[gid];
+                lineNums.forEach(lineNum => {
+                    const entries = view.lineHighlights[lineNum].filter(h => h.groupId !== gid);
+                    if (entries.length) view.lineHighlights[lineNum] = entries;
+                    else delete view.lineHighlights[lineNum];
+                    entries.forEach(h => neighbours.add(h.groupId));
+                    view.blocks[Math.floor((lineNum - 1) / BLOCK_LINES)].groupIds.delete(gid);
                 });
-            }, 100);
+                lineCount += rerenderLines(view, lineNums);
+            });
+            // Their spans were re-created, so the arrows need the new elements
+            if (linesReady) neighbours.forEach(connectGroup);
+            updateBadge();
+            return `${lineCount} lines, ${neighbours.size} groups redrawn`;
         }
 
         function handleGroupClick(e, gid) {
@@ -693,40 +936,54 @@ def create_visualization(file1_path, file2_path, markdown_path, output_html_path
             currentContextGroupId = gid;
 
             // Toggle permanent arrow state for the group
-            const groupItems = leaderLines[gid];
-            if (groupItems && groupItems.length > 0) {
-                const isPermanent = groupItems[0].line._permanent;
-                const allSpans = getAllSpansForGroup(gid);
-
-                if (isPermanent) {
-                    groupItems.forEach(item => {
-                        item.line.hide();
-                        item.line._permanent = false;
-                    });
-                    allSpans.forEach(s => s.classList.remove('highlighted'));
-                    hideTooltip();
-                } else {
-                    groupItems.forEach(item => {
-                        item.line.show('draw');
-                        item.line._permanent = true;
-                    });
-                    allSpans.forEach(s => s.classList.add('highlighted'));
-                }
+            const groupItems = connectors[gid] || [];
+            const allSpans = getAllSpansForGroup(gid);
+            if (pinnedGroups.has(gid)) {
+                pinnedGroups.delete(gid);
+                groupItems.forEach(item => item.connector.hide());
+                allSpans.forEach(s => s.classList.remove('highlighted'));
+                hideTooltip();
+            } else {
+                pinnedGroups.add(gid);
+                groupItems.forEach(item => item.connector.show());
+                allSpans.forEach(s => s.classList.add('highlighted'));
             }
         }
 
         function deleteGroup(gid) {
             if (!confirm('Delete this mapping?')) return;
-            groups = groups.filter(g => g.Group_ID !== gid);
             document.getElementById('context-menu').style.display = 'none';
-            renderAll();
+            hideTooltip();
+            timed('deleteGroup', () => removeGroup(gid));
         }
 
+        // Pin or unpin every group in place; panels and arrows are not rebuilt
         function toggleAll() {
-            allVisible = !allVisible;
-            renderAll();
+            timed('toggleAll', () => {
+                allVisible = !allVisible;
+                pinnedGroups = new Set(allVisible ? groups.map(g => g.Group_ID) : []);
+                let arrows = 0;
+                Object.values(connectors).forEach(arr => arr.forEach(item => {
+                    item.connector.setOptions({ color: 'rgba(56, 189, 248, 0.6)', size: 2 });
+                    if (allVisible) item.connector.show();
+                    else item.connector.hide();
+                    arrows++;
+                }));
+                const spans = document.querySelectorAll('.match-span');
+                spans.forEach(s => s.classList.toggle('highlighted', allVisible));
+                hideTooltip();
+                return `${arrows} arrows, ${spans.length} spans`;
+            });
         }
 
+        document.addEventListener('keydown', (e) => {
+            if (e.key === 't' && !e.ctrlKey && !e.metaKey && !e.altKey) {
+                const overlay = document.getElementById('timing-overlay');
+                overlay.style.display = overlay.style.display === 'block' ? 'none' : 'block';
+            }
+        });
+        if (location.hash === '#timing') document.getElementById('timing-overlay').style.display = 'block';
+
         // Hide context menu on click elsewhere
         document.addEventListener('click', (e) => {
             if (!e.target.closest('.match-span') && !e.target.closest('#context-menu')) {
@@ -734,57 +991,362 @@ def create_visualization(file1_path, file2_path, markdown_path, output_html_path
             }
         });
 
-        // Reposition LeaderLines on scroll/resize
+        // Redraw connectors (at most once per frame) on scroll/resize
         ['file1-container', 'file2-container'].forEach(id => {
             const el = document.getElementById(id);
             if (el) {
-                el.addEventListener('scroll', () => {
-                    Object.values(leaderLines).forEach(arr =>
-                        arr.forEach(item => item.line.position())
-                    );
-                });
+                el.addEventListener('scroll', scheduleConnectors, { passive: true });
             }
         });
 
-        window.addEventListener('resize', () => {
-            Object.values(leaderLines).forEach(arr =>
-                arr.forEach(item => item.line.position())
-            );
-        });
+        window.addEventListener('resize', scheduleConnectors);
+
+        window.onload = () => timed('renderAll', renderAll);
+"""
+
+# Per-viewer page: the data, the labels and links to (or inlined copies of) the assets.
+TEMPLATE = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>DSPy Visualizer</title>
+    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;600&family=Fira+Code&display=swap" rel="stylesheet">
+    STYLESHEET
+</head>
+<body>
+    <header>
+        <h1>DSPy Visualizer: TITLE_PLACEHOLDER <span class="badge" id="match-count"></span></h1>
+        <div class="controls">
+            <button class="btn" onclick="toggleAll()">Toggle All Arrows</button>
+        </div>
+    </header>
+
+    <div class="main-container">
+        <div class="file-panel">
+            <div class="panel-header">FILE1_NAME</div>
+            <div class="code-view" id="file1-container"></div>
+        </div>
 
-        window.onload = renderAll;
+        <div class="file-panel">
+            <div class="panel-header">FILE2_NAME</div>
+            <div class="code-view" id="file2-container"></div>
+        </div>
+    </div>
+
+    <!-- Context Menu for Match Actions -->
+    <div id="context-menu">
+        <button class="btn danger" onclick="deleteGroup(currentContextGroupId)">Delete Mapping</button>
+    </div>
+
+    <!-- Tooltip for mapping details -->
+    <div id="tooltip"></div>
+
+    <!-- Timing of the last updates -->
+    <div id="timing-overlay"></div>
+
+    <!-- All connector arrows are drawn into this one layer -->
+    <svg id="connector-layer"></svg>
+
+    <script>
+        // Data injected from Python
+        const VIEWER_DATA = {"groups": GROUPS_DATA, "file1Lines": FILE1_LINES, "file2Lines": FILE2_LINES};
     </script>
+    VIEWER_SCRIPT
 </body>
 </html>
 """
-    # Inject Data
+
+# Slots filled per viewer.  Data slots are JSON inside <script>; the others are HTML text.
+DATA_SLOTS = ('GROUPS_DATA', 'FILE1_LINES', 'FILE2_LINES')
+TEXT_SLOTS = ('FILE1_NAME', 'FILE2_NAME', 'TITLE_PLACEHOLDER', 'STYLESHEET', 'VIEWER_SCRIPT')
+_JSON = json.JSONEncoder()
+
+
+def compile_template(template):
+    """Split ``template`` once into [static, slot, static, slot, ..., static].
+
+    Only the template is scanned for slot names, so viewer content that
+    happens to contain one (e.g. a response mentioning GROUPS_DATA) is never
+    touched.
+    """
+    slot_re = re.compile('(' + '|'.join(DATA_SLOTS + TEXT_SLOTS) + ')')
+    return slot_re.split(template)
+
+
+def write_script_json(value, write, batch=1024):
+    """Stream ``value`` as JSON that is safe inside <script> (``</`` becomes ``<\\/``).
+
+    Lists are encoded ``batch`` items at a time with the C encoder, so only a
+    slice of a large file is ever held as one string.
+    """
+    if not isinstance(value, list) or len(value) <= batch:
+        write(_JSON.encode(value).replace('</', '<\\/'))
+        return
+    write('[')
+    for start in range(0, len(value), batch):
+        if start:
+            write(', ')
+        write(_JSON.encode(value[start:start + batch])[1:-1].replace('</', '<\\/'))
+    write(']')
+
+
+def render_template(chunks, slots, out):
+    """Write compiled ``chunks`` to ``out`` in one pass, filling each slot from ``slots``."""
+    write = out.write
+    for i, chunk in enumerate(chunks):
+        if i % 2 == 0:
+            write(chunk)
+        elif chunk in DATA_SLOTS:
+            write_script_json(slots[chunk], write)
+        else:
+            write(slots[chunk])
+
+
+TEMPLATE_CHUNKS = compile_template(TEMPLATE)
+
+
+def asset_name(kind, content):
+    """``viewer.<hash>.<kind>``; the name changes whenever the content does."""
+    digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:12]
+    return f"viewer.{digest}.{kind}"
+
+
+def write_atomic(path, write, **open_kwargs):
+    """Call ``write(f)`` on a private temporary file next to ``path``, then move it into place.
+
+    Each call gets its own temporary file, so concurrent writers of the same
+    path never interleave (the last ``os.replace`` wins), and the temporary
+    file is removed if ``write`` fails.
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp',
+                                    dir=os.path.dirname(path) or '.')
     try:
-        groups_json = json.dumps(groups)
+        with os.fdopen(fd, 'w', encoding='utf-8', **open_kwargs) as f:
+            write(f)
+        os.chmod(tmp_path, 0o644)  # mkstemp creates 0600; pages and assets are served as-is
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def write_assets(directory):
+    """Write the shared viewer CSS/JS into ``directory`` unless already there; return their names."""
+    names = {}
+    for kind, content in (('css', VIEWER_CSS), ('js', VIEWER_JS)):
+        name = asset_name(kind, content)
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            write_atomic(path, lambda f: f.write(content))
+        names[kind] = name
+    return names
+
+
+def asset_slots(directory=None, inline=False):
+    """STYLESHEET/VIEWER_SCRIPT slots: links to the shared assets, or the code itself."""
+    if inline:
+        script = VIEWER_JS.replace('</', '<\\/')
+        return {'STYLESHEET': f"<style>{VIEWER_CSS}    </style>",
+                'VIEWER_SCRIPT': f"<script>{script}    </script>"}
+    names = write_assets(directory)
+    return {'STYLESHEET': f'<link rel="stylesheet" href="{names["css"]}">',
+            'VIEWER_SCRIPT': f'<script src="{names["js"]}"></script>'}
+
+
+def prune_assets(directory):
+    """Delete viewer.<hash>.css/.js files in ``directory`` that no viewer page links to any more."""
+    assets = [name for name in os.listdir(directory) if re.fullmatch(r'viewer\.[0-9a-f]{12}\.(css|js)', name)]
+    if not assets:
+        return []
+    used = set()
+    for name in os.listdir(directory):
+        if name.endswith('.html'):
+            with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+                used.update(re.findall(r'viewer\.[0-9a-f]{12}\.(?:css|js)', f.read()))
+    stale = [name for name in assets if name not in used]
+    for name in stale:
+        os.remove(os.path.join(directory, name))
+    return stale
+
+
+def create_visualization(file1_path, file2_path, markdown_path, output_html_path, inline=False):
+    """Render the mapping viewer page.
+
+    The page holds only the data; the viewer CSS/JS are shared
+    ``viewer.<hash>.css/.js`` files next to it, written on first use.  With
+    ``inline=True`` they are embedded instead, for a single self-contained file.
+    """
+    if not os.path.exists(markdown_path):
+        print(f"Error: Markdown file not found: {markdown_path}")
+        return
+
+    # Read mapping groups from Markdown
+    with open(markdown_path, 'r', encoding='utf-8') as f:
+        markdown_content = f.read()
+
+    groups, fieldnames = parse_markdown_table(markdown_content)
+
+    if not groups:
+        print(f"Error: No mapping table found in {markdown_path}")
+        return
+
+    # Read Files
+    def read_file_lines(path):
+        if not os.path.exists(path):
+            return []
+        with open(path, 'r', encoding='utf-8') as f:
+            return [line.rstrip('\n') for line in f.readlines()]
+
+    f1_lines = read_file_lines(file1_path)
+    f2_lines = read_file_lines(file2_path)
+
+    title = f"Match: {os.path.basename(file1_path)} vs {os.path.basename(file2_path)}"
+    slots = {
+        'GROUPS_DATA': groups,
+        'FILE1_LINES': f1_lines,
+        'FILE2_LINES': f2_lines,
+        'FILE1_NAME': html.escape(os.path.basename(file1_path)),
+        'FILE2_NAME': html.escape(os.path.basename(file2_path)),
+        'TITLE_PLACEHOLDER': html.escape(title),
+    }
+
+    output_dir = os.path.dirname(output_html_path) or '.'
+    os.makedirs(output_dir, exist_ok=True)
+    slots.update(asset_slots(output_dir, inline))
+    try:
+        write_atomic(output_html_path, lambda f: render_template(TEMPLATE_CHUNKS, slots, f), buffering=1 << 16)
     except (TypeError, ValueError) as e:
         print(f"Error serializing groups to JSON: {e}")
         return
 
-    html_content = template.replace('GROUPS_DATA', groups_json)
-    html_content = html_content.replace('FILE1_LINES', json.dumps(f1_lines))
-    html_content = html_content.replace('FILE2_LINES', json.dumps(f2_lines))
+    print(f"Visualization created at {output_html_path}")
+    return output_html_path
 
-    html_content = html_content.replace('FILE1_NAME', os.path.basename(file1_path))
-    html_content = html_content.replace('FILE2_NAME', os.path.basename(file2_path))
-    html_content = html_content.replace('TITLE_PLACEHOLDER', f"Match: {os.path.basename(file1_path)} vs {os.path.basename(file2_path)}")
 
-    if os.path.dirname(output_html_path):
-        os.makedirs(os.path.dirname(output_html_path), exist_ok=True)
-    with open(output_html_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+def find_mappings(responses_dir, scripts_dir=None):
+    """(script, response, mapping, viewer) for every ``NN_mapping.md`` in ``responses_dir``."""
+    scripts_dir = scripts_dir or os.path.dirname(os.path.abspath(responses_dir))
+    jobs = []
+    for name in sorted(os.listdir(responses_dir)):
+        match = re.match(r'(\d+)_mapping\.md$', name)
+        if not match:
+            continue
+        num = match.group(1)
+        scripts = sorted(f for f in os.listdir(scripts_dir) if f.startswith(f"{num}_") and f.endswith('.py'))
+        if scripts:
+            jobs.append((os.path.join(scripts_dir, scripts[0]),
+                         os.path.join(responses_dir, f"{num}_prompt+response.txt"),
+                         os.path.join(responses_dir, name),
+                         os.path.join(responses_dir, f"{num}_mapping_viewer.html")))
+    return jobs
+
+
+def create_visualizations(jobs, workers=1, inline=False):
+    """Render many (file1, file2, markdown, output) jobs with the shared compiled template.
+
+    Afterwards, asset bundles from older viewer versions that no page in the
+    output directories links to any more are removed.
+    """
+    if workers <= 1:
+        outputs = [create_visualization(*job, inline=inline) for job in jobs]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        if not inline:
+            # Write the shared assets once here; the workers then only find them.
+            for directory in sorted({os.path.dirname(job[3]) or '.' for job in jobs}):
+                os.makedirs(directory, exist_ok=True)
+                write_assets(directory)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outputs = list(pool.map(create_visualization, *zip(*jobs), [inline] * len(jobs)))
+    for directory in sorted({os.path.dirname(job[3]) or '.' for job in jobs}):
+        for name in prune_assets(directory):
+            print(f"Removed unused {os.path.join(directory, name)}")
+    return outputs
+
+
+def _render_by_replace(slots):
+    """The former renderer (one str.replace per slot), kept for the benchmark."""
+    content = TEMPLATE
+    for name in DATA_SLOTS:
+        content = content.replace(name, json.dumps(slots[name]))
+    for name in TEXT_SLOTS:
+        content = content.replace(name, slots[name])
+    return content
+
+
+def benchmark(lines=20000, n_groups=2000, repeats=3):
+    """Time the single-pass renderer against the str.replace chain on a synthetic large mapping."""
+    import random
+    import tempfile
+    import time
+    import tracemalloc
+
+    rng = random.Random(0)
+    words = ['question', 'answer', 'reasoning', 'GROUPS_DATA', '</script>', 'instructions', 'demo', 'field']
+    f1_lines = [' '.join(rng.choice(words) for _ in range(8)) for _ in range(lines // 10)]
+    f2_lines = [' '.join(rng.choice(words) for _ in range(12)) for _ in range(lines)]
+    groups = [{
+        'Group_ID': str(i), 'File1_Pos': f"{rng.randint(1, len(f1_lines))}:1", 'File1_Length': 8,
+        'File2_Positions': [{'pos': f"{rng.randint(1, lines)}:1", 'length': 8} for _ in range(3)],
+        'Label': f"group {i}", 'Description': 'synthetic mapping',
+    } for i in range(n_groups)]
+    slots = {'GROUPS_DATA': groups, 'FILE1_LINES': f1_lines, 'FILE2_LINES': f2_lines,
+             'FILE1_NAME': 'script.py', 'FILE2_NAME': 'response.txt', 'TITLE_PLACEHOLDER': 'benchmark',
+             **asset_slots(inline=True)}
+
+    def replace_chain(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(_render_by_replace(slots))
+
+    def single_pass(path):
+        with open(path, 'w', encoding='utf-8', buffering=1 << 16) as f:
+            render_template(TEMPLATE_CHUNKS, slots, f)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, render in [('str.replace x6', replace_chain), ('single pass', single_pass)]:
+            path = os.path.join(tmp, name.replace(' ', '_') + '.html')
+            times = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                render(path)
+                times.append(time.perf_counter() - start)
+            tracemalloc.start()
+            render(path)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results[name] = {'seconds': min(times), 'peak_mb': peak / 2 ** 20,
+                             'size_mb': os.path.getsize(path) / 2 ** 20}
+    print(f"{lines} response lines, {n_groups} groups (best of {repeats})")
+    for name, r in results.items():
+        print(f"  {name:15} {r['seconds'] * 1000:9.1f} ms  peak {r['peak_mb']:7.1f} MB  output {r['size_mb']:.1f} MB")
+    print("  (the str.replace chain also rewrites slot names that occur inside the data)")
+    return results
 
-    print(f"Visualization created at {output_html_path}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Create HTML visualization from markdown mappings.")
-    parser.add_argument("file1", help="Path to the first file (e.g., Python script)")
-    parser.add_argument("file2", help="Path to the second file (e.g., prompt+response.txt)")
-    parser.add_argument("markdown", help="Path to the markdown mapping file")
-    parser.add_argument("output", help="Path to the output HTML file")
+    parser.add_argument("file1", nargs="?", help="Path to the first file (e.g., Python script)")
+    parser.add_argument("file2", nargs="?", help="Path to the second file (e.g., prompt+response.txt)")
+    parser.add_argument("markdown", nargs="?", help="Path to the markdown mapping file")
+    parser.add_argument("output", nargs="?", help="Path to the output HTML file")
+    parser.add_argument("--batch", metavar="RESPONSES_DIR",
+                        help="Render every NN_mapping.md in this directory (scripts in its parent)")
+    parser.add_argument("--workers", type=int, default=1, help="Processes for --batch")
+    parser.add_argument("--inline", action="store_true",
+                        help="Embed the viewer CSS/JS in the page instead of linking the shared viewer.<hash> files")
+    parser.add_argument("--bench", action="store_true", help="Benchmark rendering on a large synthetic mapping")
+    parser.add_argument("--lines", type=int, default=20000, help="Response lines for --bench")
+    parser.add_argument("--groups", type=int, default=2000, help="Mapping groups for --bench")
 
     args = parser.parse_args()
-    create_visualization(args.file1, args.file2, args.markdown, args.output)
+    if args.bench:
+        benchmark(args.lines, args.groups)
+    elif args.batch:
+        create_visualizations(find_mappings(args.batch), args.workers, args.inline)
+    elif args.output:
+        create_visualization(args.file1, args.file2, args.markdown, args.output, args.inline)
+    else:
+        parser.error("give FILE1 FILE2 MARKDOWN OUTPUT, --batch DIR or --bench")